@@ -0,0 +1,19 @@
+"""
+ASGI config for app project.
+
+It exposes the ASGI callable as a module-level variable named
+``application``. Serve it with an ASGI server, e.g.:
+
+    uvicorn app.asgi:application
+
+Views run on a pool of ASGI_THREADS threads per process, see
+core.asgi.ASGIHandler.
+"""
+
+import os
+
+from core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+
+application = get_asgi_application()
@@ -20,12 +20,16 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # See https://docs.djangoproject.com/en/2.1/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'wefajbpb1mn^!bv9i!cg94ulj=j3(i592qbk3$h4glwro+o0r1'
+SECRET_KEY = os.environ.get(
+    'DJANGO_SECRET_KEY', 'wefajbpb1mn^!bv9i!cg94ulj=j3(i592qbk3$h4glwro+o0r1'
+)
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get('DJANGO_DEBUG', '1') == '1'
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = list(filter(
+    None, os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',')
+))
 
 
 # Application definition
@@ -39,17 +43,19 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'rest_framework.authtoken',
-    'core',
-    'users',
-    'recipe'
+    'core.apps.CoreConfig',
+    'users.apps.UsersConfig',
+    'recipe.apps.RecipeConfig'
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.db.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -74,21 +80,145 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'app.wsgi.application'
 
+# Views served through app.asgi run on this many threads per process.
+ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 32))
+
 
 # Database
 # https://docs.djangoproject.com/en/2.1/ref/settings/#databases
 
+# DB_BACKEND=persistent keeps one connection per thread for
+# DB_CONN_MAX_AGE seconds, pinging it before reuse when
+# DB_CONN_HEALTH_CHECKS is set. DB_BACKEND=pooled shares a bounded pool
+# of connections between the threads of a process, returned to it at
+# the end of every request.
+DB_BACKENDS = {
+    'persistent': 'core.db.backends.postgresql',
+    'pooled': 'core.db.backends.pooled',
+}
+
+DB_BACKEND = os.environ.get('DB_BACKEND', 'persistent')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': DB_BACKENDS[DB_BACKEND],
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
         'HOST': os.environ.get('DB_HOST'),
         'PORT': '5432',
+        'CONN_MAX_AGE': int(os.environ.get(
+            'DB_CONN_MAX_AGE', 0 if DB_BACKEND == 'pooled' else 60
+        )),
+        'CONN_HEALTH_CHECKS': os.environ.get(
+            'DB_CONN_HEALTH_CHECKS', '1'
+        ) == '1',
+        'POOL': {
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 5)),
+            'CHECK_AFTER': float(os.environ.get('DB_POOL_CHECK_AFTER', 30)),
+        },
     }
 }
 
+# DB_REPLICA_HOSTS lists hosts replicating the default database, each
+# added as a replica_<n> alias. Safe requests read from a random replica
+# unless the client wrote within the last PIN_SECONDS; the pin is kept in
+# a cookie and in the CACHE alias, keyed by user.
+
+DATABASE_REPLICAS = []
+
+for index, host in enumerate(
+        filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')),
+        start=1):
+    DATABASES[f'replica_{index}'] = dict(
+        DATABASES['default'], HOST=host.strip(), TEST={'MIRROR': 'default'}
+    )
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+
+REPLICA_ROUTING = {
+    'PIN_SECONDS': int(os.environ.get('DB_REPLICA_PIN_SECONDS', 10)),
+    'COOKIE': 'db_pin',
+    'CACHE': 'shared',
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.1/topics/cache/
+# The 'api' cache holds per-user list responses. API_CACHE_BACKEND selects
+# a bounded in-process LRU ('locmem') or a shared file cache ('file').
+# The 'shared' cache holds the keys every process must agree on, such as
+# the data versions of the cached responses. SHARED_CACHE_BACKEND selects
+# a table in the default database ('db') or, when a single process serves
+# and changes the data, an in-process cache ('locmem').
+
+API_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'api',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('API_CACHE_DIR', '/vol/web/cache/api'),
+    },
+}
+
+SHARED_CACHE_BACKENDS = {
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'shared_cache',
+    },
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shared',
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': dict(
+        SHARED_CACHE_BACKENDS[os.environ.get('SHARED_CACHE_BACKEND', 'db')],
+        TIMEOUT=None,
+        OPTIONS={
+            'MAX_ENTRIES': int(os.environ.get('SHARED_CACHE_MAX_ENTRIES',
+                                              100000)),
+        },
+    ),
+    'api': dict(
+        API_CACHE_BACKENDS[os.environ.get('API_CACHE_BACKEND', 'locmem')],
+        TIMEOUT=int(os.environ.get('API_CACHE_TIMEOUT', 3600)),
+        OPTIONS={
+            'MAX_ENTRIES': int(os.environ.get('API_CACHE_MAX_ENTRIES', 5000)),
+        },
+    ),
+}
+
+
+# Token authentication
+# Token keys are mapped to user snapshots in a bounded in-process LRU,
+# optionally backed by the cache alias named in AUTH_TOKEN_SHARED_CACHE.
+
+AUTH_TOKEN_CACHE = {
+    'MAX_ENTRIES': int(os.environ.get('AUTH_TOKEN_CACHE_MAX_ENTRIES', 10000)),
+    'TTL': int(os.environ.get('AUTH_TOKEN_CACHE_TTL', 60)),
+    'SHARED_CACHE': os.environ.get('AUTH_TOKEN_SHARED_CACHE') or None,
+}
+
+# MODE 'db' issues authtoken rows, 'signed' issues stateless tokens signed
+# with the SECRET_KEY that expire after EXPIRY seconds and can be refreshed
+# for REFRESH_WINDOW seconds after they were issued.
+
+AUTH_TOKEN = {
+    'MODE': os.environ.get('AUTH_TOKEN_MODE', 'db'),
+    'EXPIRY': int(os.environ.get('AUTH_TOKEN_EXPIRY', 3600)),
+    'REFRESH_WINDOW': int(os.environ.get('AUTH_TOKEN_REFRESH_WINDOW',
+                                         7 * 24 * 3600)),
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
@@ -109,6 +239,37 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# Hashes run on a bounded thread pool per process; requests beyond
+# WORKERS + QUEUE_DEPTH concurrent hashes are answered with 429.
+# Passwords are rehashed on login when PASSWORD_HASHER or ITERATIONS
+# change. The argon2 hasher needs the argon2-cffi package.
+
+PASSWORD_HASHING = {
+    'WORKERS': int(os.environ.get('PASSWORD_HASHING_WORKERS', 1)),
+    'QUEUE_DEPTH': int(os.environ.get('PASSWORD_HASHING_QUEUE_DEPTH', 4)),
+    'TIMEOUT': float(os.environ.get('PASSWORD_HASHING_TIMEOUT', 10)),
+    'ITERATIONS': int(os.environ.get('PASSWORD_HASH_ITERATIONS', 0)) or None,
+}
+
+PASSWORD_HASHER_CHOICES = {
+    'pbkdf2': 'core.hashing.TunedPBKDF2PasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+}
+
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+
+PASSWORD_HASHERS = [PASSWORD_HASHER_CHOICES[PASSWORD_HASHER]] + [
+    hasher for name, hasher in sorted(PASSWORD_HASHER_CHOICES.items())
+    if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
+AUTHENTICATION_BACKENDS = ['users.backends.PooledModelBackend']
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/2.1/topics/i18n/
 
@@ -129,8 +290,40 @@ USE_TZ = True
 STATIC_URL = '/static/'
 MEDIA_URL = '/media/'
 
+# Stream uploads to temporary files in chunks instead of buffering small
+# ones in memory; recipe images are then moved into MEDIA_ROOT.
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
 MEDIA_ROOT = '/vol/web/media'
 
+# Uploads are stored once per distinct content under a sha256 path and
+# removed when the last recipe or image variant using them is deleted.
+DEFAULT_FILE_STORAGE = 'core.storage.ContentAddressedStorage'
+
+# Media is served by core.views.serve_media. Set MEDIA_SENDFILE to
+# 'x-accel-redirect' (nginx, with an internal location at
+# MEDIA_SENDFILE_PREFIX aliasing MEDIA_ROOT) or 'x-sendfile' (Apache,
+# lighttpd) to hand transfers to the front-end server. Content-addressed
+# files are cached forever, others for MEDIA_CACHE_MAX_AGE seconds.
+MEDIA_SENDFILE = os.environ.get('MEDIA_SENDFILE') or None
+MEDIA_SENDFILE_PREFIX = os.environ.get('MEDIA_SENDFILE_PREFIX',
+                                       '/protected-media/')
+MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 3600))
+
 STATIC_ROOT = '/vol/web/static'
 
+# collectstatic writes gzipped copies and hashed names, which WhiteNoise
+# serves with far-future cache headers.
+STATICFILES_STORAGE = 'core.storage.StaticFilesStorage'
+
 AUTH_USER_MODEL = 'core.CustomUser'
+
+# Text search configuration of the recipe search vectors (Postgres only)
+SEARCH_CONFIG = os.environ.get('SEARCH_CONFIG', 'english')
+
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'recipe.pagination.KeysetPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 100)),
+}
@@ -0,0 +1,69 @@
+"""Compare per-request authentication overhead of DRF token authentication,
+the cached token authentication and signed tokens.
+
+Usage, from the app directory:
+
+    python -m benchmarks.auth_overhead [--requests N]
+"""
+import argparse
+import time
+
+from benchmarks import utils
+
+
+def measure(authentication, request, count):
+    """Return microseconds and queries per authenticated request"""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    authentication.authenticate(request)
+    with CaptureQueriesContext(connection) as ctx:
+        start = time.perf_counter()
+        for _ in range(count):
+            authentication.authenticate(request)
+        elapsed = time.perf_counter() - start
+    return elapsed / count * 1e6, len(ctx.captured_queries) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    utils.setup()
+    from django.contrib.auth import get_user_model
+    from rest_framework.authentication import TokenAuthentication
+    from rest_framework.authtoken.models import Token
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from users.authentication import (CachedTokenAuthentication,
+                                      SignedTokenAuthentication, sign_token)
+
+    user = get_user_model().objects.create_user(
+        email='bench-auth@example.com', password='benchpass'
+    )
+    try:
+        token = Token.objects.create(user=user)
+        factory = APIRequestFactory()
+        request = Request(factory.get(
+            '/', HTTP_AUTHORIZATION=f'Token {token.key}'
+        ))
+        signed_request = Request(factory.get(
+            '/', HTTP_AUTHORIZATION=f'Token {sign_token(user)}'
+        ))
+        for name, authentication, auth_request in (
+                ('TokenAuthentication', TokenAuthentication(), request),
+                ('CachedTokenAuthentication', CachedTokenAuthentication(),
+                 request),
+                ('SignedTokenAuthentication', SignedTokenAuthentication(),
+                 signed_request)):
+            micros, queries = measure(authentication, auth_request,
+                                      args.requests)
+            print(f'{name:28} {micros:8.1f} us/request '
+                  f'{queries:4.1f} queries/request')
+    finally:
+        user.delete()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Load test a running server with many concurrent connections.
+
+Run the same endpoint behind the WSGI and the ASGI entry points on the
+same hardware and compare, e.g.:
+
+    python manage.py runserver 8000
+    uvicorn app.asgi:application --port 8001
+
+    python -m benchmarks.concurrency http://localhost:8000/api/recipe/tags/ \\
+        --token KEY --connections 1000
+    python -m benchmarks.concurrency http://localhost:8001/api/recipe/tags/ \\
+        --token KEY --connections 1000
+
+Each client sends its requests one after the other, on a new connection
+every time; raise the open files limit for large --connections counts.
+--slow-clients more clients trickle their request headers, like clients
+on a bad network, to show whether they hold workers hostage. The script
+needs nothing but the standard library and never touches the database.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+async def fetch(host, port, request, trickle=0.0):
+    """Send one request on a new connection and return the status code"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        if trickle:
+            for line in request.split(b'\r\n'):
+                writer.write(line + b'\r\n')
+                await writer.drain()
+                await asyncio.sleep(trickle)
+        else:
+            writer.write(request)
+        return await read_response(reader)
+    finally:
+        writer.close()
+
+
+async def read_response(reader):
+    """Read a response by its framing, not waiting for the server to close"""
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip().lower()
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                break
+    else:
+        await reader.read()
+    return status
+
+
+async def client(host, port, request, requests, trickle, latencies, errors):
+    for _ in range(requests):
+        start = time.perf_counter()
+        try:
+            status = await fetch(host, port, request, trickle)
+        except (OSError, IndexError, ValueError,
+                asyncio.IncompleteReadError):
+            errors.append(None)
+            continue
+        if status >= 400:
+            errors.append(status)
+        elif not trickle:
+            latencies.append(time.perf_counter() - start)
+
+
+async def run(args):
+    url = urlsplit(args.url)
+    path = url.path + (f'?{url.query}' if url.query else '')
+    headers = [f'GET {path or "/"} HTTP/1.1', f'Host: {url.netloc}',
+               'Connection: close']
+    if args.token:
+        headers.append(f'Authorization: Token {args.token}')
+    request = ('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1')
+    host, port = url.hostname, url.port or 80
+
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(host, port, request, args.requests, 0.0, latencies, errors)
+        for _ in range(args.connections)
+    ), *(
+        client(host, port, request, 1, args.trickle, [], errors)
+        for _ in range(args.slow_clients)
+    ))
+    elapsed = time.perf_counter() - start
+
+    print(f'{len(latencies)} requests in {elapsed:.2f}s from '
+          f'{args.connections} connections, {args.slow_clients} slow '
+          f'clients, {len(errors)} errors')
+    if latencies:
+        latencies.sort()
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        print(f'{len(latencies) / elapsed:.1f} requests/s, latency median '
+              f'{statistics.median(latencies) * 1000:.1f} ms, '
+              f'p99 {p99 * 1000:.1f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('url')
+    parser.add_argument('--token', help='API token to authenticate with')
+    parser.add_argument('--connections', type=int, default=200,
+                        help='Concurrent clients')
+    parser.add_argument('--requests', type=int, default=10,
+                        help='Requests per client')
+    parser.add_argument('--slow-clients', type=int, default=0)
+    parser.add_argument('--trickle', type=float, default=1.0,
+                        help='Seconds between header lines of slow clients')
+    asyncio.get_event_loop().run_until_complete(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Measure requests/s against PostgreSQL when every request connects, with
+persistent connections and with the pooled backend.
+
+Each simulated request runs the connection housekeeping Django runs at
+request start and end, plus one recipe listing query. Run it against a
+local Postgres, e.g. the db service of docker-compose.
+
+Usage, from the app directory:
+
+    python -m benchmarks.db_pooling [--requests N] [--clients N]
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import utils
+
+MODES = (
+    ('connect per request', {
+        'ENGINE': 'core.db.backends.postgresql', 'CONN_MAX_AGE': 0,
+    }),
+    ('persistent + health checks', {
+        'ENGINE': 'core.db.backends.postgresql', 'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+    }),
+    ('pooled', {
+        'ENGINE': 'core.db.backends.pooled', 'CONN_MAX_AGE': 0,
+        'CONN_HEALTH_CHECKS': False,
+    }),
+)
+
+
+def run(user_id, requests, clients):
+    """Return requests/s of concurrent simulated requests"""
+    from django.db import close_old_connections
+    from core.models import Recipe
+
+    def request(_):
+        close_old_connections()
+        list(Recipe.objects.filter(user_id=user_id)
+             .order_by('-title')[:20])
+        close_old_connections()
+
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        start = time.perf_counter()
+        list(executor.map(request, range(requests)))
+        elapsed = time.perf_counter() - start
+    return requests / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--clients', type=int, default=8)
+    args = parser.parse_args()
+
+    utils.setup()
+    from django.db import connection, connections
+
+    if connection.vendor != 'postgresql':
+        parser.exit(1, 'This benchmark needs a PostgreSQL database.\n')
+    from core.db.backends.pooled.base import close_pools, pool_stats
+
+    user = utils.seed('bench-pooling@example.com', recipes=200)
+    settings_dict = connections.databases['default']
+    original = dict(settings_dict)
+    try:
+        for name, overrides in MODES:
+            settings_dict.update(overrides, POOL=dict(
+                original.get('POOL', {}), MAX_SIZE=args.clients
+            ))
+            # New worker threads build connections from these settings.
+            throughput = run(user.pk, args.requests, args.clients)
+            print(f'{name:28} {throughput:9.1f} requests/s')
+        print(f'pool: {pool_stats()}')
+    finally:
+        settings_dict.clear()
+        settings_dict.update(original)
+        close_pools()
+        connection.close()
+        user.delete()
+
+
+if __name__ == '__main__':
+    main()
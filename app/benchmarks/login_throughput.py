@@ -0,0 +1,71 @@
+"""Measure login throughput through the password hashing pool.
+
+Concurrent clients log in with the pooled authentication backend, which
+is what the token endpoint runs. Logins refused because the pool queue is
+full are counted separately; they are the requests answered with 429.
+
+Usage, from the app directory:
+
+    python -m benchmarks.login_throughput [--logins N] [--clients N]
+                                          [--workers N] [--queue-depth N]
+"""
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--queue-depth', type=int, default=16)
+    args = parser.parse_args()
+
+    from benchmarks import utils
+    utils.setup()
+    from django.contrib.auth import get_user_model
+    from django.db import connections
+    from core import hashing
+    from users.backends import PooledModelBackend
+
+    email, password = 'bench-login@example.com', 'benchpass'
+    user = get_user_model().objects.create_user(email=email,
+                                                password=password)
+    hashing.pool = hashing.HashingPool(workers=args.workers,
+                                       queue_depth=args.queue_depth)
+    backend = PooledModelBackend()
+    refused = []
+    lock = threading.Lock()
+
+    def login(_):
+        try:
+            return backend.authenticate(None, username=email,
+                                        password=password)
+        except hashing.HashingBusy:
+            with lock:
+                refused.append(1)
+        finally:
+            connections.close_all()
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clients) as clients:
+            logins = [result for result in
+                      clients.map(login, range(args.logins)) if result]
+        elapsed = time.perf_counter() - start
+    finally:
+        user.delete()
+
+    cores = min(args.workers, os.cpu_count() or 1)
+    throughput = len(logins) / elapsed
+    print(f'{len(logins)} logins, {len(refused)} refused in {elapsed:.2f}s')
+    print(f'{throughput:.1f} logins/s, {throughput / cores:.1f} '
+          f'logins/s per core ({args.workers} hashing workers, '
+          f'{args.clients} clients)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Show query plans for the per-user listing queries with and without the
+composite indexes from core migration 0006_listing_indexes.
+
+Usage, from the app directory:
+
+    python -m benchmarks.query_plans [--recipes N]
+"""
+import argparse
+
+from benchmarks import utils
+
+INDEXES = {
+    'core_tag': 'core_tag_user_id_4ceac3_idx',
+    'core_ingredient': 'core_ingred_user_id_bc8c66_idx',
+    'core_recipe': 'core_recipe_user_id_6248a0_idx',
+    'core_recipe_tags': 'core_recipe_tags_tag_id_recipe_id_idx',
+    'core_recipe_ingredients':
+        'core_recipe_ingredients_ingredient_id_recipe_id_idx',
+}
+
+
+def listing_queries(user):
+    """Return the querysets issued by the listing endpoints"""
+    from django.db.models import Exists, OuterRef
+    from core.models import Tag, Ingredient, Recipe
+
+    tag_ids = list(Tag.objects.filter(user=user)
+                   .values_list('id', flat=True)[:2])
+    return {
+        'tags page': Tag.objects.filter(user=user)
+                        .order_by('-name', '-id')[:100],
+        'ingredients page': Ingredient.objects.filter(user=user)
+                                      .order_by('-name', '-id')[:100],
+        'recipes page': Recipe.objects.filter(user=user)
+                              .order_by('-title', '-id')[:100],
+        'recipes by tag': Recipe.objects.filter(user=user,
+                                                tags__id__in=tag_ids),
+        'assigned tags': Tag.objects.filter(user=user).annotate(
+            assigned=Exists(Recipe.tags.through.objects.filter(
+                tag=OuterRef('pk')
+            ))
+        ).filter(assigned=True),
+    }
+
+
+def report(title, user):
+    print(f'\n=== {title}')
+    for name, queryset in listing_queries(user).items():
+        elapsed = utils.timed(lambda: list(queryset.all()))
+        print(f'\n--- {name} ({elapsed:.2f} ms)')
+        print(queryset.explain())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--recipes', type=int, default=20000)
+    args = parser.parse_args()
+
+    utils.setup()
+    from django.db import connection
+
+    user = utils.seed('bench-plans@example.com', recipes=args.recipes,
+                      tags=500, ingredients=2000)
+    try:
+        utils.analyze()
+        report('with listing indexes', user)
+        # Start over on a new connection so no cached statement keeps
+        # planning against the indexes dropped below.
+        connection.close()
+        with utils.rolled_back():
+            with connection.cursor() as cursor:
+                for index in INDEXES.values():
+                    cursor.execute(f'DROP INDEX {index}')
+            utils.analyze()
+            report('without listing indexes', user)
+    finally:
+        connection.close()
+        user.delete()
+
+
+if __name__ == '__main__':
+    main()
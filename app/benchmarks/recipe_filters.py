@@ -0,0 +1,70 @@
+"""Compare the recipe tag filter written as a join against the Exists
+subquery used for match=any and the HAVING COUNT subquery used for
+match=all.
+
+Usage, from the app directory:
+
+    python -m benchmarks.recipe_filters [--recipes N] [--tags-per-recipe N]
+"""
+import argparse
+
+from benchmarks import utils
+
+
+def filter_queries(user, tag_ids):
+    """Return the querysets compared, first page of each"""
+    from django.db.models import Count, Exists, OuterRef
+    from core.models import Recipe
+
+    recipes = Recipe.objects.filter(user=user).order_by('-title')
+    links = Recipe.tags.through.objects.filter(tag_id__in=tag_ids)
+    return {
+        'join (any, with duplicates)':
+            recipes.filter(tags__id__in=tag_ids)[:100],
+        'join + distinct (any)':
+            recipes.filter(tags__id__in=tag_ids).distinct()[:100],
+        'exists (any)': recipes.annotate(matched=Exists(
+            links.filter(recipe_id=OuterRef('pk'))
+        )).filter(matched=True)[:100],
+        'having count (all)': recipes.filter(pk__in=links.values(
+            'recipe_id'
+        ).annotate(matched=Count('tag_id')).filter(
+            matched=len(tag_ids)
+        ).values('recipe_id'))[:100],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--recipes', type=int, default=100000)
+    parser.add_argument('--tags', type=int, default=100)
+    parser.add_argument('--tags-per-recipe', type=int, default=20)
+    parser.add_argument('--filter-tags', type=int, default=3)
+    args = parser.parse_args()
+
+    utils.setup()
+    from django.db import connection
+    from core.models import Tag
+
+    # SQLite limits the variables per statement and sizes batches itself.
+    batch_size = 5000 if connection.vendor == 'postgresql' else None
+    user = utils.seed('bench-filters@example.com', recipes=args.recipes,
+                      tags=args.tags, ingredients=10,
+                      tags_per_recipe=args.tags_per_recipe,
+                      ingredients_per_recipe=1, batch_size=batch_size)
+    try:
+        utils.analyze()
+        tag_ids = list(Tag.objects.filter(user=user).order_by('pk')
+                       .values_list('id', flat=True)[:args.filter_tags])
+        print(f'{args.recipes} recipes, {args.tags_per_recipe} tags each, '
+              f'filtering by {len(tag_ids)} tags')
+        for name, queryset in filter_queries(user, tag_ids).items():
+            rows = len(list(queryset.all()))
+            elapsed = utils.timed(lambda: list(queryset.all()))
+            print(f'{name:30} {elapsed:9.2f} ms  {rows} rows')
+    finally:
+        user.delete()
+
+
+if __name__ == '__main__':
+    main()
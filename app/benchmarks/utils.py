@@ -0,0 +1,100 @@
+"""Shared helpers for the benchmark scripts.
+
+Benchmarks run against the configured database and delete the data they
+seed when they finish, so they can be pointed at a dev database.
+"""
+import os
+import random
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def setup():
+    """Configure Django for a standalone script"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    django.setup()
+
+
+class Rollback(Exception):
+    """Raised to discard everything a benchmark wrote"""
+
+
+@contextmanager
+def rolled_back():
+    """Run the block in a transaction that is rolled back on exit"""
+    from django.db import transaction
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def analyze():
+    """Refresh planner statistics after seeding"""
+    from django.db import connection
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+
+def timed(func, repeat=5):
+    """Return the best wall clock time of func in milliseconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def seed(email, recipes=1000, tags=50, ingredients=200,
+         tags_per_recipe=3, ingredients_per_recipe=8, batch_size=None):
+    """Create a user with a recipe book of the given size"""
+    from django.contrib.auth import get_user_model
+    from core.models import Tag, Ingredient, Recipe
+
+    user = get_user_model().objects.create_user(email=email,
+                                                password='benchpass')
+    Tag.objects.bulk_create(
+        [Tag(user=user, name=f'tag {i}') for i in range(tags)],
+        batch_size=batch_size
+    )
+    Ingredient.objects.bulk_create(
+        [Ingredient(user=user, name=f'ingredient {i}')
+         for i in range(ingredients)],
+        batch_size=batch_size
+    )
+    Recipe.objects.bulk_create(
+        [Recipe(user=user, title=f'recipe {i}', cook_time_minutes=i % 180,
+                price=i % 100) for i in range(recipes)],
+        batch_size=batch_size
+    )
+    tag_ids = list(Tag.objects.filter(user=user).values_list('id', flat=True))
+    ingredient_ids = list(
+        Ingredient.objects.filter(user=user).values_list('id', flat=True)
+    )
+    recipe_ids = Recipe.objects.filter(user=user).values_list('id',
+                                                              flat=True)
+    rng = random.Random(recipes)
+    TagLink = Recipe.tags.through
+    IngredientLink = Recipe.ingredients.through
+    tag_links, ingredient_links = [], []
+    for recipe_id in recipe_ids.iterator():
+        tag_links.extend(
+            TagLink(recipe_id=recipe_id, tag_id=tag_id)
+            for tag_id in rng.sample(tag_ids, tags_per_recipe)
+        )
+        ingredient_links.extend(
+            IngredientLink(recipe_id=recipe_id, ingredient_id=ingredient_id)
+            for ingredient_id in rng.sample(ingredient_ids,
+                                            ingredients_per_recipe)
+        )
+    TagLink.objects.bulk_create(tag_links, batch_size=batch_size)
+    IngredientLink.objects.bulk_create(ingredient_links,
+                                       batch_size=batch_size)
+    return user
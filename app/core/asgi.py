@@ -0,0 +1,182 @@
+import asyncio
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core import signals
+from django.core.handlers import base
+from django.core.handlers.wsgi import WSGIRequest, get_script_name
+from django.urls import set_script_prefix
+
+# Messages a handler thread may queue ahead of a slow client.
+QUEUED_CHUNKS = 4
+
+
+class ClientGone(Exception):
+    """The client disconnected before the response was sent"""
+
+
+class ASGIHandler(base.BaseHandler):
+    """Serve Django over ASGI, running views on a bounded thread pool.
+
+    Request bodies are read and buffered responses are sent by the event
+    loop, so slow uploads and slow clients only cost a coroutine. Views
+    run on at most ASGI_THREADS threads, which also bounds the database
+    connections per process. Streaming responses are iterated by the
+    thread that created them, as their database cursors belong to it,
+    at the pace the client reads them.
+    """
+    request_class = WSGIRequest
+
+    def __init__(self, threads):
+        super().__init__()
+        self.load_middleware()
+        self.executor = ThreadPoolExecutor(max_workers=threads,
+                                           thread_name_prefix='asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f'Unsupported ASGI scope {scope["type"]!r}')
+        try:
+            body = await self.read_body(receive)
+        except ClientGone:
+            return
+        loop = asyncio.get_event_loop()
+        messages = asyncio.Queue(maxsize=QUEUED_CHUNKS)
+        gone = threading.Event()
+        handled = loop.run_in_executor(
+            self.executor, self.handle, self.environ(scope, body), loop,
+            messages, gone
+        )
+        try:
+            while True:
+                message = await messages.get()
+                if message is None:
+                    break
+                await send(message)
+        except BaseException:
+            gone.set()
+            # Unblock the handler thread so it can close the response.
+            while not handled.done():
+                try:
+                    messages.get_nowait()
+                except asyncio.QueueEmpty:
+                    await asyncio.sleep(0.01)
+            raise
+        finally:
+            body.close()
+        await handled
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        """Buffer the request body, spooling large ones to disk"""
+        body = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                raise ClientGone
+            body.write(message.get('body', b''))
+            if not message.get('more_body', False):
+                break
+        body.seek(0)
+        return body
+
+    def environ(self, scope, body):
+        """Return the WSGI environ of an ASGI HTTP scope"""
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('127.0.0.1', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', ''),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope['query_string'].decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+            'REMOTE_ADDR': client[0],
+            'CONTENT_LENGTH': str(body.seek(0, 2)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        body.seek(0)
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                name = f'HTTP_{name}'
+            value = value.decode('latin-1')
+            if name in environ and name.startswith('HTTP_'):
+                # HTTP/2 clients may send each cookie in its own header.
+                separator = '; ' if name == 'HTTP_COOKIE' else ','
+                value = f'{environ[name]}{separator}{value}'
+            environ[name] = value
+        return environ
+
+    def handle(self, environ, loop, messages, gone):
+        """Run the view in a pool thread, queueing the ASGI messages"""
+        def put(message):
+            if gone.is_set():
+                raise ClientGone
+            asyncio.run_coroutine_threadsafe(
+                messages.put(message), loop
+            ).result()
+
+        response = None
+        try:
+            set_script_prefix(get_script_name(environ))
+            signals.request_started.send(sender=self.__class__,
+                                         environ=environ)
+            response = self.get_response(self.request_class(environ))
+            headers = [(name.encode('latin-1'), value.encode('latin-1'))
+                       for name, value in response.items()]
+            headers += [(b'Set-Cookie', cookie.output(header='').strip()
+                         .encode('latin-1'))
+                        for cookie in response.cookies.values()]
+            put({'type': 'http.response.start',
+                 'status': response.status_code, 'headers': headers})
+            if response.streaming:
+                for chunk in response:
+                    put({'type': 'http.response.body', 'body': chunk,
+                         'more_body': True})
+                put({'type': 'http.response.body', 'body': b''})
+            else:
+                put({'type': 'http.response.body',
+                     'body': response.content})
+        except ClientGone:
+            pass
+        finally:
+            if response is not None:
+                # Sends request_finished, closing the thread's connections.
+                response.close()
+            else:
+                signals.request_finished.send(sender=self.__class__)
+            if not gone.is_set():
+                asyncio.run_coroutine_threadsafe(messages.put(None),
+                                                 loop).result()
+
+
+def get_asgi_application():
+    """Set up Django and return the ASGI callable"""
+    import django
+    django.setup(set_prefix=False)
+    return ASGIHandler(threads=settings.ASGI_THREADS)
@@ -0,0 +1,107 @@
+import threading
+
+from django.db.backends.postgresql import base, creation
+
+from core.db.health import HealthCheckMixin
+from core.db.pool import ConnectionPool
+
+POOL_DEFAULTS = {
+    'MAX_SIZE': 10,
+    'TIMEOUT': 5.0,
+    'CHECK_AFTER': 30.0,
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def connect(settings_dict, conn_params):
+    """Open a raw psycopg2 connection with the configured isolation level"""
+    connection = base.Database.connect(**conn_params)
+    isolation_level = settings_dict['OPTIONS'].get('isolation_level')
+    if (isolation_level is not None and
+            isolation_level != connection.isolation_level):
+        connection.set_session(isolation_level=isolation_level)
+    return connection
+
+
+def ping(connection):
+    """Return True if a raw psycopg2 connection answers a query"""
+    if connection.closed:
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except base.Database.Error:
+        return False
+    return True
+
+
+def get_pool(wrapper, conn_params):
+    """Return the process wide pool for a database and its parameters"""
+    key = (wrapper.alias, tuple(sorted(conn_params.items())))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            options = dict(POOL_DEFAULTS,
+                           **wrapper.settings_dict.get('POOL', {}))
+            pool = _pools[key] = ConnectionPool(
+                connect=lambda: connect(wrapper.settings_dict, conn_params),
+                is_usable=ping,
+                max_size=options['MAX_SIZE'],
+                timeout=options['TIMEOUT'],
+                check_after=options['CHECK_AFTER'],
+            )
+        return pool
+
+
+def pool_stats():
+    """Return the usage counters of every pool, by database alias"""
+    with _pools_lock:
+        pools = list(_pools.items())
+    stats = {}
+    for (alias, params), pool in pools:
+        database = dict(params).get('database')
+        stats[f'{alias}:{database}'] = pool.stats()
+    return stats
+
+
+def close_pools():
+    """Close the idle connections of every pool"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Pooled connections to the test database would block DROP DATABASE.
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(HealthCheckMixin, base.DatabaseWrapper):
+    """PostgreSQL backend borrowing connections from a process wide pool.
+
+    Closing the connection, e.g. at the end of a request with the default
+    CONN_MAX_AGE of 0, returns it to the pool instead of disconnecting.
+    The pool is sized and tuned by the POOL dict of the database settings.
+    """
+    creation_class = DatabaseCreation
+
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(self, conn_params)
+        connection = self.pool.acquire()
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get('isolation_level',
+                                           connection.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            self.pool.release(
+                self.connection,
+                discard=self.errors_occurred and not self.is_usable()
+            )
@@ -0,0 +1,7 @@
+from django.db.backends.postgresql import base
+
+from core.db.health import HealthCheckMixin
+
+
+class DatabaseWrapper(HealthCheckMixin, base.DatabaseWrapper):
+    """PostgreSQL backend with health checks of persistent connections"""
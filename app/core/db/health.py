@@ -0,0 +1,26 @@
+class HealthCheckMixin:
+    """Ping persistent connections before their first use in a request.
+
+    With CONN_MAX_AGE, a connection kept from an earlier request may have
+    been closed by the server or a proxy in the meantime. When the
+    database sets CONN_HEALTH_CHECKS, such a connection is checked once,
+    before the first query of the next request, and replaced if broken.
+    """
+    health_check_done = True
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # Runs at the start and end of every request.
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if (self.connection is not None and not self.health_check_done and
+                self.settings_dict.get('CONN_HEALTH_CHECKS')):
+            self.health_check_done = True
+            if not self.in_atomic_block and not self.is_usable():
+                self.close()
+        super().ensure_connection()
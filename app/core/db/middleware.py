@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+
+from core.db import routers
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaRoutingMiddleware:
+    """Let safe requests read from replicas, pinning writers to the primary.
+
+    A successful unsafe request sets a cookie holding the end of the pin
+    window and, once the user is known, a per-user cache marker, so both
+    browsers and token clients that drop cookies read their own writes.
+    The reads of a streamed response are routed until it was sent.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        safe = request.method in SAFE_METHODS
+        routers.begin_request(request, safe and not self.is_pinned(request))
+        response = self.get_response(request)
+        if not safe and response.status_code < 400:
+            self.pin(request, response)
+        return response
+
+    def is_pinned(self, request):
+        cookie = request.COOKIES.get(settings.REPLICA_ROUTING['COOKIE'])
+        try:
+            return float(cookie) > time.time()
+        except (TypeError, ValueError):
+            return False
+
+    def pin(self, request, response):
+        seconds = routers.pin_seconds()
+        response.set_cookie(settings.REPLICA_ROUTING['COOKIE'],
+                            str(int(time.time() + seconds)),
+                            max_age=seconds, httponly=True)
+        user_id = routers.authenticated_user_id(request)
+        if user_id is not None:
+            routers.pin_user(user_id)
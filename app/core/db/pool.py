@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import Counter
+
+from django.db.utils import OperationalError
+
+
+class PoolExhausted(OperationalError):
+    """No pooled connection became free within the pool timeout"""
+
+
+class ConnectionPool:
+    """Bounded pool of DB-API connections shared by the threads of a process.
+
+    At most `max_size` connections are checked out or idle at a time;
+    acquire() waits up to `timeout` seconds for one to be released. Idle
+    connections are reused most recently released first, and those idle
+    for longer than `check_after` seconds are pinged with `is_usable`
+    before being handed out, so connections dropped by the server or a
+    proxy are replaced instead of failing the next query.
+    """
+
+    def __init__(self, connect, is_usable, max_size=10, timeout=5.0,
+                 check_after=30.0):
+        self.connect = connect
+        self.is_usable = is_usable
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_after = check_after
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._idle = []
+        self._lock = threading.Lock()
+        self._stats = Counter()
+        self._in_use = 0
+
+    def acquire(self):
+        """Return a usable connection, connecting if none is idle"""
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            self._record('timeouts')
+            raise PoolExhausted(
+                f'No connection released within {self.timeout}s'
+            )
+        try:
+            connection = self._checkout()
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._in_use += 1
+            self._stats['checkouts'] += 1
+            self._stats['wait_ms'] += (time.monotonic() - start) * 1000
+        return connection
+
+    def _checkout(self):
+        while True:
+            with self._lock:
+                idle = self._idle.pop() if self._idle else None
+            if idle is None:
+                connection = self.connect()
+                self._record('created')
+                return connection
+            connection, released_at = idle
+            if time.monotonic() - released_at < self.check_after:
+                return connection
+            self._record('health_checks')
+            if self.is_usable(connection):
+                return connection
+            self._record('health_check_failures')
+            self._discard(connection)
+
+    def release(self, connection, discard=False):
+        """Return a connection to the pool, or close it if discard is set.
+
+        Any open transaction is rolled back; connections that cannot be
+        rolled back are closed.
+        """
+        try:
+            if not discard:
+                try:
+                    connection.rollback()
+                except Exception:
+                    discard = True
+            if discard:
+                self._discard(connection)
+            else:
+                with self._lock:
+                    self._idle.append((connection, time.monotonic()))
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    def _discard(self, connection):
+        self._record('discarded')
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            self._discard(connection)
+
+    def _record(self, event):
+        with self._lock:
+            self._stats[event] += 1
+
+    def stats(self):
+        """Return usage counters and the current pool occupancy"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(in_use=self._in_use, idle=len(self._idle),
+                         max_size=self.max_size)
+        stats['wait_ms'] = round(stats.get('wait_ms', 0.0), 3)
+        return stats
@@ -0,0 +1,111 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import SimpleLazyObject
+
+PIN_KEY = 'db:pin:{user_id}'
+
+_state = threading.local()
+
+
+def replicas():
+    """Return the aliases of the configured read replicas"""
+    return settings.DATABASE_REPLICAS
+
+
+def begin_request(request, use_replicas):
+    """Route the reads of the current thread's request"""
+    _state.request = request if use_replicas else None
+    _state.pinned_user = None
+
+
+def end_request():
+    """Route reads to the primary again once a response was sent"""
+    _state.request = None
+    _state.pinned_user = None
+
+
+def pin_seconds():
+    return settings.REPLICA_ROUTING['PIN_SECONDS']
+
+
+def pin_user(user_id):
+    """Send the reads of a user to the primary for PIN_SECONDS"""
+    caches[settings.REPLICA_ROUTING['CACHE']].set(
+        PIN_KEY.format(user_id=user_id), time.time() + pin_seconds(),
+        timeout=pin_seconds()
+    )
+
+
+def is_user_pinned(user_id):
+    pinned_until = caches[settings.REPLICA_ROUTING['CACHE']].get(
+        PIN_KEY.format(user_id=user_id)
+    )
+    return pinned_until is not None and pinned_until > time.time()
+
+
+def authenticated_user_id(request):
+    """Return the id of the user authenticated so far, if any.
+
+    DRF replaces request.user once a view authenticated the request; the
+    lazy session user is left alone, resolving it would query.
+    """
+    user = request.__dict__.get('user')
+    if user is None or isinstance(user, SimpleLazyObject):
+        return None
+    return user.pk if user.is_authenticated else None
+
+
+def _reads_from_replicas():
+    request = getattr(_state, 'request', None)
+    if request is None:
+        return False
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return False
+    user_id = authenticated_user_id(request)
+    if user_id is None:
+        return True
+    if _state.pinned_user is None or _state.pinned_user[0] != user_id:
+        _state.pinned_user = (user_id, is_user_pinned(user_id))
+    return not _state.pinned_user[1]
+
+
+class ReplicaRouter:
+    """Send reads to a random replica and writes to the primary.
+
+    Only reads of safe requests go to replicas, and only until the user
+    writes: ReplicaRoutingMiddleware then pins the client to the primary
+    for REPLICA_ROUTING['PIN_SECONDS'] so they read their own writes.
+    Reads in transactions, in code running outside of requests such as
+    management commands, and of authentication tokens, which must not
+    outlive their revocation, always use the primary. So do the entries
+    of the database cache, which hold data versions and pins.
+    """
+    primary_app_labels = ('authtoken', 'django_cache')
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in self.primary_app_labels:
+            return DEFAULT_DB_ALIAS
+        aliases = replicas()
+        if not aliases or not _reads_from_replicas():
+            return DEFAULT_DB_ALIAS
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema from the primary.
+        if db in replicas():
+            return False
+        return None
@@ -0,0 +1,97 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import Throttled
+
+
+class HashingBusy(Throttled):
+    default_detail = _('Too many password checks in progress.')
+
+
+class TunedPBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2 with the iteration count of PASSWORD_HASHING['ITERATIONS']"""
+
+    @property
+    def iterations(self):
+        return (settings.PASSWORD_HASHING.get('ITERATIONS') or
+                hashers.PBKDF2PasswordHasher.iterations)
+
+
+class HashingPool:
+    """Bounded pool of threads running password hashing.
+
+    Key derivation releases the GIL, so hashes run in parallel with the
+    request threads, at most `workers` at a time. At most `queue_depth`
+    more calls may wait for a thread; further calls fail fast with
+    HashingBusy instead of piling up on the CPU.
+    """
+
+    def __init__(self, workers=1, queue_depth=4, timeout=None):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, 'PASSWORD_HASHING', {})
+        return cls(workers=options.get('WORKERS', 1),
+                   queue_depth=options.get('QUEUE_DEPTH', 4),
+                   timeout=options.get('TIMEOUT'))
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix='password-hashing'
+                )
+            return self._executor
+
+    def run(self, func, *args, **kwargs):
+        """Run func in the pool and return its result, or raise HashingBusy"""
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy(wait=1)
+        try:
+            future = self.executor.submit(func, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda future: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise HashingBusy(wait=1)
+
+
+pool = HashingPool.from_settings()
+
+
+def set_password(user, raw_password):
+    """Hash and set a user's password in the hashing pool"""
+    pool.run(user.set_password, raw_password)
+
+
+def check_password(user, raw_password):
+    """Check a user's password in the hashing pool.
+
+    Passwords stored with another hasher or other parameters than the
+    preferred one are rehashed and saved on success.
+    """
+    outdated = []
+    valid = pool.run(hashers.check_password, raw_password, user.password,
+                     outdated.append)
+    if valid and outdated:
+        set_password(user, raw_password)
+        user.save(update_fields=['password'])
+    return valid
+
+
+def make_password(raw_password):
+    """Return the hash of a password, computed in the hashing pool"""
+    return pool.run(hashers.make_password, raw_password)
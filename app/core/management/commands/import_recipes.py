@@ -0,0 +1,299 @@
+import csv
+import functools
+import gzip
+import io
+import json
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from core.models import Tag, Ingredient, Recipe
+from recipe import cache, search
+from recipe.export import LIST_SEPARATOR
+
+RECIPE_FIELDS = ('title', 'cook_time_minutes', 'price', 'link')
+# Columns written by COPY. Django drops the database defaults of the
+# columns it adds, so every NOT NULL column must be listed here.
+COPY_COLUMNS = ('id', 'user_id') + RECIPE_FIELDS + ('image_status',
+                                                    'updated_at')
+
+
+def open_binary(path):
+    """Open a plain or gzipped file, records are decoded one by one"""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def raise_error(exc):
+    raise exc
+
+
+def read_ndjson(stream):
+    """Yield the line number and a loader of every non-blank line.
+
+    Loaders return the decoded object or raise ValueError, so malformed
+    lines are reported and skipped like invalid rows.
+    """
+    for number, line in enumerate(stream, start=1):
+        if line.strip():
+            yield number, functools.partial(json.loads, line)
+
+
+def load_csv_record(header, values):
+    """Return the object of a CSV record, splitting its name lists"""
+    try:
+        for value in values:
+            value.encode('utf-8')
+    except UnicodeEncodeError:
+        raise ValueError('The record is not valid UTF-8.')
+    row = dict(zip(header, values))
+    for field in ('tags', 'ingredients'):
+        value = row.get(field) or ''
+        row[field] = value.split(LIST_SEPARATOR) if value else []
+    return row
+
+
+def read_csv(stream):
+    """Yield the line number and a loader of every record.
+
+    Undecodable bytes are kept as surrogates and malformed records are
+    turned into failing loaders, so neither stops the reader.
+    """
+    reader = csv.reader(io.TextIOWrapper(stream, encoding='utf-8',
+                                         errors='surrogateescape',
+                                         newline=''))
+    header = next(reader, [])
+    while True:
+        try:
+            values = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as exc:
+            yield reader.line_num, functools.partial(raise_error, exc)
+        else:
+            yield reader.line_num, functools.partial(load_csv_record,
+                                                     header, values)
+
+
+READERS = {'ndjson': read_ndjson, 'csv': read_csv}
+
+
+def clean_row(raw):
+    """Return recipe values and related names of a row, or raise"""
+    if not isinstance(raw, dict):
+        raise ValidationError('Expected an object.')
+    values = {}
+    for name in RECIPE_FIELDS:
+        field = Recipe._meta.get_field(name)
+        value = raw.get(name)
+        if value is None and field.blank:
+            value = ''
+        values[name] = field.clean(value, None)
+    names = {}
+    for name, model in (('tags', Tag), ('ingredients', Ingredient)):
+        field = model._meta.get_field('name')
+        items = raw.get(name) or []
+        if not isinstance(items, list):
+            raise ValidationError(f'Expected a list of {name}.')
+        names[name] = [field.clean(str(value).strip(), None)
+                       for value in items]
+    return values, names
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class NameMap:
+    """Name to id map of a user's tags or ingredients.
+
+    Built with one query and extended with a bulk insert per batch for
+    the names it has not seen yet.
+    """
+
+    def __init__(self, model, user, db):
+        self.model = model
+        self.user = user
+        self.db = db
+        self.ids = dict(model.objects.using(db).filter(user=user)
+                        .order_by('-pk').values_list('name', 'pk'))
+
+    def resolve(self, names):
+        """Return the ids of all names, creating the missing objects"""
+        missing = sorted(set(names) - set(self.ids))
+        if missing:
+            objs = [self.model(user=self.user, name=name) for name in missing]
+            self.model.objects.using(self.db).bulk_create(objs)
+            if connections[self.db].features.can_return_ids_from_bulk_insert:
+                created = ((obj.name, obj.pk) for obj in objs)
+            else:
+                created = self.model.objects.using(self.db).filter(
+                    user=self.user, name__in=missing
+                ).values_list('name', 'pk')
+            self.ids.update(created)
+        return [self.ids[name] for name in names]
+
+
+class Command(BaseCommand):
+    """Django Command to import recipes from NDJSON or CSV files"""
+    help = ('Import recipes in the format written by the recipe export '
+            'endpoint, in constant memory.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', metavar='path')
+        parser.add_argument('--user', required=True,
+                            help='Email of the user owning the recipes')
+        parser.add_argument('--format', choices=sorted(READERS),
+                            help='File format, guessed from the extension '
+                                 'when omitted')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--no-copy', action='store_true',
+                            help='Never use Postgres COPY')
+
+    def handle(self, *args, **options):
+        try:
+            self.user = get_user_model().objects.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['user']} does not exist")
+        self.db = router.db_for_write(Recipe)
+        self.use_copy = (not options['no_copy'] and
+                         connections[self.db].vendor == 'postgresql')
+        self.tags = NameMap(Tag, self.user, self.db)
+        self.ingredients = NameMap(Ingredient, self.user, self.db)
+
+        start = time.monotonic()
+        imported = errors = 0
+        try:
+            for path in options['paths']:
+                fmt = options['format'] or self.guess_format(path)
+                with open_binary(path) as stream:
+                    rows = self.clean_rows(path, READERS[fmt](stream))
+                    for batch in batched(rows, options['batch_size']):
+                        self.import_batch(batch)
+                        imported += len(batch)
+                errors += self.errors
+        finally:
+            # Versions are kept in the shared cache, so this also drops the
+            # responses the running servers cached.
+            cache.bump_version(self.user.pk)
+
+        elapsed = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} recipes in {elapsed:.1f}s '
+            f'({errors} rows skipped)'
+        ))
+
+    def guess_format(self, path):
+        name = path[:-3] if path.endswith('.gz') else path
+        for fmt, extensions in (('ndjson', ('.ndjson', '.jsonl')),
+                                ('csv', ('.csv',))):
+            if name.endswith(extensions):
+                return fmt
+        raise CommandError(f'Cannot guess the format of {path}, '
+                           f'use --format')
+
+    def clean_rows(self, path, rows):
+        """Yield valid rows, reporting and skipping invalid ones"""
+        self.errors = 0
+        for number, load in rows:
+            try:
+                yield clean_row(load())
+            except (ValidationError, ValueError, TypeError,
+                    csv.Error) as exc:
+                self.errors += 1
+                messages = getattr(exc, 'messages', [str(exc)])
+                self.stderr.write(f"{path}:{number}: {' '.join(messages)}")
+
+    def import_batch(self, batch):
+        """Insert one batch of recipes and their links in a transaction"""
+        with transaction.atomic(using=self.db):
+            tag_ids = self.tags.resolve(
+                [name for _, names in batch for name in names['tags']]
+            )
+            ingredient_ids = self.ingredients.resolve(
+                [name for _, names in batch for name in names['ingredients']]
+            )
+            recipe_ids = self.insert_recipes([values for values, _ in batch])
+
+            tag_links, ingredient_links = [], []
+            tag_ids, ingredient_ids = iter(tag_ids), iter(ingredient_ids)
+            for recipe_id, (_, names) in zip(recipe_ids, batch):
+                tag_links.extend(
+                    (recipe_id, pk) for pk in
+                    set(islice(tag_ids, len(names['tags'])))
+                )
+                ingredient_links.extend(
+                    (recipe_id, pk) for pk in
+                    set(islice(ingredient_ids, len(names['ingredients'])))
+                )
+            self.insert_links('tags', tag_links)
+            self.insert_links('ingredients', ingredient_links)
+            search.refresh_recipes(Recipe.objects.filter(pk__in=recipe_ids))
+
+    def insert_recipes(self, rows):
+        """Insert recipe rows and return their ids in order"""
+        if self.use_copy:
+            return self.copy_recipes(rows)
+        objs = [Recipe(user=self.user, **values) for values in rows]
+        if connections[self.db].features.can_return_ids_from_bulk_insert:
+            Recipe.objects.using(self.db).bulk_create(objs)
+        else:
+            for obj in objs:
+                obj.save(using=self.db)
+        return [obj.pk for obj in objs]
+
+    def copy_recipes(self, rows):
+        """Insert recipe rows with COPY, reserving their ids up front"""
+        table = Recipe._meta.db_table
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+                "FROM generate_series(1, %s)", [table, len(rows)]
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+            defaults = {'user_id': self.user.pk, 'image_status': '',
+                        'updated_at': timezone.now().isoformat()}
+            self.copy(cursor, table, COPY_COLUMNS, (
+                [dict(defaults, id=pk, **values)[name]
+                 for name in COPY_COLUMNS]
+                for pk, values in zip(ids, rows)
+            ))
+        return ids
+
+    def insert_links(self, name, links):
+        """Insert (recipe id, related id) pairs into a through table"""
+        if not links:
+            return
+        m2m = Recipe._meta.get_field(name)
+        through = m2m.remote_field.through
+        columns = (m2m.m2m_column_name(), m2m.m2m_reverse_name())
+        if self.use_copy:
+            with connections[self.db].cursor() as cursor:
+                self.copy(cursor, through._meta.db_table, columns, links)
+        else:
+            through.objects.using(self.db).bulk_create(
+                [through(**dict(zip(columns, link))) for link in links]
+            )
+
+    def copy(self, cursor, table, columns, rows):
+        """Stream rows into a table with Postgres COPY"""
+        buffer = io.StringIO()
+        # Quote strings so empty ones are not read back as NULL.
+        writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerows(rows)
+        buffer.seek(0)
+        cursor.copy_expert(
+            f'COPY {table} ({", ".join(columns)}) FROM STDIN WITH CSV',
+            buffer
+        )
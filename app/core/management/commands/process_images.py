@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from recipe import images
+
+
+class Command(BaseCommand):
+    """Django Command to process queued recipe images"""
+    help = ('Resize uploaded recipe images into thumbnails and JPEG/WebP '
+            'variants, polling the image job queue.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the queue is empty')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds to wait when the queue is empty')
+        parser.add_argument('--max-attempts', type=int, default=3)
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help='Seconds after which a running job is '
+                                 'considered abandoned')
+
+    def handle(self, *args, **options):
+        processed = failed = 0
+        while True:
+            close_old_connections()
+            job = images.claim_job(stale_after=options['stale_after'])
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+                continue
+            if images.run_job(job, max_attempts=options['max_attempts']):
+                processed += 1
+            else:
+                failed += 1
+                self.stderr.write(f'Image job {job.pk} failed '
+                                  f'(attempt {job.attempts})')
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {processed} images ({failed} failed attempts)'
+        ))
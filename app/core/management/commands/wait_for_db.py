@@ -1,19 +1,110 @@
+import random
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
 from django.db import connections
-from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+
+
+def probe_database(alias):
+    """Open a connection to a database and run a trivial query"""
+    connection = connections[alias]
+    try:
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    finally:
+        connection.close()
+
+
+def probe_cache(alias):
+    """Write a key through a cache backend and read it back"""
+    cache = caches[alias]
+    key = f'wait_for_db:{uuid.uuid4().hex}'
+    cache.set(key, 1, timeout=10)
+    if cache.get(key) != 1:
+        raise ConnectionError(f'Cache {alias} did not keep a written key')
+    cache.delete(key)
+
+
+def backoff(attempt, initial, maximum):
+    """Return a full jitter delay before retrying after failed attempts"""
+    return random.uniform(0, min(maximum, initial * 2 ** attempt))
 
 
 class Command(BaseCommand):
     """Django Command to pause execution until Database is available"""
+    help = ('Wait until every database, and optionally cache, answers, '
+            'probing them concurrently with jittered exponential backoff.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', action='append', dest='databases',
+                            help='Database alias to wait for, every alias '
+                                 'in DATABASES by default')
+        parser.add_argument('--cache', action='append', dest='caches',
+                            default=[], help='Cache alias to wait for')
+        parser.add_argument('--timeout', type=float, default=60.0,
+                            help='Seconds to wait before giving up')
+        parser.add_argument('--initial-delay', type=float, default=0.1)
+        parser.add_argument('--max-delay', type=float, default=2.0)
 
     def handle(self, *args, **options):
         self.stdout.write('Waiting for database...')
-        db_conn = None
-        while not db_conn:
+        start = time.monotonic()
+        deadline = start + options['timeout']
+        targets = [
+            (f'Database {alias}', probe_database, alias)
+            for alias in options['databases'] or settings.DATABASES
+        ] + [
+            (f'Cache {alias}', probe_cache, alias)
+            for alias in options['caches']
+        ]
+        with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+            futures = [
+                executor.submit(self.wait, name, probe, alias, deadline,
+                                options)
+                for name, probe, alias in targets
+            ]
+            results = [future.result() for future in futures]
+
+        failures = [f'{name} ({error})' for name, error in results if error]
+        if failures:
+            raise CommandError(
+                f'Not available after {options["timeout"]:g}s: '
+                + ', '.join(failures)
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Database available after {time.monotonic() - start:.2f}s'
+        ))
+
+    def wait(self, name, probe, alias, deadline, options):
+        """Probe a target until it answers, returning the last error"""
+        start = time.monotonic()
+        attempt = 0
+        while True:
             try:
-                db_conn = connections['default']
-            except OperationalError:
-                self.stdout.write('Database unavailable, waiting for it 1s')
-                time.sleep(1)
-        self.stdout.write(self.style.SUCCESS('Database available'))
+                probe(alias)
+            except ImproperlyConfigured:
+                raise
+            except Exception as exc:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return name, exc
+                delay = min(remaining, backoff(
+                    attempt, options['initial_delay'], options['max_delay']
+                ))
+                attempt += 1
+                self.stdout.write(f'{name} unavailable ({exc}), '
+                                  f'retrying in {delay:.2f}s')
+                time.sleep(delay)
+            else:
+                self.stdout.write(
+                    f'{name} ready after {time.monotonic() - start:.2f}s '
+                    f'({attempt + 1} attempts)'
+                )
+                return name, None
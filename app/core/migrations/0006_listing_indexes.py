@@ -0,0 +1,35 @@
+# Generated by Django 2.1.15 on 2026-10-17 01:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_recipe_image'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['user', 'name', 'id'], name='core_ingred_user_id_bc8c66_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'title', 'id'], name='core_recipe_user_id_6248a0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', 'name', 'id'], name='core_tag_user_id_4ceac3_idx'),
+        ),
+        migrations.RunSQL(
+            ['CREATE INDEX core_recipe_tags_tag_id_recipe_id_idx '
+             'ON core_recipe_tags (tag_id, recipe_id)'],
+            ['DROP INDEX core_recipe_tags_tag_id_recipe_id_idx'],
+        ),
+        migrations.RunSQL(
+            ['CREATE INDEX core_recipe_ingredients_ingredient_id_recipe_id_idx '
+             'ON core_recipe_ingredients (ingredient_id, recipe_id)'],
+            ['DROP INDEX core_recipe_ingredients_ingredient_id_recipe_id_idx'],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.1.15 on 2026-10-17 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='token_generation',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
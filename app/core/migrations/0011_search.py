@@ -0,0 +1,67 @@
+# Generated by Django 2.1.15 on 2026-10-17 14:20
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+FORWARD_SQL = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX core_recipe_search_vector_idx ON core_recipe '
+    'USING gin (search_vector)',
+    'CREATE INDEX core_tag_name_trgm_idx ON core_tag '
+    'USING gin (name gin_trgm_ops)',
+    'CREATE INDEX core_ingredient_name_trgm_idx ON core_ingredient '
+    'USING gin (name gin_trgm_ops)',
+]
+BACKFILL_SQL = """
+UPDATE core_recipe SET search_vector =
+    setweight(to_tsvector(%s::regconfig, coalesce(core_recipe.title, '')),
+              'A')
+    || setweight(to_tsvector(%s::regconfig, coalesce((
+        SELECT string_agg(core_tag.name, ' ') FROM core_tag
+        JOIN core_recipe_tags ON core_recipe_tags.tag_id = core_tag.id
+        WHERE core_recipe_tags.recipe_id = core_recipe.id), '')), 'B')
+    || setweight(to_tsvector(%s::regconfig, coalesce((
+        SELECT string_agg(core_ingredient.name, ' ') FROM core_ingredient
+        JOIN core_recipe_ingredients
+        ON core_recipe_ingredients.ingredient_id = core_ingredient.id
+        WHERE core_recipe_ingredients.recipe_id = core_recipe.id), '')), 'B')
+"""
+REVERSE_SQL = [
+    'DROP INDEX IF EXISTS core_recipe_search_vector_idx',
+    'DROP INDEX IF EXISTS core_tag_name_trgm_idx',
+    'DROP INDEX IF EXISTS core_ingredient_name_trgm_idx',
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    """Create the GIN indexes and fill the vectors, on Postgres only"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in FORWARD_SQL:
+        schema_editor.execute(sql)
+    config = getattr(settings, 'SEARCH_CONFIG', 'english')
+    schema_editor.execute(BACKFILL_SQL, [config] * 3)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in REVERSE_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
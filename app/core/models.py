@@ -1,10 +1,13 @@
 import uuid
 import os
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import (AbstractBaseUser, BaseUserManager,
                                         PermissionsMixin)
 from django.conf import settings
 
+from core import hashing
+
 
 def recipe_image_file_path(instance, filename):
     """Generate file path for new recipe image"""
@@ -14,6 +17,11 @@ def recipe_image_file_path(instance, filename):
     return os.path.join('uploads/recipe/', filename)
 
 
+def recipe_image_variant_file_path(instance, filename):
+    """Generate file path for a resized recipe image"""
+    return os.path.join('uploads/recipe/variants/', filename)
+
+
 class UserManager(BaseUserManager):
 
     def create_user(self, email, password=None, **extra_fields):
@@ -21,7 +29,7 @@ class UserManager(BaseUserManager):
         if not email:
             raise ValueError('Email address must be provided')
         user = self.model(email=self.normalize_email(email), **extra_fields)
-        user.set_password(password)
+        hashing.set_password(user, password)
         user.save(using=self._db)
 
         return user
@@ -42,6 +50,7 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     name = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    token_generation = models.PositiveIntegerField(default=0)
 
     objects = UserManager()
 
@@ -55,6 +64,12 @@ class Tag(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'name', 'id']),
+        ]
 
     def __str__(self):
         return self.name
@@ -67,6 +82,12 @@ class Ingredient(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'name', 'id']),
+        ]
 
     def __str__(self):
         return self.name
@@ -85,6 +106,78 @@ class Recipe(models.Model):
     ingredients = models.ManyToManyField('Ingredient')
     tags = models.ManyToManyField('Tag')
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image_status = models.CharField(max_length=10, blank=True, choices=(
+        ('pending', 'Pending'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ))
+    updated_at = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'title', 'id']),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class RecipeImageVariant(models.Model):
+    """Resized copy of a recipe image in one format."""
+    recipe = models.ForeignKey(
+        'Recipe',
+        on_delete=models.CASCADE,
+        related_name='image_variants'
+    )
+    size = models.CharField(max_length=20)
+    format = models.CharField(max_length=10)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    file = models.FileField(upload_to=recipe_image_variant_file_path)
+
+    class Meta:
+        unique_together = ('recipe', 'size', 'format')
+
+    def __str__(self):
+        return f'{self.recipe_id} {self.size} {self.format}'
+
+
+class ImageJob(models.Model):
+    """Queued processing of an uploaded recipe image."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    recipe = models.ForeignKey('Recipe', on_delete=models.CASCADE)
+    status = models.CharField(max_length=10, default=PENDING, choices=(
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ))
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True)
+    finished_at = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id']),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe_id} {self.status}'
+
+
+class Blob(models.Model):
+    """Stored file shared by every field referencing the same content."""
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    refs = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
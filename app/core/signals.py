@@ -0,0 +1,10 @@
+from django.core.signals import request_finished
+from django.dispatch import receiver
+
+from core.db import routers
+
+
+@receiver(request_finished)
+def end_replica_routing(sender, **kwargs):
+    """Stop routing reads of the finished request to replicas"""
+    routers.end_request()
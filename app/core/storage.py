@@ -0,0 +1,150 @@
+import errno
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+from core.models import Blob
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage keeping one file per distinct content.
+
+    Files are hashed while they are written and stored under
+    blobs/<ab>/<cd>/<sha256><ext>, whatever name they were saved with, so
+    identical uploads share one file. Every save takes a reference on the
+    blob and every delete releases one; the file is removed once the last
+    reference is released and the transaction commits.
+
+    Names from before this storage was used have no blob and are deleted
+    right away, like FileSystemStorage does.
+    """
+    blob_dir = 'blobs'
+    staging_dir = '.staging'
+    blob_re = re.compile(
+        r'^blobs/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$'
+    )
+    chunk_size = 64 * 1024
+
+    @classmethod
+    def is_staged(cls, name):
+        """Return True if a name is inside the staging directory"""
+        return name.split('/', 1)[0] == cls.staging_dir
+
+    @classmethod
+    def is_blob(cls, name):
+        """Return True if a name was derived from the file content"""
+        return bool(cls.blob_re.match(name))
+
+    def get_available_name(self, name, max_length=None):
+        # Names are derived from the content, an existing file is a match.
+        return name
+
+    def blob_name(self, digest, name):
+        ext = os.path.splitext(name)[1].lower()
+        return '/'.join((self.blob_dir, digest[:2], digest[2:4],
+                         digest + ext))
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        staged = self._stage(content, digest)
+        try:
+            name = self.blob_name(digest.hexdigest(), name)
+            self._acquire(name, content.size)
+            path = self.path(name)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(staged, self.file_permissions_mode)
+                # A rename within the file system is atomic, a blob path
+                # never holds a partial file that could be served or
+                # deduplicated against.
+                os.replace(staged, path)
+                staged = None
+        finally:
+            if staged is not None:
+                os.remove(staged)
+        return name
+
+    def _stage(self, content, digest):
+        """Write content to a staging file, hashing it.
+
+        Staging files live in staging_dir, on the file system of the
+        blobs so they can be renamed into place, and are never served.
+        Uploads already streamed to disk are moved there when they are on
+        the same file system and copied otherwise.
+        """
+        staging = self.path(self.staging_dir)
+        os.makedirs(staging, exist_ok=True)
+        fd, staged = tempfile.mkstemp(dir=staging, suffix='.upload')
+        os.close(fd)
+        try:
+            if hasattr(content, 'temporary_file_path'):
+                try:
+                    os.replace(content.temporary_file_path(), staged)
+                except OSError as exc:
+                    if exc.errno != errno.EXDEV:
+                        raise
+                else:
+                    with open(staged, 'rb') as file:
+                        for chunk in iter(
+                            lambda: file.read(self.chunk_size), b''
+                        ):
+                            digest.update(chunk)
+                    return staged
+            with open(staged, 'wb') as file:
+                for chunk in content.chunks(self.chunk_size):
+                    digest.update(chunk)
+                    file.write(chunk)
+        except BaseException:
+            os.remove(staged)
+            raise
+        return staged
+
+    def _acquire(self, name, size):
+        """Take a reference on a blob, creating it if it is new.
+
+        The blob row is written before the file, so a concurrent release
+        of its last reference either happens first and its file removal
+        is complete, or sees the new reference and keeps the file.
+        """
+        if Blob.objects.filter(name=name).update(refs=F('refs') + 1):
+            return
+        try:
+            with transaction.atomic():
+                Blob.objects.create(name=name, size=size, refs=1)
+        except IntegrityError:
+            Blob.objects.filter(name=name).update(refs=F('refs') + 1)
+
+    def delete(self, name):
+        """Release a reference, removing the file after the last one"""
+        if not name:
+            raise ValueError('The name must be given to delete().')
+        released = Blob.objects.filter(name=name, refs__gt=0).update(
+            refs=F('refs') - 1
+        )
+        if released:
+            transaction.on_commit(lambda: self.collect(name))
+        elif not Blob.objects.filter(name=name).exists():
+            super().delete(name)
+
+    def collect(self, name):
+        """Remove a blob and its file if nothing references it anymore"""
+        with transaction.atomic():
+            deleted, _ = Blob.objects.filter(name=name, refs=0).delete()
+            if deleted:
+                super().delete(name)
+
+
+class StaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """Hashed and compressed static files.
+
+    Files missing from the manifest are hashed on the fly instead of
+    failing, e.g. when they were added after collectstatic ran.
+    """
+    manifest_strict = False
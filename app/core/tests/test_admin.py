@@ -1,8 +1,13 @@
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
 
+# Static files are not collected for tests, use their unhashed names.
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.'
+                        'StaticFilesStorage'
+)
 class AdminSiteTest(TestCase):
 
     def setUp(self):
@@ -0,0 +1,129 @@
+import asyncio
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+
+from core.asgi import ASGIHandler
+
+
+def http_scope(method, path, query_string=b'', headers=()):
+    return {
+        'type': 'http', 'method': method, 'path': path,
+        'query_string': query_string, 'headers': list(headers),
+        'http_version': '1.1', 'scheme': 'http',
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 5000),
+    }
+
+
+class ASGIHandlerTests(SimpleTestCase):
+    """Test serving Django through the ASGI handler."""
+
+    def setUp(self):
+        self.handler = ASGIHandler(threads=2)
+        self.addCleanup(self.handler.executor.shutdown)
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def call(self, scope, chunks=(b'',)):
+        """Run a request and return the ASGI messages sent back"""
+        incoming = [{'type': 'http.request', 'body': chunk,
+                     'more_body': index < len(chunks) - 1}
+                    for index, chunk in enumerate(chunks)]
+        sent = []
+
+        async def receive():
+            return incoming.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        self.loop.run_until_complete(self.handler(scope, receive, send))
+        return sent
+
+    def test_response(self):
+        """Test a view response is sent with its status and headers"""
+        sent = self.call(http_scope('GET', '/api/recipe/recipes/'))
+
+        self.assertEqual(sent[0]['type'], 'http.response.start')
+        self.assertEqual(sent[0]['status'], 401)
+        self.assertIn((b'Content-Type', b'application/json'),
+                      sent[0]['headers'])
+        self.assertIn(b'credentials', sent[1]['body'])
+        self.assertFalse(sent[1].get('more_body'))
+
+    def test_request_body(self):
+        """Test a body received in several messages reaches the view"""
+        body = json.dumps({'email': 'test@excel.network'}).encode()
+        sent = self.call(
+            http_scope('POST', '/api/users/token/', headers=[
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode()),
+            ]),
+            chunks=(body[:5], body[5:])
+        )
+
+        self.assertEqual(sent[0]['status'], 400)
+        self.assertIn(b'password', sent[1]['body'])
+
+    def test_repeated_headers(self):
+        """Test repeated headers are joined, cookies with semicolons"""
+        environ = self.handler.environ(http_scope('GET', '/', headers=[
+            (b'cookie', b'a=1'), (b'cookie', b'b=2'),
+            (b'accept', b'text/html'), (b'accept', b'application/json'),
+        ]), io.BytesIO())
+
+        self.assertEqual(environ['HTTP_COOKIE'], 'a=1; b=2')
+        self.assertEqual(environ['HTTP_ACCEPT'], 'text/html,application/json')
+
+    def test_streaming_response(self):
+        """Test streaming responses are sent chunk by chunk"""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        with open(os.path.join(media_root, 'file.txt'), 'wb') as file:
+            file.write(b'x' * 10000)
+
+        with override_settings(MEDIA_ROOT=media_root):
+            sent = self.call(http_scope('GET', '/media/file.txt'))
+
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertTrue(sent[1]['more_body'])
+        self.assertEqual(b''.join(m['body'] for m in sent[1:]), b'x' * 10000)
+        self.assertFalse(sent[-1].get('more_body'))
+
+    def test_client_disconnect(self):
+        """Test nothing is sent to clients gone before the request ended"""
+        sent = []
+
+        async def receive():
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        self.loop.run_until_complete(self.handler(
+            http_scope('POST', '/api/users/token/'), receive, send
+        ))
+
+        self.assertEqual(sent, [])
+
+    def test_lifespan(self):
+        """Test the server lifespan protocol is acknowledged"""
+        incoming = [{'type': 'lifespan.startup'},
+                    {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return incoming.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        self.loop.run_until_complete(self.handler({'type': 'lifespan'},
+                                                  receive, send))
+
+        self.assertEqual(sent, ['lifespan.startup.complete',
+                                'lifespan.shutdown.complete'])
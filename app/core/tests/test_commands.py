@@ -1,22 +1,203 @@
+import json
+import os
+import tempfile
+from io import StringIO
 from unittest.mock import patch
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
 from django.test import TestCase
 
+from core.management.commands import import_recipes, wait_for_db
+from core.models import Tag, Ingredient, Recipe
+
+WAIT_FOR_DB = 'core.management.commands.wait_for_db'
+
 
 class CommandTests(TestCase):
 
     def test_wait_for_db_ready(self):
         """Test if DB is available"""
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.return_value = True
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 1)
+        out = StringIO()
+        call_command('wait_for_db', stdout=out)
+
+        self.assertIn('Database default ready', out.getvalue())
+        self.assertIn('Database available', out.getvalue())
 
     @patch('time.sleep', return_value=True)
     def test_wait_for_db(self, ts):
         """Test wait for DB"""
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.side_effect = [OperationalError] * 5 + [True]
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 6)
+        with patch(f'{WAIT_FOR_DB}.probe_database') as probe:
+            probe.side_effect = [OperationalError] * 5 + [None]
+            call_command('wait_for_db', database=['default'],
+                         stdout=StringIO())
+            self.assertEqual(probe.call_count, 6)
+            self.assertEqual(ts.call_count, 5)
+
+    def test_wait_for_db_backoff(self):
+        """Test retry delays double up to the maximum"""
+        with patch('random.uniform', side_effect=lambda low, high: high):
+            delays = [wait_for_db.backoff(attempt, 0.1, 2.0)
+                      for attempt in range(7)]
+
+        self.assertEqual(delays, [0.1, 0.2, 0.4, 0.8, 1.6, 2.0, 2.0])
+
+    def test_wait_for_db_deadline(self):
+        """Test giving up once the timeout is over"""
+        with patch(f'{WAIT_FOR_DB}.probe_database') as probe:
+            probe.side_effect = OperationalError('connection refused')
+            with self.assertRaisesMessage(CommandError, 'connection refused'):
+                call_command('wait_for_db', timeout=0, stdout=StringIO())
+
+    def test_wait_for_db_and_cache(self):
+        """Test waiting for the given databases and caches"""
+        with patch(f'{WAIT_FOR_DB}.probe_database') as probe_db, \
+                patch(f'{WAIT_FOR_DB}.probe_cache') as probe_cache:
+            call_command('wait_for_db', database=['default'],
+                         cache=['default', 'api'], stdout=StringIO())
+
+        probe_db.assert_called_once_with('default')
+        self.assertEqual(sorted(c[0][0] for c in probe_cache.call_args_list),
+                         ['api', 'default'])
+
+    def test_probe_cache(self):
+        """Test the cache probe round trips a key"""
+        wait_for_db.probe_cache('default')
+
+
+class ImportRecipesCommandTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@excel.network', password='pass123'
+        )
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+
+    def _write(self, suffix, content):
+        mode = 'wb' if isinstance(content, bytes) else 'w'
+        ntf = tempfile.NamedTemporaryFile(mode, suffix=suffix, delete=False)
+        with ntf:
+            ntf.write(content)
+        self.addCleanup(os.remove, ntf.name)
+        return ntf.name
+
+    def test_import_ndjson(self):
+        """Test importing recipes from NDJSON in several batches"""
+        rows = [
+            {'title': f'Recipe {i}', 'cook_time_minutes': i,
+             'price': '2.50', 'tags': ['Vegan', 'Quick'],
+             'ingredients': ['Rice']}
+            for i in range(5)
+        ]
+        path = self._write('.ndjson',
+                           '\n'.join(json.dumps(row) for row in rows))
+
+        call_command('import_recipes', path, user=self.user.email,
+                     batch_size=2, stdout=StringIO())
+
+        recipes = Recipe.objects.filter(user=self.user)
+        self.assertEqual(recipes.count(), 5)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 1)
+        for recipe in recipes:
+            self.assertIn(self.vegan, recipe.tags.all())
+            self.assertEqual(recipe.ingredients.count(), 1)
+
+    def test_import_csv_skips_invalid_rows(self):
+        """Test invalid CSV rows are reported and skipped"""
+        path = self._write('.csv', (
+            'title,cook_time_minutes,price,link,tags,ingredients\n'
+            'Soup,30,4.00,,Vegan|Warm,Leek|Potato\n'
+            ',30,4.00,,,\n'
+            'Stew,not a number,4.00,,,\n'
+        ))
+        stderr = StringIO()
+
+        call_command('import_recipes', path, user=self.user.email,
+                     stdout=StringIO(), stderr=stderr)
+
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(recipe.title, 'Soup')
+        self.assertEqual(sorted(t.name for t in recipe.tags.all()),
+                         ['Vegan', 'Warm'])
+        self.assertEqual(recipe.ingredients.count(), 2)
+        self.assertEqual(stderr.getvalue().count(path), 2)
+        self.assertIn(f'{path}:3:', stderr.getvalue())
+        self.assertIn(f'{path}:4:', stderr.getvalue())
+
+    def test_import_ndjson_reports_file_lines(self):
+        """Test errors name the line of the file, blank lines included"""
+        path = self._write('.ndjson', (
+            '{"title": "Soup", "cook_time_minutes": 5, "price": "1.00"}\n'
+            '\n'
+            '{"title": "", "cook_time_minutes": 5, "price": "1.00"}\n'
+        ))
+        stderr = StringIO()
+
+        call_command('import_recipes', path, user=self.user.email,
+                     stdout=StringIO(), stderr=stderr)
+
+        self.assertIn(f'{path}:3:', stderr.getvalue())
+
+    def test_import_ndjson_skips_malformed_lines(self):
+        """Test lines that are not JSON are reported, not fatal"""
+        row = '{"title": "Soup", "cook_time_minutes": 5, "price": "1.00"}'
+        path = self._write('.ndjson', f'{row}\n{{not json\n{row}\n')
+        stderr = StringIO()
+
+        call_command('import_recipes', path, user=self.user.email,
+                     stdout=StringIO(), stderr=stderr)
+
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+        self.assertIn(f'{path}:2:', stderr.getvalue())
+
+    def test_import_rejects_names_that_are_not_lists(self):
+        """Test a string of tags is reported instead of split in letters"""
+        path = self._write('.ndjson', json.dumps({
+            'title': 'Soup', 'cook_time_minutes': 5, 'price': '1.00',
+            'tags': 'Vegan',
+        }))
+        stderr = StringIO()
+
+        call_command('import_recipes', path, user=self.user.email,
+                     stdout=StringIO(), stderr=stderr)
+
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+        self.assertIn(f'{path}:1:', stderr.getvalue())
+
+    def test_import_csv_skips_undecodable_records(self):
+        """Test invalid UTF-8 and malformed CSV records are skipped"""
+        path = self._write('.csv', (
+            b'title,cook_time_minutes,price\n'
+            b'Soup,30,4.00\n'
+            b'Stew \xff,30,4.00\n'
+            b'Pie\x00,30,4.00\n'
+            b'Salad,5,2.00\n'
+        ))
+        stderr = StringIO()
+
+        call_command('import_recipes', path, user=self.user.email,
+                     stdout=StringIO(), stderr=stderr)
+
+        self.assertEqual(
+            sorted(Recipe.objects.values_list('title', flat=True)),
+            ['Salad', 'Soup']
+        )
+        self.assertIn(f'{path}:3:', stderr.getvalue())
+        self.assertIn(f'{path}:4:', stderr.getvalue())
+
+    def test_copy_writes_not_null_columns(self):
+        """Test COPY writes every NOT NULL column of recipes"""
+        required = {field.column for field in Recipe._meta.concrete_fields
+                    if not field.null}
+
+        self.assertEqual(required - set(import_recipes.COPY_COLUMNS), set())
+
+    def test_import_unknown_user(self):
+        """Test importing for an unknown user fails"""
+        path = self._write('.ndjson', '')
+
+        with self.assertRaises(CommandError):
+            call_command('import_recipes', path, user='nobody@example.com')
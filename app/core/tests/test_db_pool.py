@@ -0,0 +1,141 @@
+import os
+import tempfile
+from unittest.mock import patch
+
+from django.db.backends.sqlite3 import base as sqlite3
+from django.test import SimpleTestCase
+
+from core.db.health import HealthCheckMixin
+from core.db.pool import ConnectionPool, PoolExhausted
+
+
+class FakeConnection:
+
+    def __init__(self, broken=False):
+        self.broken = broken
+        self.closed = False
+
+    def rollback(self):
+        if self.broken:
+            raise OSError('connection lost')
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def make_pool(self, **kwargs):
+        self.connections = []
+
+        def connect():
+            self.connections.append(FakeConnection())
+            return self.connections[-1]
+        return ConnectionPool(connect,
+                              is_usable=lambda conn: not conn.broken,
+                              **kwargs)
+
+    def test_reuses_released_connections(self):
+        """Test a released connection is handed out again"""
+        pool = self.make_pool()
+
+        first = pool.acquire()
+        pool.release(first)
+        second = pool.acquire()
+
+        self.assertIs(second, first)
+        self.assertEqual(pool.stats()['created'], 1)
+        self.assertEqual(pool.stats()['checkouts'], 2)
+        self.assertEqual(pool.stats()['in_use'], 1)
+
+    def test_bounded(self):
+        """Test acquire fails once every connection is checked out"""
+        pool = self.make_pool(max_size=1, timeout=0.01)
+        pool.acquire()
+
+        with self.assertRaises(PoolExhausted):
+            pool.acquire()
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+    def test_health_check(self):
+        """Test broken idle connections are replaced"""
+        pool = self.make_pool(check_after=0)
+        connection = pool.acquire()
+        pool.release(connection)
+        connection.broken = True
+
+        replacement = pool.acquire()
+
+        self.assertIsNot(replacement, connection)
+        self.assertTrue(connection.closed)
+        stats = pool.stats()
+        self.assertEqual(stats['health_checks'], 1)
+        self.assertEqual(stats['health_check_failures'], 1)
+
+    def test_recently_released_not_checked(self):
+        """Test connections released within check_after are not pinged"""
+        pool = self.make_pool(check_after=60)
+        pool.release(pool.acquire())
+
+        pool.acquire()
+
+        self.assertNotIn('health_checks', pool.stats())
+
+    def test_release_discards(self):
+        """Test failed rollbacks and discards close the connection"""
+        pool = self.make_pool()
+        broken, discarded = pool.acquire(), pool.acquire()
+        broken.broken = True
+
+        pool.release(broken)
+        pool.release(discarded, discard=True)
+
+        self.assertTrue(broken.closed)
+        self.assertTrue(discarded.closed)
+        self.assertEqual(pool.stats()['idle'], 0)
+        self.assertEqual(pool.stats()['in_use'], 0)
+
+
+class HealthCheckedWrapper(HealthCheckMixin, sqlite3.DatabaseWrapper):
+    pass
+
+
+class HealthCheckTests(SimpleTestCase):
+
+    def setUp(self):
+        fd, name = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        self.addCleanup(os.remove, name)
+        self.wrapper = HealthCheckedWrapper({
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': name,
+            'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True,
+            'AUTOCOMMIT': True, 'ATOMIC_REQUESTS': False, 'OPTIONS': {},
+            'TIME_ZONE': None, 'USER': '', 'PASSWORD': '', 'HOST': '',
+            'PORT': '', 'TEST': {},
+        }, alias='health')
+        self.addCleanup(self.wrapper.close)
+
+    def test_checked_once_per_request(self):
+        """Test a reused connection is pinged before its first query"""
+        self.wrapper.ensure_connection()
+        self.wrapper.close_if_unusable_or_obsolete()
+
+        with patch.object(HealthCheckedWrapper, 'is_usable',
+                          return_value=True) as is_usable:
+            self.wrapper.ensure_connection()
+            self.wrapper.ensure_connection()
+
+        self.assertEqual(is_usable.call_count, 1)
+
+    def test_broken_connection_replaced(self):
+        """Test an unusable reused connection is reopened"""
+        self.wrapper.ensure_connection()
+        connection = self.wrapper.connection
+        self.wrapper.close_if_unusable_or_obsolete()
+
+        with patch.object(HealthCheckedWrapper, 'is_usable',
+                          return_value=False):
+            self.wrapper.ensure_connection()
+
+        self.assertIsNotNone(self.wrapper.connection)
+        self.assertIsNot(self.wrapper.connection, connection)
@@ -0,0 +1,123 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory, TransactionTestCase, override_settings
+)
+from rest_framework.authtoken.models import Token
+
+from core.db import routers
+from core.db.middleware import ReplicaRoutingMiddleware
+from core.models import Recipe
+from recipe import cache
+from users import authentication
+
+ROUTING = {'PIN_SECONDS': 10, 'COOKIE': 'db_pin', 'CACHE': 'shared'}
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'], REPLICA_ROUTING=ROUTING)
+class ReplicaRouterTests(TransactionTestCase):
+
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+        self.factory = RequestFactory()
+        self.addCleanup(routers.end_request)
+        self.addCleanup(caches['shared'].clear)
+
+    def request(self, method='get', user=None, **kwargs):
+        request = getattr(self.factory, method)('/', **kwargs)
+        if user is not None:
+            request.user = user
+        return request
+
+    def test_outside_requests_use_primary(self):
+        """Test reads outside of requests go to the primary"""
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    def test_safe_request_uses_replica(self):
+        """Test reads of safe requests go to a replica"""
+        routers.begin_request(self.request(), use_replicas=True)
+
+        self.assertEqual(self.router.db_for_read(Recipe), 'replica_1')
+        self.assertEqual(self.router.db_for_write(Recipe), 'default')
+        self.assertEqual(self.router.db_for_read(Token), 'default')
+
+    def test_pinned_user_uses_primary(self):
+        """Test users who just wrote read from the primary"""
+        user = get_user_model()(pk=7)
+        routers.pin_user(user.pk)
+        routers.begin_request(self.request(user=user), use_replicas=True)
+
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    def test_no_migrations_on_replicas(self):
+        """Test replicas are left out of migrations"""
+        self.assertFalse(self.router.allow_migrate('replica_1', 'core'))
+        self.assertIsNone(self.router.allow_migrate('default', 'core'))
+
+    def test_middleware_routes_reads(self):
+        """Test safe requests read from replicas, until they are done"""
+        def view(request):
+            return HttpResponse(self.router.db_for_read(Recipe))
+
+        middleware = ReplicaRoutingMiddleware(view)
+
+        self.assertEqual(middleware(self.request()).content, b'replica_1')
+        self.assertEqual(middleware(self.request('post')).content,
+                         b'default')
+        routers.end_request()
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    def test_middleware_pins_writers(self):
+        """Test a write pins the client by cookie and by user"""
+        user = get_user_model()(pk=8)
+
+        def view(request):
+            request.user = user
+            return HttpResponse(self.router.db_for_read(Recipe))
+
+        middleware = ReplicaRoutingMiddleware(view)
+        response = middleware(self.request('post'))
+        cookie = response.cookies['db_pin']
+
+        self.assertEqual(cookie['max-age'], 10)
+        self.assertTrue(routers.is_user_pinned(user.pk))
+        self.factory.cookies['db_pin'] = cookie.value
+        self.assertEqual(middleware(self.request()).content, b'default')
+
+    def test_failed_write_does_not_pin(self):
+        """Test rejected writes keep the client on replicas"""
+        middleware = ReplicaRoutingMiddleware(
+            lambda request: HttpResponse(status=400)
+        )
+
+        response = middleware(self.request('post'))
+
+        self.assertNotIn('db_pin', response.cookies)
+
+    def test_signed_token_user_read_from_primary(self):
+        """Test token generations are checked against the primary"""
+        user = get_user_model().objects.create_user('test@excel.network',
+                                                    'pass123')
+        key = authentication.sign_token(user)
+        authentication.token_cache.clear()
+        routers.begin_request(self.request(), use_replicas=True)
+
+        # replica_1 is not configured, reading from it would raise.
+        authenticated, _ = (authentication.SignedTokenAuthentication()
+                            .authenticate_credentials(key))
+
+        self.assertEqual(authenticated, user)
+
+    def test_version_bump_pins_owner(self):
+        """Test a bump made outside of requests pins the owner"""
+        user = get_user_model().objects.create_user('test@excel.network',
+                                                    'pass123')
+        # Creating the user bumped its version too.
+        caches['shared'].clear()
+
+        cache.bump_version(user.pk)
+        routers.begin_request(self.request(user=user), use_replicas=True)
+
+        self.assertTrue(routers.is_user_pinned(user.pk))
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
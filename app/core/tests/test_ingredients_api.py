@@ -43,7 +43,7 @@ class PrivateIngredientsApiTest(TestCase):
         tags = Ingredient.objects.all().order_by('-name')
         serializer = IngredientSerializer(tags, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_limited_ingredients(self):
         """Test Ingredient returned are specific for logged user"""
@@ -56,8 +56,8 @@ class PrivateIngredientsApiTest(TestCase):
         res = self.client.get(INGREDIENTS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
 
     def test_create_ingredient_success(self):
         """Test creating a new Ingredient"""
@@ -90,8 +90,8 @@ class PrivateIngredientsApiTest(TestCase):
 
         serializer1 = IngredientSerializer(ingredient1)
         serializer2 = IngredientSerializer(ingredient2)
-        self.assertIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertNotIn(serializer2.data, res.data['results'])
 
     def test_unique_assigned_ingredients_filter(self):
         """Test filter assigend ingredients are unique"""
@@ -110,4 +110,40 @@ class PrivateIngredientsApiTest(TestCase):
 
         res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
 
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_filter_unused_ingredients(self):
+        """Test to filter only ingredients not used by any recipe"""
+        ingredient1 = Ingredient.objects.create(user=self.user, name='Pear')
+        ingredient2 = Ingredient.objects.create(user=self.user, name='Banana')
+        recipe = Recipe.objects.create(
+            title='Pear Smoothie', cook_time_minutes='5', price=2.5,
+            user=self.user
+        )
+        recipe.ingredients.add(ingredient1)
+
+        res = self.client.get(INGREDIENTS_URL, {'assigned_only': 'unused'})
+
+        serializer = IngredientSerializer(ingredient2)
+        self.assertEqual(res.data['results'], [serializer.data])
+
+    def test_assigned_ingredients_with_counts(self):
+        """Test used ingredients listed by descending recipe count"""
+        pear = Ingredient.objects.create(user=self.user, name='Pear')
+        milk = Ingredient.objects.create(user=self.user, name='Milk')
+        Ingredient.objects.create(user=self.user, name='Banana')
+        for title in ('Pear Smoothie', 'Pear Pie'):
+            recipe = Recipe.objects.create(
+                title=title, cook_time_minutes='5', price=2.5, user=self.user
+            )
+            recipe.ingredients.add(pear)
+        recipe.ingredients.add(milk)
+
+        res = self.client.get(INGREDIENTS_URL, {
+            'assigned_only': 1, 'ordering': '-recipe_count'
+        })
+
+        self.assertEqual(
+            [(i['name'], i['recipe_count']) for i in res.data['results']],
+            [('Pear', 2), ('Milk', 1)]
+        )
@@ -0,0 +1,123 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+from core.views import IMMUTABLE
+
+BLOB = 'blobs/ab/cd/' + 'abcd' * 16 + '.jpg'
+
+
+class ServeMediaTest(SimpleTestCase):
+    """Test serving files from MEDIA_ROOT."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root,
+                                  MEDIA_SENDFILE=None)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.write('uploads/photo.jpg', b'0123456789')
+        self.write(BLOB, b'0123456789')
+
+    def write(self, name, content):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(content)
+        return path
+
+    def get(self, name, **headers):
+        return self.client.get(reverse('media', args=[name]), **headers)
+
+    def test_serve_file(self):
+        """Test a file is streamed with its type and length"""
+        res = self.get('uploads/photo.jpg')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b''.join(res.streaming_content), b'0123456789')
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertEqual(res['Content-Length'], '10')
+        self.assertEqual(res['Cache-Control'], 'public, max-age=3600')
+        self.assertEqual(res['Accept-Ranges'], 'bytes')
+
+    def test_content_addressed_file_is_immutable(self):
+        """Test files named by their hash are cached forever"""
+        res = self.get(BLOB)
+
+        self.assertEqual(res['Cache-Control'], IMMUTABLE)
+
+    def test_missing_and_outside_files(self):
+        """Test missing files, directories and escapes are not found"""
+        for name in ('missing.jpg', 'uploads', '../etc/passwd'):
+            self.assertEqual(self.get(name).status_code, 404)
+
+    def test_staged_files_not_found(self):
+        """Test files still being written are never served"""
+        self.write('.staging/tmp1234.upload', b'01234')
+
+        for name in ('.staging/tmp1234.upload',
+                     'uploads/../.staging/tmp1234.upload'):
+            self.assertEqual(self.get(name).status_code, 404)
+
+    def test_not_modified(self):
+        """Test If-Modified-Since answers 304 for unchanged files"""
+        mtime = os.stat(os.path.join(self.media_root, BLOB)).st_mtime
+
+        res = self.get(BLOB, HTTP_IF_MODIFIED_SINCE=http_date(mtime + 1))
+
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res['Cache-Control'], IMMUTABLE)
+
+    def test_range(self):
+        """Test single byte ranges are served with 206"""
+        for header, body, content_range in (
+                ('bytes=2-4', b'234', 'bytes 2-4/10'),
+                ('bytes=7-', b'789', 'bytes 7-9/10'),
+                ('bytes=-2', b'89', 'bytes 8-9/10'),
+                ('bytes=8-100', b'89', 'bytes 8-9/10')):
+            res = self.get(BLOB, HTTP_RANGE=header)
+
+            self.assertEqual(res.status_code, 206)
+            self.assertEqual(b''.join(res.streaming_content), body)
+            self.assertEqual(res['Content-Range'], content_range)
+            self.assertEqual(res['Content-Length'], str(len(body)))
+
+    def test_unsatisfiable_range(self):
+        """Test ranges past the end of the file answer 416"""
+        res = self.get(BLOB, HTTP_RANGE='bytes=10-')
+
+        self.assertEqual(res.status_code, 416)
+        self.assertEqual(res['Content-Range'], 'bytes */10')
+
+    def test_ignored_ranges(self):
+        """Test multiple ranges and stale If-Range serve the whole file"""
+        for headers in ({'HTTP_RANGE': 'bytes=0-1,4-5'},
+                        {'HTTP_RANGE': 'bytes=0-1',
+                         'HTTP_IF_RANGE': http_date(0)}):
+            res = self.get(BLOB, **headers)
+
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(b''.join(res.streaming_content), b'0123456789')
+
+    @override_settings(MEDIA_SENDFILE='x-accel-redirect',
+                       MEDIA_SENDFILE_PREFIX='/protected-media/')
+    def test_x_accel_redirect(self):
+        """Test nginx is handed the transfer"""
+        res = self.get(BLOB)
+
+        self.assertEqual(res['X-Accel-Redirect'], '/protected-media/' + BLOB)
+        self.assertEqual(res.content, b'')
+        self.assertEqual(res['Cache-Control'], IMMUTABLE)
+
+    @override_settings(MEDIA_SENDFILE='x-sendfile')
+    def test_x_sendfile(self):
+        """Test Apache or lighttpd is handed the file path"""
+        res = self.get('uploads/photo.jpg')
+
+        self.assertEqual(res['X-Sendfile'],
+                         os.path.join(self.media_root, 'uploads/photo.jpg'))
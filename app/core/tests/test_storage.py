@@ -0,0 +1,192 @@
+import errno
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import (
+    SimpleTestCase, TransactionTestCase, override_settings
+)
+
+from core.models import Blob, Recipe
+from core.storage import ContentAddressedStorage, StaticFilesStorage
+
+
+class ContentAddressedStorageTest(TransactionTestCase):
+    """Test the deduplicating, reference counted storage."""
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        self.storage = ContentAddressedStorage(location=self.location)
+
+    def staged_files(self):
+        return os.listdir(self.storage.path(self.storage.staging_dir))
+
+    def test_save_uses_sharded_hash_path(self):
+        """Test files are stored under their content hash"""
+        name = self.storage.save('uploads/photo.JPG', ContentFile(b'data'))
+
+        digest = ('3a6eb0790f39ac87c94f3856b2dd2c5d'
+                  '110e6811602261a9a923d3bb23adc8b7')
+        self.assertEqual(name, f'blobs/3a/6e/{digest}.jpg')
+        with self.storage.open(name) as file:
+            self.assertEqual(file.read(), b'data')
+        self.assertEqual(sorted(os.listdir(self.location)),
+                         ['.staging', 'blobs'])
+
+    def test_identical_content_is_stored_once(self):
+        """Test saving the same content twice shares one file"""
+        first = self.storage.save('a.jpg', ContentFile(b'data'))
+        second = self.storage.save('b.jpg', ContentFile(b'data'))
+        other = self.storage.save('c.jpg', ContentFile(b'other'))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(Blob.objects.get(name=first).refs, 2)
+
+    def test_file_removed_after_last_reference(self):
+        """Test deleting frees the file only when unreferenced"""
+        name = self.storage.save('a.jpg', ContentFile(b'data'))
+        self.storage.save('b.jpg', ContentFile(b'data'))
+
+        self.storage.delete(name)
+        self.assertTrue(self.storage.exists(name))
+
+        self.storage.delete(name)
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(Blob.objects.exists())
+
+    def test_temporary_upload_is_moved(self):
+        """Test uploads streamed to disk are moved into place"""
+        upload = SimpleUploadedFile('a.jpg', b'data')
+        with tempfile.NamedTemporaryFile(delete=False) as file:
+            file.write(b'data')
+        upload.temporary_file_path = lambda: file.name
+
+        name = self.storage.save('a.jpg', upload)
+
+        self.assertFalse(os.path.exists(file.name))
+        self.assertTrue(self.storage.exists(name))
+
+    def test_temporary_upload_on_other_file_system_is_copied(self):
+        """Test uploads that cannot be renamed are copied to staging"""
+        upload = SimpleUploadedFile('a.jpg', b'data')
+        with tempfile.NamedTemporaryFile(delete=False) as file:
+            file.write(b'data')
+        self.addCleanup(os.remove, file.name)
+        upload.temporary_file_path = lambda: file.name
+        replace = os.replace
+
+        def cross_device(src, dst):
+            if src == file.name:
+                raise OSError(errno.EXDEV, 'Invalid cross-device link')
+            replace(src, dst)
+
+        with patch('core.storage.os.replace', side_effect=cross_device):
+            name = self.storage.save('a.jpg', upload)
+
+        with self.storage.open(name) as stored:
+            self.assertEqual(stored.read(), b'data')
+        self.assertEqual(self.staged_files(), [])
+
+    def test_delete_file_without_blob(self):
+        """Test files stored before deduplication are deleted directly"""
+        path = os.path.join(self.location, 'legacy.jpg')
+        with open(path, 'wb') as file:
+            file.write(b'data')
+
+        self.storage.delete('legacy.jpg')
+
+        self.assertFalse(os.path.exists(path))
+
+    def test_staged_next_to_blobs(self):
+        """Test content is staged in the storage and renamed into place"""
+        staged = []
+        stage = self.storage._stage
+
+        def spy(content, digest):
+            staged.append(stage(content, digest))
+            return staged[-1]
+
+        self.storage._stage = spy
+        name = self.storage.save('a.jpg', ContentFile(b'data'))
+
+        self.assertEqual(os.path.dirname(staged[0]),
+                         self.storage.path(self.storage.staging_dir))
+        self.assertFalse(os.path.exists(staged[0]))
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(self.staged_files(), [])
+
+    def test_staging_file_removed_for_existing_blob(self):
+        """Test saving known content leaves no staging file behind"""
+        self.storage.save('a.jpg', ContentFile(b'data'))
+        self.storage.save('b.jpg', ContentFile(b'data'))
+
+        self.assertEqual(self.staged_files(), [])
+
+
+class RecipeImageReferencesTest(TransactionTestCase):
+    """Test deleting recipes releases their images."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.user = get_user_model().objects.create_user(
+            'user@mail.com', 'testpass'
+        )
+
+    def create_recipe(self, content):
+        recipe = Recipe(user=self.user, title='Stock photo',
+                        cook_time_minutes=5, price=1)
+        recipe.image.save('photo.jpg', ContentFile(content))
+        return recipe
+
+    def test_shared_image_kept_until_last_recipe_deleted(self):
+        """Test a blob used by two recipes survives deleting one"""
+        first = self.create_recipe(b'stock')
+        second = self.create_recipe(b'stock')
+        storage, name = first.image.storage, first.image.name
+        self.assertEqual(second.image.name, name)
+
+        first.delete()
+        self.assertTrue(storage.exists(name))
+
+        second.delete()
+        self.assertFalse(storage.exists(name))
+
+
+class StaticFilesStorageTest(SimpleTestCase):
+    """Test the hashed and compressed static files storage."""
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        self.storage = StaticFilesStorage(location=self.location,
+                                          base_url='/static/')
+
+    def test_collected_files_are_hashed_and_compressed(self):
+        """Test post processing writes hashed and gzipped copies"""
+        content = b'body { color: red; }' * 100
+        self.storage.save('app.css', ContentFile(content))
+        found = {'app.css': (self.storage, 'app.css')}
+        list(self.storage.post_process(found))
+
+        url = self.storage.url('app.css')
+        hashed = url[len('/static/'):]
+
+        self.assertRegex(hashed, r'^app\.[0-9a-f]{12}\.css$')
+        self.assertTrue(self.storage.exists(hashed + '.gz'))
+
+    def test_files_missing_from_manifest_are_hashed(self):
+        """Test files added after collectstatic get their hashed name"""
+        self.storage.save('late.css', ContentFile(b'body {}'))
+
+        self.assertRegex(self.storage.url('late.css'),
+                         r'^/static/late\.[0-9a-f]{12}\.css$')
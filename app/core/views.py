@@ -0,0 +1,153 @@
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseNotModified)
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+from core.storage import ContentAddressedStorage
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+class UnsatisfiableRange(ValueError):
+    pass
+
+
+def parse_range(header, size):
+    """Return the first and last byte of a Range header, or None.
+
+    Only single byte ranges are honoured; anything else is ignored and
+    the whole file is served, as RFC 7233 allows.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if end < start and last:
+            return None
+    else:
+        start, end = max(size - int(last), 0), size - 1
+        if not int(last):
+            raise UnsatisfiableRange
+    if start >= size:
+        raise UnsatisfiableRange
+    return start, end
+
+
+class FileRange:
+    """Part of a file, readable like the file itself.
+
+    fileno() is kept, so servers using sendfile() for wsgi.file_wrapper
+    send the range from the current offset and Content-Length.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def cache_control(path):
+    """Return the Cache-Control of a media path"""
+    if ContentAddressedStorage.is_blob(path):
+        return IMMUTABLE
+    return f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+
+
+@require_safe
+def serve_media(request, path):
+    """Serve a file from MEDIA_ROOT.
+
+    The transfer is handed to the front-end server when MEDIA_SENDFILE
+    names one, otherwise it goes through FileResponse, which WSGI servers
+    send with sendfile(). Supports If-Modified-Since and single ranges.
+    """
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+        stat_result = os.stat(fullpath)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404
+    relpath = os.path.relpath(fullpath, os.path.abspath(settings.MEDIA_ROOT))
+    if ContentAddressedStorage.is_staged(relpath.replace(os.sep, '/')):
+        # Files being written, they are renamed into place when complete.
+        raise Http404
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise Http404
+
+    size, mtime = stat_result.st_size, stat_result.st_mtime
+    headers = {
+        'Last-Modified': http_date(mtime),
+        'Cache-Control': cache_control(path),
+        'Accept-Ranges': 'bytes',
+    }
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                              mtime, size):
+        return _with_headers(HttpResponseNotModified(), headers)
+
+    content_type = mimetypes.guess_type(fullpath)[0]
+    content_type = content_type or 'application/octet-stream'
+    sendfile = settings.MEDIA_SENDFILE
+    if sendfile == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = quote(
+            settings.MEDIA_SENDFILE_PREFIX + path
+        )
+        return _with_headers(response, headers)
+    if sendfile == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = fullpath
+        return _with_headers(response, headers)
+
+    byte_range = None
+    header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if header and (not if_range or if_range == headers['Last-Modified']):
+        try:
+            byte_range = parse_range(header, size)
+        except UnsatisfiableRange:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return _with_headers(response, headers)
+
+    file = open(fullpath, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+        return _with_headers(response, headers)
+    start, end = byte_range
+    response = FileResponse(FileRange(file, start, end - start + 1),
+                            status=206, content_type=content_type)
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = end - start + 1
+    return _with_headers(response, headers)
+
+
+def _with_headers(response, headers):
+    for name, value in headers.items():
+        response[name] = value
+    return response
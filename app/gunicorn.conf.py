@@ -0,0 +1,64 @@
+"""Gunicorn settings of the production servers started by start.sh.
+
+SERVER=wsgi runs app.wsgi on threaded workers, SERVER=asgi runs app.asgi
+on uvicorn workers. Every value can be overridden from the environment.
+"""
+import multiprocessing
+import os
+
+SERVER = os.environ.get('SERVER', 'wsgi')
+CPUS = multiprocessing.cpu_count()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+if SERVER == 'asgi':
+    # Event loop workers each hold many connections, one per CPU will do.
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    workers = int(os.environ.get('WEB_CONCURRENCY', CPUS))
+else:
+    worker_class = 'gthread'
+    workers = int(os.environ.get('WEB_CONCURRENCY', CPUS * 2 + 1))
+    threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Import Django once in the master, so workers share its pages
+# copy-on-write instead of each loading their own copy.
+preload_app = True
+
+# Replace workers after a jittered number of requests, so leaks are
+# bounded and workers do not all restart at the same time. Recycled and
+# reloaded workers finish their requests within graceful_timeout.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER',
+                                         100))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+accesslog = '-'
+errorlog = '-'
+
+
+def on_starting(server):
+    """Refuse to run several workers with in-process data versions"""
+    from django.conf import settings
+    from recipe.cache import VERSION_CACHE_ALIAS
+
+    backend = settings.CACHES[VERSION_CACHE_ALIAS]['BACKEND']
+    if server.num_workers > 1 and backend.endswith('.LocMemCache'):
+        raise RuntimeError(
+            f'{server.num_workers} workers cannot share in-process data '
+            f'versions, set SHARED_CACHE_BACKEND=db or WEB_CONCURRENCY=1'
+        )
+
+
+def pre_fork(server, worker):
+    """Close connections the master opened while loading the app.
+
+    Runs in the master, so workers never inherit a database socket.
+    """
+    from django.conf import settings
+    from django.db import connections
+
+    connections.close_all()
+    if settings.DB_BACKEND == 'pooled':
+        from core.db.backends.pooled.base import close_pools
+        close_pools()
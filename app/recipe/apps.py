@@ -3,3 +3,12 @@ from django.apps import AppConfig
 
 class RecipeConfig(AppConfig):
     name = 'recipe'
+
+    def ready(self):
+        from django.contrib.postgres.lookups import TrigramSimilar
+        from django.db.models import CharField
+        from recipe import checks, signals  # noqa
+
+        # Registered here rather than through django.contrib.postgres, so
+        # other databases keep working without psycopg2.
+        CharField.register_lookup(TrigramSimilar)
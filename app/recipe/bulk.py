@@ -0,0 +1,251 @@
+from collections import OrderedDict
+
+from django.db import connections, router, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.settings import api_settings
+from rest_framework.utils import html
+
+
+class RelatedIdsField(serializers.ListField):
+    """Primary keys of related objects owned by the request user.
+
+    The whole list is resolved with a single id__in query. Under a
+    BulkListSerializer the ids of every item are checked together by the
+    list serializer instead.
+    """
+    child = serializers.IntegerField()
+    default_error_messages = {
+        'does_not_exist': _('Invalid pk "{pk_value}" - object does not '
+                            'exist.'),
+    }
+
+    def __init__(self, model, **kwargs):
+        self.model = model
+        super().__init__(**kwargs)
+
+    def get_value(self, dictionary):
+        value = super().get_value(dictionary)
+        # Like many related fields, treat a missing list in form data as
+        # empty, so a full update clears it.
+        if (value is empty and html.is_html_input(dictionary) and
+                not getattr(self.root, 'partial', False)):
+            return []
+        return value
+
+    def get_queryset(self):
+        """Return the related objects the request user may link to"""
+        queryset = self.model.objects.all()
+        request = self.context.get('request')
+        if request is not None:
+            queryset = queryset.filter(user=request.user)
+        return queryset
+
+    def get_missing_errors(self, ids, found):
+        """Return an error for every id not among the found ones"""
+        return [self.error_messages['does_not_exist'].format(pk_value=pk)
+                for pk in ids if pk not in found]
+
+    def to_internal_value(self, data):
+        """Return the ids without duplicates, in the order given"""
+        ids = list(OrderedDict.fromkeys(super().to_internal_value(data)))
+        if isinstance(self.root, BulkListSerializer) or not ids:
+            return ids
+        found = set(self.get_queryset().filter(pk__in=ids)
+                    .values_list('pk', flat=True))
+        errors = self.get_missing_errors(ids, found)
+        if errors:
+            raise serializers.ValidationError(errors)
+        return ids
+
+    def to_representation(self, value):
+        return [obj.pk for obj in value.all()]
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """Validate and write a list of objects with set based queries.
+
+    Every item is checked before anything is written and errors are
+    reported per item, in the order the items were sent. Writes happen
+    in a single transaction using bulk inserts and CASE updates.
+    """
+    max_items = 5000
+    batch_size = 500
+    default_error_messages = {
+        'max_items': _('Ensure this list has at most {max_items} items.'),
+        'missing_id': _('This field is required.'),
+        'duplicate_id': _('Object {pk} is listed more than once.'),
+        'does_not_exist': _('Invalid pk "{pk}" - object does not exist.'),
+    }
+
+    @property
+    def model(self):
+        return self.child.Meta.model
+
+    def get_related_fields(self):
+        """Return the related id fields of the child by field name"""
+        return OrderedDict(
+            (name, field) for name, field in self.child.fields.items()
+            if isinstance(field, RelatedIdsField) and not field.read_only
+        )
+
+    def to_internal_value(self, data):
+        if isinstance(data, list) and len(data) > self.max_items:
+            self._fail('max_items', max_items=self.max_items)
+        items = super().to_internal_value(data)
+        errors = [{} for _ in items]
+        if self.instance is not None:
+            self._attach_ids(data, items, errors)
+        self._check_related(items, errors)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
+
+    def _fail(self, key, **kwargs):
+        """Raise a list level error, keyed like serializer non field errors"""
+        message = self.error_messages[key].format(**kwargs)
+        raise serializers.ValidationError(
+            {api_settings.NON_FIELD_ERRORS_KEY: [message]}, code=key
+        )
+
+    def _error(self, key, **kwargs):
+        return [self.error_messages[key].format(**kwargs)]
+
+    def _attach_ids(self, data, items, errors):
+        """Copy the ids of updated objects, checking they can be edited"""
+        ids = []
+        for raw in data:
+            pk = raw.get('id') if isinstance(raw, dict) else None
+            ids.append(pk if isinstance(pk, int) else None)
+        existing = set(self.instance.filter(
+            pk__in=[pk for pk in ids if pk is not None]
+        ).values_list('pk', flat=True))
+
+        seen = set()
+        for pk, item, error in zip(ids, items, errors):
+            if pk is None:
+                error['id'] = self._error('missing_id')
+            elif pk in seen:
+                error['id'] = self._error('duplicate_id', pk=pk)
+            elif pk not in existing:
+                error['id'] = self._error('does_not_exist', pk=pk)
+            seen.add(pk)
+            item['id'] = pk
+
+    def _check_related(self, items, errors):
+        """Check every referenced id with one query per related model"""
+        for name, field in self.get_related_fields().items():
+            wanted = set()
+            for item in items:
+                wanted.update(item.get(name, ()))
+            if not wanted:
+                continue
+            found = set(field.get_queryset().filter(pk__in=wanted)
+                        .values_list('pk', flat=True))
+            for item, error in zip(items, errors):
+                missing = field.get_missing_errors(item.get(name, ()), found)
+                if missing:
+                    error[name] = missing
+
+    def _split(self, item):
+        related = self.get_related_fields()
+        values = {key: value for key, value in item.items()
+                  if key not in related and key != 'id'}
+        links = {key: value for key, value in item.items() if key in related}
+        return values, links
+
+    def create(self, validated_data):
+        objs, links = [], []
+        for item in validated_data:
+            values, item_links = self._split(item)
+            objs.append(self.model(**values))
+            links.append(item_links)
+
+        db = router.db_for_write(self.model)
+        with transaction.atomic(using=db):
+            if connections[db].features.can_return_ids_from_bulk_insert:
+                self.model.objects.using(db).bulk_create(
+                    objs, batch_size=self.batch_size
+                )
+            else:
+                for obj in objs:
+                    obj.save(using=db)
+            pks = [obj.pk for obj in objs]
+            self._sync_links(dict(zip(pks, links)), db, replace=False)
+        return self._fetch(pks)
+
+    def update(self, queryset, validated_data):
+        rows, links = OrderedDict(), {}
+        for item in validated_data:
+            rows[item['id']], links[item['id']] = self._split(item)
+
+        db = router.db_for_write(self.model)
+        with transaction.atomic(using=db):
+            self._update_rows(rows, db)
+            self._sync_links(links, db, replace=True)
+        return self._fetch(list(rows))
+
+    def _update_rows(self, rows, db):
+        """Update many rows with one CASE per field and batch"""
+        now = timezone.now()
+        pks = list(rows)
+        for start in range(0, len(pks), self.batch_size):
+            batch = pks[start:start + self.batch_size]
+            cases = {}
+            for pk in batch:
+                for name, value in rows[pk].items():
+                    field = self.model._meta.get_field(name)
+                    cases.setdefault(name, []).append(
+                        When(pk=pk, then=Value(value, output_field=field))
+                    )
+            updates = {
+                name: Case(*whens, default=F(name),
+                           output_field=self.model._meta.get_field(name))
+                for name, whens in cases.items()
+            }
+            self.model.objects.using(db).filter(pk__in=batch).update(
+                updated_at=now, **updates
+            )
+
+    def _sync_links(self, links, db, replace):
+        """Write M2M links as a diff against the current through rows"""
+        for name in self.get_related_fields():
+            wanted = {pk: set(item_links[name])
+                      for pk, item_links in links.items()
+                      if name in item_links}
+            if not wanted:
+                continue
+            m2m = self.model._meta.get_field(name)
+            through = m2m.remote_field.through
+            source = m2m.m2m_field_name() + '_id'
+            target = m2m.m2m_reverse_field_name() + '_id'
+
+            stale = []
+            if replace:
+                rows = through.objects.using(db).filter(
+                    **{f'{source}__in': list(wanted)}
+                ).values_list('pk', source, target)
+                for row_pk, obj_pk, target_pk in rows:
+                    if target_pk in wanted[obj_pk]:
+                        wanted[obj_pk].discard(target_pk)
+                    else:
+                        stale.append(row_pk)
+            if stale:
+                through.objects.using(db).filter(pk__in=stale).delete()
+            through.objects.using(db).bulk_create(
+                [through(**{source: obj_pk, target: target_pk})
+                 for obj_pk, targets in wanted.items()
+                 for target_pk in targets],
+                batch_size=self.batch_size
+            )
+
+    def _fetch(self, pks):
+        """Reload the written objects in order, with their links"""
+        queryset = self.model.objects.filter(pk__in=pks).prefetch_related(
+            *self.get_related_fields()
+        )
+        objs = {obj.pk: obj for obj in queryset}
+        return [objs[pk] for pk in pks]
@@ -0,0 +1,128 @@
+import functools
+import hashlib
+import threading
+import uuid
+from collections import Counter
+
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import urlencode
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.db import routers
+
+CACHE_ALIAS = 'api'
+VERSION_CACHE_ALIAS = 'shared'
+VERSION_KEY = 'api:version:{user_id}'
+RESPONSE_KEY = 'api:response:{user_id}:{version}:{digest}'
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the cache backend used for API responses"""
+    return caches[CACHE_ALIAS]
+
+
+def get_version_cache():
+    """Return the cache backend shared by every process holding versions.
+
+    Responses may be cached per process, a bump made by any process, e.g.
+    a worker or a management command, still reaches them all.
+    """
+    return caches[VERSION_CACHE_ALIAS]
+
+
+def get_version(user_id):
+    """Return the current data version token of a user"""
+    cache = get_version_cache()
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _set_new_version(user_id):
+    get_version_cache().set(VERSION_KEY.format(user_id=user_id),
+                            uuid.uuid4().hex, timeout=None)
+    if routers.replicas():
+        # Render the next responses from the primary, a lagging replica
+        # would cache its old data under the new version.
+        routers.pin_user(user_id)
+
+
+def bump_version(user_id):
+    """Invalidate every cached response of a user.
+
+    Versions are random tokens rather than counters so that an evicted
+    version key can never be recreated with a value an old entry used.
+    The bump is repeated on commit so that nothing read before the
+    transaction commits can be cached under the new version.
+    """
+    _set_new_version(user_id)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _set_new_version(user_id))
+
+
+def response_key(request):
+    """Return the cache key for a request made by an authenticated user.
+
+    The key is computed once per request, so everything derived from it,
+    such as the cached body and its ETag, belongs to the same version.
+    """
+    key = getattr(request, '_response_cache_key', None)
+    if key is None:
+        params = urlencode(sorted(request.query_params.lists()), doseq=True)
+        endpoint = request.build_absolute_uri(request.path)
+        digest = hashlib.md5(
+            f'{endpoint}?{params}'.encode('utf-8')
+        ).hexdigest()
+        user_id = request.user.pk
+        key = RESPONSE_KEY.format(user_id=user_id,
+                                  version=get_version(user_id), digest=digest)
+        request._response_cache_key = key
+    return key
+
+
+def record(event):
+    with _stats_lock:
+        _stats[event] += 1
+
+
+def stats():
+    """Return the hit and miss counters of this process"""
+    with _stats_lock:
+        return {'hits': _stats['hits'], 'misses': _stats['misses']}
+
+
+def cached_response(request, render):
+    """Return the cached response to a request, rendering it on a miss.
+
+    render is called without arguments and returns a Response; only the
+    data of 200 responses is cached.
+    """
+    key = response_key(request)
+    data = get_cache().get(key)
+    if data is not None:
+        record('hits')
+        return Response(data, headers={'X-Cache': 'HIT'})
+
+    record('misses')
+    response = render()
+    if response.status_code == status.HTTP_200_OK:
+        get_cache().set(key, response.data)
+    response['X-Cache'] = 'MISS'
+    return response
+
+
+class CachedListMixin:
+    """Serve list responses from the per-user versioned response cache"""
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(
+            request, functools.partial(super().list, request, *args, **kwargs)
+        )
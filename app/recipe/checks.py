@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+from recipe import cache
+
+
+@register()
+def check_version_cache(app_configs, **kwargs):
+    """Warn when data versions are only seen by the current process"""
+    backend = settings.CACHES[cache.VERSION_CACHE_ALIAS]['BACKEND']
+    if not backend.endswith('.LocMemCache'):
+        return []
+    return [Warning(
+        'API data versions are kept in an in-process cache.',
+        hint='Changes made by other processes, such as other server '
+             'workers, process_images or import_recipes, do not '
+             'invalidate the responses this process cached. Set '
+             'SHARED_CACHE_BACKEND=db unless a single process runs.',
+        id='recipe.W001',
+    )]
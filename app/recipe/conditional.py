@@ -0,0 +1,101 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from recipe import cache
+
+
+def make_etag(*parts):
+    """Return a weak ETag built from the given version parts"""
+    seed = '|'.join(str(part) for part in parts)
+    return 'W/"%s"' % hashlib.md5(seed.encode('utf-8')).hexdigest()
+
+
+def etag_matches(header, etag):
+    """Return True if an If-None-Match/If-Match header names the ETag.
+
+    Comparison is weak for both headers, since the ETags issued here
+    identify data versions rather than exact bytes.
+    """
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in parse_etags(header):
+        if candidate == '*':
+            return True
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ConditionalGetMixin:
+    """Answer list/retrieve with 304 and reject stale updates with 412.
+
+    List ETags are derived from the response cache key, so they change
+    with the user's data version and always name the body cached under
+    it. Detail ETags are computed from max(updated_at), without fetching
+    or serializing the object; they also cover the related objects named
+    in etag_related, whose fields are nested in the representation.
+    """
+    etag_related = ()
+
+    def get_list_etag(self, request):
+        return make_etag(cache.response_key(request))
+
+    def get_detail_etag(self):
+        """Return the ETag of the looked up object, or None if missing"""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.get_queryset().filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        aggregates = {field: Max(f'{field}__updated_at')
+                      for field in self.etag_related}
+        stats = queryset.order_by().aggregate(
+            count=Count('pk'), updated=Max('updated_at'), **aggregates
+        )
+        if not stats['count']:
+            return None
+        return make_etag('detail', self.kwargs[lookup_url_kwarg],
+                         *(stats[field] for field in
+                           ('updated',) + tuple(self.etag_related)))
+
+    def not_modified(self, request, etag):
+        header = request.META.get('HTTP_IF_NONE_MATCH')
+        if header and etag_matches(header, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED,
+                            headers={'ETag': etag})
+        return None
+
+    def list(self, request, *args, **kwargs):
+        etag = self.get_list_etag(request)
+        response = self.not_modified(request, etag)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                response['ETag'] = etag
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        etag = self.get_detail_etag()
+        if etag is None:
+            return super().retrieve(request, *args, **kwargs)
+        response = self.not_modified(request, etag)
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+            response['ETag'] = etag
+        return response
+
+    def update(self, request, *args, **kwargs):
+        header = request.META.get('HTTP_IF_MATCH')
+        if header:
+            etag = self.get_detail_etag()
+            if etag is not None and not etag_matches(header, etag):
+                return Response(status=status.HTTP_412_PRECONDITION_FAILED,
+                                headers={'ETag': etag})
+        response = super().update(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = self.get_detail_etag()
+        return response
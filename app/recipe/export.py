@@ -0,0 +1,88 @@
+import csv
+import json
+import zlib
+from itertools import islice
+
+from core.models import Recipe
+
+FIELDS = ('id', 'title', 'cook_time_minutes', 'price', 'link', 'tags',
+          'ingredients')
+LIST_SEPARATOR = '|'
+
+
+def iter_rows(queryset, chunk_size=2000):
+    """Yield recipes as dicts, reading from a server-side cursor.
+
+    Tag and ingredient names are looked up with one query per relation
+    for every chunk of recipes, so memory depends on the chunk size only.
+    """
+    rows = queryset.values('id', 'title', 'cook_time_minutes', 'price',
+                           'link').iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        ids = [row['id'] for row in chunk]
+        tags = _names_by_recipe(Recipe.tags.through, 'tag__name', ids)
+        ingredients = _names_by_recipe(Recipe.ingredients.through,
+                                       'ingredient__name', ids)
+        for row in chunk:
+            row['tags'] = tags.get(row['id'], [])
+            row['ingredients'] = ingredients.get(row['id'], [])
+            yield row
+
+
+def _names_by_recipe(through, name_field, recipe_ids):
+    names = {}
+    links = through.objects.filter(recipe_id__in=recipe_ids).order_by(
+        'recipe_id', name_field
+    ).values_list('recipe_id', name_field)
+    for recipe_id, name in links:
+        names.setdefault(recipe_id, []).append(name)
+    return names
+
+
+def render_ndjson(rows):
+    """Yield one JSON document per line"""
+    for row in rows:
+        row['price'] = str(row['price'])
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    """File-like object handing back whatever csv.writer writes"""
+
+    def write(self, value):
+        return value
+
+
+def render_csv(rows):
+    """Yield a header line followed by one line per recipe"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(FIELDS)
+    for row in rows:
+        row['tags'] = LIST_SEPARATOR.join(row['tags'])
+        row['ingredients'] = LIST_SEPARATOR.join(row['ingredients'])
+        yield writer.writerow([row[field] for field in FIELDS])
+
+
+def gzip_stream(chunks, level=6):
+    """Gzip a stream of text chunks on the fly"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def encode(chunks):
+    """Encode a stream of text chunks as UTF-8"""
+    for chunk in chunks:
+        yield chunk.encode('utf-8')
+
+
+RENDERERS = {
+    'ndjson': (render_ndjson, 'application/x-ndjson'),
+    'csv': (render_csv, 'text/csv'),
+}
@@ -0,0 +1,186 @@
+import io
+import os
+import uuid
+from datetime import timedelta
+
+from PIL import Image, features
+from django.core.files.base import ContentFile
+from django.db import router, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.models import ImageJob, Recipe, RecipeImageVariant
+from recipe import cache
+
+# Longest edge in pixels of every variant. The stored image itself is
+# re-encoded with ORIGINAL_MAX_EDGE.
+SIZES = (
+    ('thumbnail', 150),
+    ('medium', 600),
+    ('large', 1600),
+)
+ORIGINAL_MAX_EDGE = 2560
+QUALITY = 85
+EXTENSIONS = {'jpeg': 'jpg', 'webp': 'webp'}
+
+# EXIF orientation values and the transpose undoing them.
+ORIENTATIONS = {
+    2: Image.FLIP_LEFT_RIGHT,
+    3: Image.ROTATE_180,
+    4: Image.FLIP_TOP_BOTTOM,
+    5: Image.TRANSPOSE,
+    6: Image.ROTATE_270,
+    7: Image.TRANSVERSE,
+    8: Image.ROTATE_90,
+}
+EXIF_ORIENTATION = 0x0112
+
+
+def variant_formats():
+    """Return the formats variants are written in"""
+    if features.check('webp'):
+        return ('jpeg', 'webp')
+    return ('jpeg',)
+
+
+def load(file):
+    """Open an image upright and in RGB, dropping its metadata"""
+    img = Image.open(file)
+    try:
+        exif = img._getexif() or {}
+    except (AttributeError, IndexError, KeyError, OSError):
+        exif = {}
+    method = ORIENTATIONS.get(exif.get(EXIF_ORIENTATION))
+    if method is not None:
+        img = img.transpose(method)
+
+    if img.mode in ('RGBA', 'LA') or 'transparency' in img.info:
+        img = img.convert('RGBA')
+        flat = Image.new('RGB', img.size, (255, 255, 255))
+        flat.paste(img, mask=img.split()[-1])
+        return flat
+    return img.convert('RGB')
+
+
+def encode(img, fmt, max_edge):
+    """Return a copy of img scaled down to max_edge, encoded as fmt.
+
+    Nothing but the pixels is written, so EXIF data such as GPS
+    coordinates never reaches the stored files.
+    """
+    img = img.copy()
+    img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+    buffer = io.BytesIO()
+    options = {'quality': QUALITY}
+    if fmt == 'jpeg':
+        options.update(optimize=True, progressive=True)
+    img.save(buffer, format=fmt.upper(), **options)
+    return img.size, buffer.getvalue()
+
+
+def process_recipe_image(recipe):
+    """Write the variants of a recipe image and strip the original.
+
+    Results are discarded if the image was replaced in the meantime, the
+    job queued for the new upload takes care of it.
+    """
+    source = recipe.image.name
+    if not source:
+        return
+    with recipe.image.open('rb') as file:
+        img = load(file)
+
+    stem = uuid.uuid4().hex
+    variants = []
+    for size, max_edge in SIZES:
+        for fmt in variant_formats():
+            (width, height), data = encode(img, fmt, max_edge)
+            variant = RecipeImageVariant(recipe=recipe, size=size,
+                                         format=fmt, width=width,
+                                         height=height)
+            variant.file.save(f'{stem}-{size}.{EXTENSIONS[fmt]}',
+                              ContentFile(data), save=False)
+            variants.append(variant)
+    storage = recipe.image.storage
+    dirname = os.path.dirname(source)
+    image = storage.save(os.path.join(dirname, f'{stem}.jpg'), ContentFile(
+        encode(img, 'jpeg', ORIGINAL_MAX_EDGE)[1]
+    ))
+    created = [variant.file.name for variant in variants] + [image]
+
+    db = router.db_for_write(Recipe)
+    with transaction.atomic(using=db):
+        replaced = Recipe.objects.filter(pk=recipe.pk, image=source).update(
+            image=image, image_status='ready', updated_at=timezone.now()
+        )
+        if not replaced:
+            delete_on_commit(storage, created, using=db)
+            return
+        # Deleting the old variants releases their files, see signals.
+        RecipeImageVariant.objects.filter(recipe=recipe).delete()
+        RecipeImageVariant.objects.bulk_create(variants)
+        cache.bump_version(recipe.user_id)
+        delete_on_commit(storage, [source], using=db)
+
+
+def delete_on_commit(storage, names, using=None):
+    """Delete files once the current transaction commits"""
+    def delete():
+        for name in names:
+            storage.delete(name)
+    transaction.on_commit(delete, using=using)
+
+
+def enqueue(recipe):
+    """Queue processing of a recipe's new image, dropping older jobs"""
+    ImageJob.objects.filter(recipe=recipe, status=ImageJob.PENDING).delete()
+    return ImageJob.objects.create(recipe=recipe)
+
+
+def claim_job(stale_after=600):
+    """Claim the oldest runnable job, or return None if there is none.
+
+    Jobs left running longer than stale_after seconds, e.g. by a worker
+    that died, are runnable again. Claiming is a conditional update, so
+    concurrent workers never get the same job.
+    """
+    stale = timezone.now() - timedelta(seconds=stale_after)
+    runnable = (Q(status=ImageJob.PENDING) |
+                Q(status=ImageJob.RUNNING, started_at__lt=stale))
+    while True:
+        job = ImageJob.objects.filter(runnable).order_by('pk').first()
+        if job is None:
+            return None
+        claimed = ImageJob.objects.filter(
+            pk=job.pk, status=job.status, attempts=job.attempts
+        ).update(status=ImageJob.RUNNING, started_at=timezone.now(),
+                 attempts=F('attempts') + 1)
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def run_job(job, max_attempts=3):
+    """Process a claimed job, returning True on success.
+
+    Failed jobs go back to the queue until they were attempted
+    max_attempts times, then the recipe image is marked as failed.
+    """
+    try:
+        process_recipe_image(job.recipe)
+    except Exception as exc:
+        failed = job.attempts >= max_attempts
+        ImageJob.objects.filter(pk=job.pk).update(
+            status=ImageJob.FAILED if failed else ImageJob.PENDING,
+            error=f'{type(exc).__name__}: {exc}',
+            finished_at=timezone.now() if failed else None,
+        )
+        if failed:
+            Recipe.objects.filter(pk=job.recipe_id).update(
+                image_status='failed', updated_at=timezone.now()
+            )
+            cache.bump_version(job.recipe.user_id)
+        return False
+    ImageJob.objects.filter(pk=job.pk).update(status=ImageJob.DONE,
+                                              finished_at=timezone.now())
+    return True
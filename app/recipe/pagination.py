@@ -0,0 +1,143 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination keyed on (ordering field, id).
+
+    The ordering field is taken from the queryset ordering, with the
+    primary key as tie breaker, so every page is a range scan starting
+    right after the previous one instead of an OFFSET.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    page_size_all = 'all'
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = _('Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if self.page_size is None:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.field, self.descending = self.get_ordering(queryset)
+        cursor = self.decode_cursor(request)
+        self.reverse = bool(cursor and cursor['r'])
+
+        descending = self.descending != self.reverse
+        prefix = '-' if descending else ''
+        if self.field == 'pk':
+            queryset = queryset.order_by(f'{prefix}pk')
+        else:
+            queryset = queryset.order_by(f'{prefix}{self.field}',
+                                         f'{prefix}pk')
+        if cursor:
+            queryset = queryset.filter(
+                self.get_position_filter(cursor, descending)
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_page_size(self, request):
+        """Return the requested page size, or None to disable paging"""
+        value = request.query_params.get(self.page_size_query_param)
+        if value == self.page_size_all:
+            return None
+        try:
+            page_size = int(value)
+        except (TypeError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, queryset):
+        """Return the leading ordering field and whether it descends"""
+        ordering = queryset.query.order_by
+        if not ordering:
+            return 'pk', False
+        field = ordering[0]
+        descending = field.startswith('-')
+        field = field.lstrip('-')
+        if field == 'id':
+            field = 'pk'
+        return field, descending
+
+    def get_position_filter(self, cursor, descending):
+        """Return a filter for the rows following the cursor position"""
+        op = 'lt' if descending else 'gt'
+        if self.field == 'pk':
+            return Q(**{f'pk__{op}': cursor['id']})
+        return (
+            Q(**{f'{self.field}__{op}': cursor['v']}) |
+            Q(**{self.field: cursor['v'], f'pk__{op}': cursor['id']})
+        )
+
+    def decode_cursor(self, request):
+        """Decode the cursor query param into a position dict"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            return {'v': cursor['v'], 'id': int(cursor['id']),
+                    'r': bool(cursor['r'])}
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj, reverse):
+        """Return a url pointing at the position of the given object"""
+        value = None
+        if self.field != 'pk':
+            value = getattr(obj, self.field)
+            if not isinstance(value, (int, float, str, type(None))):
+                value = str(value)
+        cursor = json.dumps({'v': value, 'id': obj.pk, 'r': int(reverse)})
+        encoded = urlsafe_b64encode(cursor.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url,
+                                   self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url,
+                                      self.cursor_query_param)
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url,
+                                      self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
@@ -0,0 +1,127 @@
+from django.conf import settings
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            TrigramSimilarity)
+from django.db import connections, router
+from django.db.models import (BigIntegerField, Case, Exists, F, FloatField,
+                              OuterRef, Q, Value, When)
+from django.db.models.functions import Cast
+
+from core.models import Tag, Ingredient, Recipe
+
+# Recipe titles weigh more than the names of their tags and ingredients.
+VECTOR_SQL = """
+UPDATE {recipe} SET search_vector =
+    setweight(to_tsvector(%s::regconfig, coalesce({recipe}.title, '')), 'A')
+    || setweight(to_tsvector(%s::regconfig, coalesce(({tags}), '')), 'B')
+    || setweight(to_tsvector(%s::regconfig, coalesce(({ingredients}), '')),
+                 'B')
+WHERE {recipe}.id IN ({ids})
+"""
+# Ranks are scaled to integers before results are paginated on them. The
+# Postgres ranks are real, sent to clients with 6 significant digits, so a
+# cursor holding one would not compare equal to the rank it came from.
+RANK_SCALE = 1000000
+NAMES_SQL = """
+SELECT string_agg(related.name, ' ') FROM {related} related
+JOIN {through} link ON link.{target} = related.id
+WHERE link.{source} = {recipe}.id
+"""
+
+
+def rank_key(expression):
+    """Return a float rank as an integer that cursors hold exactly"""
+    return Cast(expression * Value(RANK_SCALE, output_field=FloatField()),
+                BigIntegerField())
+
+
+def is_postgres(model):
+    return connections[router.db_for_write(model)].vendor == 'postgresql'
+
+
+def _names_sql(field_name):
+    field = Recipe._meta.get_field(field_name)
+    return NAMES_SQL.format(
+        related=field.related_model._meta.db_table,
+        through=field.remote_field.through._meta.db_table,
+        source=field.m2m_column_name(),
+        target=field.m2m_reverse_name(),
+        recipe=Recipe._meta.db_table,
+    )
+
+
+def refresh_recipes(queryset):
+    """Recompute the stored search vector of the recipes in a queryset.
+
+    Only Postgres stores vectors; elsewhere this does nothing.
+    """
+    if not is_postgres(Recipe):
+        return
+    db = router.db_for_write(Recipe)
+    ids = queryset.order_by().values('pk')
+    ids_sql, ids_params = ids.query.sql_with_params()
+    sql = VECTOR_SQL.format(recipe=Recipe._meta.db_table,
+                            tags=_names_sql('tags'),
+                            ingredients=_names_sql('ingredients'),
+                            ids=ids_sql)
+    config = settings.SEARCH_CONFIG
+    with connections[db].cursor() as cursor:
+        cursor.execute(sql, [config, config, config] + list(ids_params))
+
+
+def search_recipes(queryset, term):
+    """Filter recipes matching a search term, annotated with a rank.
+
+    Postgres matches the stored full-text vector. Other databases fall
+    back to substring matches, ranking title matches first. Ranks are
+    integers, see RANK_SCALE.
+    """
+    if is_postgres(Recipe):
+        query = SearchQuery(term, config=settings.SEARCH_CONFIG)
+        return queryset.filter(search_vector=query).annotate(
+            rank=rank_key(SearchRank(F('search_vector'), query))
+        )
+
+    matches = {}
+    for field_name in ('tags', 'ingredients'):
+        field = Recipe._meta.get_field(field_name)
+        links = field.remote_field.through.objects.filter(**{
+            field.m2m_field_name(): OuterRef('pk'),
+            f'{field.m2m_reverse_field_name()}__name__icontains': term,
+        })
+        matches[f'{field_name}_match'] = Exists(links)
+    return queryset.annotate(**matches).filter(
+        Q(title__icontains=term) | Q(tags_match=True) |
+        Q(ingredients_match=True)
+    ).annotate(rank=rank_key(Case(
+        When(title__icontains=term, then=Value(1.0)),
+        default=Value(0.4), output_field=FloatField()
+    )))
+
+
+def search_names(queryset, term):
+    """Filter tags or ingredients by name for autocompletion.
+
+    Postgres matches by trigram similarity, so misspelt and partial
+    names are found too. Other databases match substrings, ranking
+    prefixes first. Similarities are integers, see RANK_SCALE.
+    """
+    if is_postgres(queryset.model):
+        return queryset.filter(
+            Q(name__trigram_similar=term) | Q(name__istartswith=term)
+        ).annotate(similarity=rank_key(TrigramSimilarity('name', term)))
+    return queryset.filter(name__icontains=term).annotate(
+        similarity=rank_key(Case(
+            When(name__iexact=term, then=Value(1.0)),
+            When(name__istartswith=term, then=Value(0.6)),
+            default=Value(0.3), output_field=FloatField()
+        ))
+    )
+
+
+def linked_recipes(instance):
+    """Return the recipes linked to a tag or an ingredient"""
+    if isinstance(instance, Tag):
+        return Recipe.objects.filter(tags=instance)
+    if isinstance(instance, Ingredient):
+        return Recipe.objects.filter(ingredients=instance)
+    raise TypeError(f'Unexpected {type(instance).__name__}')
@@ -1,51 +1,94 @@
 from rest_framework import serializers
 
 from core.models import Tag, Ingredient, Recipe
+from recipe.bulk import BulkListSerializer, RelatedIdsField
 
 
 class TagSerializer(serializers.ModelSerializer):
     """Serializer for tag objects"""
+    # Only listed when the queryset is annotated, see with_counts.
+    recipe_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Tag
-        fields = ('id', 'name',)
+        fields = ('id', 'name', 'recipe_count',)
         read_only_fields = ('id', )
+        list_serializer_class = BulkListSerializer
 
 
 class IngredientSerializer(serializers.ModelSerializer):
     """Serializer for ingredient objects"""
+    # Only listed when the queryset is annotated, see with_counts.
+    recipe_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Ingredient
-        fields = ('id', 'name',)
+        fields = ('id', 'name', 'recipe_count',)
         read_only_fields = ('id', )
+        list_serializer_class = BulkListSerializer
+
+
+class ImageVariantsField(serializers.Field):
+    """Resized copies of the recipe image, by size and format"""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        variants = {}
+        for variant in value.all():
+            url = variant.file.url
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            variants.setdefault(variant.size, {})[variant.format] = {
+                'url': url,
+                'width': variant.width,
+                'height': variant.height,
+            }
+        return variants
 
 
 class RecipeSerializer(serializers.ModelSerializer):
     """Serialize a recipe"""
-    ingredients = serializers.PrimaryKeyRelatedField(
-        many=True, queryset=Ingredient.objects.all()
-    )
-    tags = serializers.PrimaryKeyRelatedField(
-        many=True, queryset=Tag.objects.all()
-    )
+    ingredients = RelatedIdsField(Ingredient)
+    tags = RelatedIdsField(Tag)
 
     class Meta(object):
         model = Recipe
         fields = ('id', 'title', 'cook_time_minutes', 'price',
-                  'tags', 'ingredients', 'link',)
-        read_only_fields = ('id',)
+                  'tags', 'ingredients', 'link', 'image_status',)
+        read_only_fields = ('id', 'image_status',)
+
+
+class RecipeBulkSerializer(RecipeSerializer):
+    """Serialize recipes written in bulk, checking related ids at once"""
+    ingredients = RelatedIdsField(Ingredient, required=False)
+    tags = RelatedIdsField(Tag, required=False)
+
+    class Meta(RecipeSerializer.Meta):
+        list_serializer_class = BulkListSerializer
 
 
 class RecipeDetailSerializer(RecipeSerializer):
     ingredients = IngredientSerializer(many=True, read_only=True)
     tags = TagSerializer(many=True, read_only=True)
+    image_variants = ImageVariantsField()
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ('image', 'image_variants',)
+        read_only_fields = RecipeSerializer.Meta.read_only_fields + (
+            'image',
+        )
 
 
 class RecipeImageSerializer(serializers.ModelSerializer):
     """Serializer to upload Recipe Image"""
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'image',)
-        read_only_fields = ('id',)
+        fields = ('id', 'image', 'image_status', 'image_variants',)
+        read_only_fields = ('id', 'image_status',)
+        extra_kwargs = {'image': {'required': True, 'allow_null': False}}
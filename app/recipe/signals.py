@@ -0,0 +1,134 @@
+from django.conf import settings
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import Tag, Ingredient, Recipe, RecipeImageVariant
+from recipe import cache, images, search
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+def bump_owner_version(sender, instance, **kwargs):
+    """Invalidate cached responses of the owner of a changed object"""
+    cache.bump_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def bump_linked_version(sender, instance, action, **kwargs):
+    """Invalidate cached responses when recipe links change"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        cache.bump_version(instance.user_id)
+
+
+def touch_recipes(recipes):
+    """Mark recipes as updated when only their links changed"""
+    recipes.update(updated_at=timezone.now())
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def touch_linked_recipes(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    """Bump updated_at of recipes whose tags or ingredients changed"""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            touch_recipes(Recipe.objects.filter(pk=instance.pk))
+    elif action in ('post_add', 'post_remove'):
+        touch_recipes(Recipe.objects.filter(pk__in=pk_set))
+    elif action == 'pre_clear':
+        field = 'tags' if sender is Recipe.tags.through else 'ingredients'
+        touch_recipes(Recipe.objects.filter(**{field: instance}))
+
+
+@receiver(pre_delete, sender=Tag)
+def touch_tagged_recipes(sender, instance, **kwargs):
+    """Deleting a tag silently unlinks it from its recipes"""
+    touch_recipes(Recipe.objects.filter(tags=instance))
+
+
+@receiver(pre_delete, sender=Ingredient)
+def touch_recipes_using_ingredient(sender, instance, **kwargs):
+    """Deleting an ingredient silently unlinks it from its recipes"""
+    touch_recipes(Recipe.objects.filter(ingredients=instance))
+
+
+@receiver(post_save, sender=Recipe)
+def refresh_recipe_search(sender, instance, **kwargs):
+    """Recompute the search vector of a saved recipe"""
+    search.refresh_recipes(Recipe.objects.filter(pk=instance.pk))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def refresh_linked_search(sender, instance, action, reverse, pk_set,
+                          **kwargs):
+    """Recompute search vectors of recipes whose links changed"""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            search.refresh_recipes(Recipe.objects.filter(pk=instance.pk))
+    elif action in ('post_add', 'post_remove'):
+        search.refresh_recipes(Recipe.objects.filter(pk__in=pk_set))
+    elif action == 'pre_clear' and search.is_postgres(Recipe):
+        instance._search_recipe_ids = list(
+            search.linked_recipes(instance).values_list('pk', flat=True)
+        )
+    elif action == 'post_clear':
+        search.refresh_recipes(Recipe.objects.filter(
+            pk__in=getattr(instance, '_search_recipe_ids', [])
+        ))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def refresh_renamed_search(sender, instance, created, **kwargs):
+    """Recompute search vectors of recipes using a renamed object"""
+    if not created:
+        search.refresh_recipes(search.linked_recipes(instance))
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def collect_unlinked_search(sender, instance, **kwargs):
+    """Remember the recipes a deleted object is unlinked from"""
+    if search.is_postgres(Recipe):
+        instance._search_recipe_ids = list(
+            search.linked_recipes(instance).values_list('pk', flat=True)
+        )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def refresh_unlinked_search(sender, instance, **kwargs):
+    """Recompute search vectors of recipes a deleted object left"""
+    search.refresh_recipes(Recipe.objects.filter(
+        pk__in=getattr(instance, '_search_recipe_ids', [])
+    ))
+
+
+@receiver(post_delete, sender=Recipe)
+def delete_recipe_image(sender, instance, using, **kwargs):
+    """Release the image of a deleted recipe"""
+    if instance.image:
+        images.delete_on_commit(instance.image.storage,
+                                [instance.image.name], using=using)
+
+
+@receiver(post_delete, sender=RecipeImageVariant)
+def delete_variant_file(sender, instance, using, **kwargs):
+    """Release the file of a deleted image variant"""
+    images.delete_on_commit(instance.file.storage, [instance.file.name],
+                            using=using)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def bump_new_user_version(sender, instance, created, **kwargs):
+    """Give new users a fresh version, even if their id was used before"""
+    if created:
+        cache.bump_version(instance.pk)
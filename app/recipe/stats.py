@@ -0,0 +1,84 @@
+from django.db.models import Avg, Count, F, Max, Min, Value
+from django.db.models.functions import Greatest, Least
+
+from core.models import Tag, Ingredient, Recipe
+
+# Cook times are counted in buckets of BUCKET_MINUTES; the last of the
+# BUCKETS buckets also holds every longer recipe, like width_bucket().
+BUCKET_MINUTES = 15
+BUCKETS = 12
+TOP_INGREDIENTS = 10
+
+
+def recipe_book_stats(user):
+    """Return aggregate statistics of a user's recipes.
+
+    Everything is computed by the database in four queries, whatever the
+    size of the recipe book.
+    """
+    recipes = Recipe.objects.filter(user=user).order_by()
+    totals = recipes.aggregate(
+        count=Count('pk'),
+        price_avg=Avg('price'), price_min=Min('price'),
+        price_max=Max('price'),
+        cook_time_avg=Avg('cook_time_minutes'),
+        cook_time_min=Min('cook_time_minutes'),
+        cook_time_max=Max('cook_time_minutes'),
+    )
+    return {
+        'recipe_count': totals['count'],
+        'price': {
+            'avg': _decimal(totals['price_avg']),
+            'min': _decimal(totals['price_min']),
+            'max': _decimal(totals['price_max']),
+        },
+        'cook_time_minutes': {
+            'avg': _round(totals['cook_time_avg'], 1),
+            'min': totals['cook_time_min'],
+            'max': totals['cook_time_max'],
+        },
+        'tags': list(_usage(Tag.objects.filter(user=user))),
+        'top_ingredients': list(_usage(
+            Ingredient.objects.filter(user=user)
+        )[:TOP_INGREDIENTS]),
+        'cook_time_histogram': cook_time_histogram(recipes),
+    }
+
+
+def _usage(queryset):
+    """Annotate tags or ingredients with the number of their recipes"""
+    return queryset.annotate(recipe_count=Count('recipe')).order_by(
+        '-recipe_count', 'name', 'pk'
+    ).values('id', 'name', 'recipe_count')
+
+
+def cook_time_histogram(recipes):
+    """Count recipes per cook time bucket, including empty buckets.
+
+    Buckets include min_minutes and exclude max_minutes.
+    """
+    bucket = Least(
+        Greatest(F('cook_time_minutes') / BUCKET_MINUTES, Value(0)),
+        Value(BUCKETS - 1),
+    )
+    counts = dict(recipes.annotate(bucket=bucket).values('bucket').annotate(
+        count=Count('pk')
+    ).values_list('bucket', 'count'))
+    histogram = []
+    for index in range(BUCKETS):
+        last = index == BUCKETS - 1
+        histogram.append({
+            'min_minutes': index * BUCKET_MINUTES,
+            'max_minutes': None if last else (index + 1) * BUCKET_MINUTES,
+            'count': counts.get(index, 0),
+        })
+    return histogram
+
+
+def _round(value, digits):
+    return None if value is None else round(value, digits)
+
+
+def _decimal(value):
+    """Format prices like the recipe serializers do"""
+    return None if value is None else '{:.2f}'.format(value)
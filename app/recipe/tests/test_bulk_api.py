@@ -0,0 +1,226 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+RECIPES_BULK_URL = reverse('recipe:recipe-bulk')
+TAGS_BULK_URL = reverse('recipe:tag-bulk')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def sample_recipe(user, **params):
+    """Create and return a recipe"""
+    defaults = {'title': 'Sample Recipe', 'cook_time_minutes': 10,
+                'price': 3.00}
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class BulkRecipeApiTest(TestCase):
+    """Test the bulk recipe endpoint."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@excel.network', password='pass123',
+            name='Test FullName'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.ingredient = Ingredient.objects.create(user=self.user,
+                                                    name='Tofu')
+
+    def test_bulk_create(self):
+        """Test creating recipes with their links in one request"""
+        payload = [
+            {'title': f'Recipe {i}', 'cook_time_minutes': i, 'price': '1.00',
+             'tags': [self.tag.id], 'ingredients': [self.ingredient.id]}
+            for i in range(5)
+        ]
+        res = self.client.post(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([r['title'] for r in res.data],
+                         [p['title'] for p in payload])
+        recipes = Recipe.objects.filter(user=self.user)
+        self.assertEqual(recipes.count(), 5)
+        for recipe in recipes:
+            self.assertEqual(list(recipe.tags.all()), [self.tag])
+            self.assertEqual(list(recipe.ingredients.all()),
+                             [self.ingredient])
+
+    def test_bulk_create_checks_related_ids_at_once(self):
+        """Test related ids of all items are validated with one query"""
+        payload = [
+            {'title': f'Recipe {i}', 'cook_time_minutes': i, 'price': '1.00',
+             'tags': [self.tag.id]}
+            for i in range(20)
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(RECIPES_BULK_URL, payload, format='json')
+
+        tag_lookups = [q for q in ctx.captured_queries
+                       if '"core_tag"."user_id" =' in q['sql']]
+        self.assertEqual(len(tag_lookups), 1)
+
+    def test_bulk_create_reports_errors_per_item(self):
+        """Test invalid items are reported and nothing is written"""
+        user2 = get_user_model().objects.create_user(
+            email='test2@excel.network', password='pass123'
+        )
+        foreign = Tag.objects.create(user=user2, name='Foreign')
+        payload = [
+            {'title': 'Good', 'cook_time_minutes': 5, 'price': '1.00'},
+            {'title': 'Foreign tag', 'cook_time_minutes': 5,
+             'price': '1.00', 'tags': [self.tag.id, foreign.id]},
+        ]
+        res = self.client.post(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertEqual(len(res.data[1]['tags']), 1)
+        self.assertIn(str(foreign.id), res.data[1]['tags'][0])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_create_field_errors(self):
+        """Test field validation errors are reported per item"""
+        payload = [
+            {'title': 'Good', 'cook_time_minutes': 5, 'price': '1.00'},
+            {'title': '', 'cook_time_minutes': 5, 'price': '1.00'},
+        ]
+        res = self.client.post(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('title', res.data[1])
+
+    def test_bulk_partial_update(self):
+        """Test updating fields and links of many recipes"""
+        recipe1 = sample_recipe(self.user, title='One')
+        recipe2 = sample_recipe(self.user, title='Two')
+        recipe2.tags.add(self.tag)
+        new_tag = Tag.objects.create(user=self.user, name='Dessert')
+        payload = [
+            {'id': recipe1.id, 'price': '9.50'},
+            {'id': recipe2.id, 'title': 'Deux', 'tags': [new_tag.id]},
+        ]
+        res = self.client.patch(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        recipe1.refresh_from_db()
+        recipe2.refresh_from_db()
+        self.assertEqual(str(recipe1.price), '9.50')
+        self.assertEqual(recipe1.title, 'One')
+        self.assertEqual(recipe2.title, 'Deux')
+        self.assertEqual(list(recipe2.tags.all()), [new_tag])
+        self.assertEqual(res.data[1]['tags'], [new_tag.id])
+
+    def test_bulk_update_keeps_unchanged_links(self):
+        """Test links kept by an update are not rewritten"""
+        recipe = sample_recipe(self.user)
+        recipe.tags.add(self.tag)
+        link = Recipe.tags.through.objects.get(recipe=recipe)
+        new_tag = Tag.objects.create(user=self.user, name='Dessert')
+
+        self.client.patch(RECIPES_BULK_URL, [
+            {'id': recipe.id, 'tags': [self.tag.id, new_tag.id]}
+        ], format='json')
+
+        self.assertTrue(Recipe.tags.through.objects.filter(
+            pk=link.pk
+        ).exists())
+        self.assertEqual(recipe.tags.count(), 2)
+
+    def test_bulk_update_unknown_ids(self):
+        """Test updating missing or foreign recipes fails per item"""
+        recipe = sample_recipe(self.user)
+        user2 = get_user_model().objects.create_user(
+            email='test2@excel.network', password='pass123'
+        )
+        foreign = sample_recipe(user2)
+        payload = [
+            {'id': recipe.id, 'title': 'Mine'},
+            {'id': foreign.id, 'title': 'Not mine'},
+            {'title': 'No id'},
+        ]
+        res = self.client.patch(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('id', res.data[1])
+        self.assertIn('id', res.data[2])
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.title, 'Sample Recipe')
+
+    def test_bulk_delete(self):
+        """Test deleting many recipes at once"""
+        recipe1 = sample_recipe(self.user)
+        recipe2 = sample_recipe(self.user)
+        keep = sample_recipe(self.user)
+
+        res = self.client.delete(RECIPES_BULK_URL, [recipe1.id, recipe2.id],
+                                 format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(list(Recipe.objects.all()), [keep])
+
+    def test_bulk_delete_foreign(self):
+        """Test deleting another user's recipe is rejected"""
+        recipe = sample_recipe(self.user)
+        user2 = get_user_model().objects.create_user(
+            email='test2@excel.network', password='pass123'
+        )
+        foreign = sample_recipe(user2)
+
+        res = self.client.delete(RECIPES_BULK_URL, [recipe.id, foreign.id],
+                                 format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertEqual(Recipe.objects.count(), 2)
+
+    def test_bulk_write_invalidates_list_cache(self):
+        """Test bulk writes are visible in cached lists"""
+        self.client.get(RECIPES_URL)
+        self.client.post(RECIPES_BULK_URL, [
+            {'title': 'New', 'cook_time_minutes': 5, 'price': '1.00'}
+        ], format='json')
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
+
+
+class BulkTagApiTest(TestCase):
+    """Test the bulk tag endpoint."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@excel.network', password='pass123',
+            name='Test FullName'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_and_rename_tags(self):
+        """Test creating and renaming many tags"""
+        res = self.client.post(TAGS_BULK_URL, [
+            {'name': 'Vegan'}, {'name': 'Dessert'}
+        ], format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        ids = [tag['id'] for tag in res.data]
+
+        res = self.client.patch(TAGS_BULK_URL, [
+            {'id': ids[0], 'name': 'Vegetarian'}
+        ], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = Tag.objects.filter(user=self.user).values_list('name',
+                                                               flat=True)
+        self.assertEqual(sorted(names), ['Dessert', 'Vegetarian'])
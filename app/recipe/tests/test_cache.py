@@ -0,0 +1,139 @@
+from django.contrib.auth import get_user_model
+from django.core.cache.backends.db import DatabaseCache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from recipe import cache, checks
+
+TAGS_URL = reverse('recipe:tag-list')
+RECIPES_URL = reverse('recipe:recipe-list')
+CACHE_STATS_URL = reverse('recipe:cache-stats')
+
+
+class ResponseCacheTest(TestCase):
+    """Test the per-user versioned list response cache."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@excel.network', password='pass123',
+            name='Test FullName'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_second_request_is_a_hit(self):
+        """Test an unchanged list is served from the cache"""
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        first = self.client.get(TAGS_URL)
+        # Only the data version is read, from the shared cache.
+        with self.assertNumQueries(1):
+            second = self.client.get(TAGS_URL)
+
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+
+    def test_query_params_are_part_of_the_key(self):
+        """Test different filters are cached separately"""
+        self.client.get(TAGS_URL, {'assigned_only': 1, 'page_size': 5})
+        res = self.client.get(TAGS_URL, {'page_size': 5, 'assigned_only': 1})
+        other = self.client.get(TAGS_URL, {'assigned_only': 0})
+
+        self.assertEqual(res['X-Cache'], 'HIT')
+        self.assertEqual(other['X-Cache'], 'MISS')
+
+    def test_save_invalidates(self):
+        """Test creating a tag invalidates the cached list"""
+        self.client.get(TAGS_URL)
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_m2m_change_invalidates(self):
+        """Test linking a tag to a recipe invalidates the cached lists"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe = Recipe.objects.create(user=self.user, title='Salad',
+                                       cook_time_minutes=5, price=1.00)
+        self.client.get(TAGS_URL, {'assigned_only': 1})
+        self.client.get(RECIPES_URL)
+
+        recipe.tags.add(tag)
+
+        tags = self.client.get(TAGS_URL, {'assigned_only': 1})
+        recipes = self.client.get(RECIPES_URL)
+        self.assertEqual(len(tags.data['results']), 1)
+        self.assertEqual(recipes.data['results'][0]['tags'], [tag.id])
+
+    def test_cache_is_per_user(self):
+        """Test users never see each other's cached lists"""
+        Tag.objects.create(user=self.user, name='Vegan')
+        self.client.get(TAGS_URL)
+        user2 = get_user_model().objects.create_user(
+            email='test2@excel.network', password='pass123'
+        )
+        self.client.force_authenticate(user2)
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['results'], [])
+
+    def test_other_user_change_keeps_cache(self):
+        """Test changes by another user do not invalidate the cache"""
+        user2 = get_user_model().objects.create_user(
+            email='test2@excel.network', password='pass123'
+        )
+        self.client.get(TAGS_URL)
+        Tag.objects.create(user=user2, name='Fruits')
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res['X-Cache'], 'HIT')
+
+    def test_stats_counters(self):
+        """Test hits and misses are counted and exposed to admins"""
+        before = cache.stats()
+        self.client.get(TAGS_URL)
+        self.client.get(TAGS_URL)
+        after = cache.stats()
+        self.assertEqual(after['misses'] - before['misses'], 1)
+        self.assertEqual(after['hits'] - before['hits'], 1)
+
+        res = self.client.get(CACHE_STATS_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        res = self.client.get(CACHE_STATS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(res.data), {'hits', 'misses'})
+
+    def test_change_elsewhere_invalidates(self):
+        """Test a bump by another process reaches this one's responses"""
+        self.client.get(TAGS_URL)
+        # Another process only shares the database with this one.
+        other = DatabaseCache('shared_cache', {})
+        other.set(cache.VERSION_KEY.format(user_id=self.user.pk),
+                  'elsewhere', timeout=None)
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+
+    def test_process_local_versions_warning(self):
+        """Test in-process data versions are reported at startup"""
+        self.assertEqual(checks.check_version_cache(None), [])
+        locmem = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+        with override_settings(CACHES={'default': locmem, 'api': locmem,
+                                       'shared': locmem}):
+            messages = checks.check_version_cache(None)
+
+        self.assertEqual([m.id for m in messages], ['recipe.W001'])
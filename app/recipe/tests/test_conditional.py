@@ -0,0 +1,137 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    """Create recipe detail url"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class ConditionalRequestTest(TestCase):
+    """Test ETag handling on the recipe endpoints."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@excel.network', password='pass123',
+            name='Test FullName'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(user=self.user, title='Salad',
+                                            cook_time_minutes=5, price=1.00)
+
+    def test_list_not_modified(self):
+        """Test a matching If-None-Match on the list returns 304"""
+        res = self.client.get(RECIPES_URL)
+        etag = res['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+
+        # Only the data version is read, from the shared cache.
+        with self.assertNumQueries(1):
+            res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertFalse(res.content)
+
+    def test_list_etag_changes(self):
+        """Test the list ETag changes on update, delete and relinking"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        soup = Recipe.objects.create(user=self.user, title='Soup',
+                                     cook_time_minutes=5, price=1.00)
+        etags = [self.client.get(RECIPES_URL)['ETag']]
+
+        self.recipe.tags.add(tag)
+        etags.append(self.client.get(RECIPES_URL)['ETag'])
+        tag.delete()
+        etags.append(self.client.get(RECIPES_URL)['ETag'])
+        soup.delete()
+        etags.append(self.client.get(RECIPES_URL)['ETag'])
+
+        self.assertEqual(len(set(etags)), len(etags))
+
+    def test_cached_list_keeps_its_etag(self):
+        """Test a cached list is served with the ETag it was cached with"""
+        first = self.client.get(RECIPES_URL)
+        # Changes no signal reports are not seen by the cache either.
+        Recipe.objects.filter(pk=self.recipe.pk).update(
+            title='Soup', updated_at=timezone.now()
+        )
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res['X-Cache'], 'HIT')
+        self.assertEqual(res.data, first.data)
+        self.assertEqual(res['ETag'], first['ETag'])
+
+    def test_list_etag_depends_on_query(self):
+        """Test differently filtered lists get different ETags"""
+        res = self.client.get(RECIPES_URL)
+        filtered = self.client.get(RECIPES_URL, {'page_size': 1})
+
+        self.assertNotEqual(res['ETag'], filtered['ETag'])
+
+    def test_detail_etag_covers_nested_names(self):
+        """Test renaming a tag changes the ETag of recipes using it"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.recipe.tags.add(tag)
+        res = self.client.get(detail_url(self.recipe.id))
+        etag = res['ETag']
+
+        tag.name = 'Vegetarian'
+        tag.save()
+        res = self.client.get(detail_url(self.recipe.id),
+                              HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['tags'][0]['name'], 'Vegetarian')
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_detail_not_modified(self):
+        """Test a matching If-None-Match on a recipe returns 304"""
+        etag = self.client.get(detail_url(self.recipe.id))['ETag']
+
+        res = self.client.get(detail_url(self.recipe.id),
+                              HTTP_IF_NONE_MATCH=f'"other", {etag}')
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_update_if_match(self):
+        """Test updates with a current If-Match succeed"""
+        etag = self.client.get(detail_url(self.recipe.id))['ETag']
+
+        res = self.client.patch(detail_url(self.recipe.id),
+                                {'title': 'Greek Salad'},
+                                HTTP_IF_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_update_stale_if_match(self):
+        """Test updates with an outdated If-Match are rejected"""
+        etag = self.client.get(detail_url(self.recipe.id))['ETag']
+        self.client.patch(detail_url(self.recipe.id), {'title': 'Soup'})
+
+        res = self.client.patch(detail_url(self.recipe.id),
+                                {'title': 'Greek Salad'},
+                                HTTP_IF_MATCH=etag)
+
+        self.assertEqual(res.status_code,
+                         status.HTTP_412_PRECONDITION_FAILED)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.title, 'Soup')
+
+    def test_missing_recipe(self):
+        """Test unknown recipes still return 404"""
+        res = self.client.get(detail_url(self.recipe.id + 1))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
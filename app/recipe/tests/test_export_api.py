@@ -0,0 +1,103 @@
+import csv
+import gzip
+import io
+import json
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.views import RecipeViewSet
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+class RecipeExportApiTest(TestCase):
+    """Test streaming exports of a user's recipes."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@excel.network', password='pass123',
+            name='Test FullName'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        tofu = Ingredient.objects.create(user=self.user, name='Tofu')
+        rice = Ingredient.objects.create(user=self.user, name='Rice')
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='Tofu bowl', cook_time_minutes=20,
+            price='7.50'
+        )
+        self.recipe.tags.add(vegan)
+        self.recipe.ingredients.add(tofu, rice)
+        Recipe.objects.create(user=self.user, title='Toast',
+                              cook_time_minutes=2, price='1.00')
+
+    def _content(self, res):
+        return b''.join(res.streaming_content)
+
+    def test_export_ndjson(self):
+        """Test exporting recipes as newline delimited JSON"""
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = self._content(res).decode('utf-8').splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['title'], 'Tofu bowl')
+        self.assertEqual(rows[0]['price'], '7.50')
+        self.assertEqual(rows[0]['tags'], ['Vegan'])
+        self.assertEqual(rows[0]['ingredients'], ['Rice', 'Tofu'])
+        self.assertEqual(rows[1]['tags'], [])
+
+    def test_export_csv_gzip(self):
+        """Test exporting recipes as gzipped CSV"""
+        res = self.client.get(EXPORT_URL, {'type': 'csv', 'gzip': 1})
+
+        self.assertEqual(res['Content-Type'], 'application/gzip')
+        self.assertIn('recipes.csv.gz', res['Content-Disposition'])
+        text = gzip.decompress(self._content(res)).decode('utf-8')
+        rows = list(csv.DictReader(io.StringIO(text)))
+        self.assertEqual(rows[0]['ingredients'], 'Rice|Tofu')
+        self.assertEqual(rows[1]['title'], 'Toast')
+
+    def test_export_only_own_recipes(self):
+        """Test the export is limited to the authenticated user"""
+        user2 = get_user_model().objects.create_user(
+            email='test2@excel.network', password='pass123'
+        )
+        Recipe.objects.create(user=user2, title='Secret',
+                              cook_time_minutes=2, price='1.00')
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertNotIn(b'Secret', self._content(res))
+
+    def test_export_queries_per_chunk(self):
+        """Test related names are fetched once per chunk of recipes"""
+        for i in range(8):
+            Recipe.objects.create(user=self.user, title=f'Recipe {i}',
+                                  cook_time_minutes=2, price='1.00')
+        with patch.object(RecipeViewSet, 'export_chunk_size', 4), \
+                CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(EXPORT_URL)
+            self._content(res)
+
+        tag_queries = [q for q in ctx.captured_queries
+                       if 'core_recipe_tags' in q['sql']]
+        self.assertEqual(len(tag_queries), 3)
+
+    def test_export_invalid_type(self):
+        """Test unknown export types are rejected"""
+        res = self.client.get(EXPORT_URL, {'type': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,187 @@
+import io
+import shutil
+import struct
+import tempfile
+from io import StringIO
+
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Blob, ImageJob, Recipe, RecipeImageVariant
+from recipe import images
+
+
+def image_upload_url(recipe_id):
+    return reverse('recipe:recipe-upload-image', args=[recipe_id])
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def jpeg(size=(2000, 1000), orientation=None):
+    """Return JPEG bytes, optionally with an EXIF orientation tag"""
+    img = Image.new('RGB', size, (200, 30, 30))
+    buffer = io.BytesIO()
+    options = {}
+    if orientation is not None:
+        # Little endian TIFF header and one IFD entry of type SHORT.
+        options['exif'] = b'Exif\x00\x00II*\x00' + struct.pack(
+            '<IHHHIHHI', 8, 1, images.EXIF_ORIENTATION, 3, 1, orientation,
+            0, 0
+        )
+    img.save(buffer, format='JPEG', **options)
+    return buffer.getvalue()
+
+
+class ImageProcessingTest(TestCase):
+    """Test the queued recipe image processing."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.user = get_user_model().objects.create_user(
+            'user@mail.com', 'testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='Sample recipe', cook_time_minutes=10,
+            price=5.00
+        )
+
+    def upload(self, data):
+        upload = ContentFile(data, name='photo.jpg')
+        return self.client.post(image_upload_url(self.recipe.id),
+                                {'image': upload}, format='multipart')
+
+    def process(self, **options):
+        call_command('process_images', once=True, stdout=StringIO(),
+                     stderr=StringIO(), **options)
+        self.recipe.refresh_from_db()
+
+    def test_upload_queues_job(self):
+        """Test uploading returns 202 and queues a single job"""
+        self.upload(jpeg())
+        res = self.upload(jpeg())
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data['image_status'], 'pending')
+        self.assertEqual(ImageJob.objects.filter(
+            recipe=self.recipe, status=ImageJob.PENDING
+        ).count(), 1)
+
+    def test_process_creates_variants(self):
+        """Test the worker writes scaled variants in every format"""
+        self.upload(jpeg(orientation=6))
+        source = Recipe.objects.get(pk=self.recipe.pk).image
+
+        self.process()
+
+        self.assertEqual(self.recipe.image_status, 'ready')
+        self.assertNotEqual(self.recipe.image.name, source.name)
+        variants = RecipeImageVariant.objects.filter(recipe=self.recipe)
+        self.assertEqual(variants.count(),
+                         len(images.SIZES) * len(images.variant_formats()))
+        thumbnail = variants.get(size='thumbnail', format='jpeg')
+        # Rotated upright from the EXIF orientation, then scaled down.
+        self.assertEqual((thumbnail.width, thumbnail.height), (75, 150))
+        with Image.open(thumbnail.file.path) as img:
+            self.assertEqual(img.size, (75, 150))
+            self.assertNotIn('exif', img.info)
+        with Image.open(self.recipe.image.path) as img:
+            self.assertNotIn('exif', img.info)
+        self.assertEqual(ImageJob.objects.get().status, ImageJob.DONE)
+
+        res = self.client.get(detail_url(self.recipe.id))
+        self.assertEqual(res.data['image_status'], 'ready')
+        self.assertTrue(res.data['image_variants']['thumbnail']['jpeg']
+                        ['url'].startswith('http://testserver/'))
+
+    def test_failed_job_is_retried(self):
+        """Test a job failing max_attempts times marks the image failed"""
+        self.upload(jpeg())
+        self.recipe.refresh_from_db()
+        with open(self.recipe.image.path, 'wb') as file:
+            file.write(b'not an image')
+
+        self.process(max_attempts=2)
+
+        job = ImageJob.objects.get()
+        self.assertEqual(job.status, ImageJob.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertTrue(job.error)
+        self.assertEqual(self.recipe.image_status, 'failed')
+
+    def test_replaced_image_discards_results(self):
+        """Test processing an outdated upload keeps the newer image"""
+        self.upload(jpeg())
+        stale = Recipe.objects.get(pk=self.recipe.pk)
+        self.upload(jpeg(size=(100, 100)))
+
+        images.process_recipe_image(stale)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, 'pending')
+        self.assertFalse(RecipeImageVariant.objects.exists())
+
+    def test_claim_job_skips_claimed_jobs(self):
+        """Test a running job is not handed out again until stale"""
+        ImageJob.objects.create(recipe=self.recipe)
+
+        job = images.claim_job()
+
+        self.assertEqual(job.status, ImageJob.RUNNING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNone(images.claim_job())
+        self.assertEqual(images.claim_job(stale_after=-1).pk, job.pk)
+
+
+class SharedImageProcessingTest(TransactionTestCase):
+    """Test processing images whose files other recipes share."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.user = get_user_model().objects.create_user(
+            'user@mail.com', 'testpass'
+        )
+
+    def create_recipe(self, content):
+        recipe = Recipe(user=self.user, title='Stock photo',
+                        cook_time_minutes=5, price=1)
+        recipe.image.save('photo.jpg', ContentFile(content))
+        return recipe
+
+    def test_reprocessing_keeps_shared_variants(self):
+        """Test a new image of one recipe releases its variants once"""
+        first = self.create_recipe(jpeg())
+        second = self.create_recipe(jpeg())
+        images.process_recipe_image(first)
+        images.process_recipe_image(second)
+        shared = RecipeImageVariant.objects.get(
+            recipe=second, size='thumbnail', format='jpeg'
+        ).file
+        self.assertEqual(Blob.objects.get(name=shared.name).refs, 2)
+
+        first.refresh_from_db()
+        first.image.save('photo.jpg', ContentFile(jpeg(size=(100, 100))))
+        images.process_recipe_image(first)
+
+        self.assertTrue(shared.storage.exists(shared.name))
+        self.assertTrue(Blob.objects.filter(name=shared.name,
+                                            refs__gte=1).exists())
@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+class KeysetPaginationTest(TestCase):
+    """Test cursor pagination on the recipe endpoints."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@excel.network', password='pass123',
+            name='Test FullName'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _walk(self, url, params):
+        """Follow next links and return every page of results"""
+        pages = []
+        res = self.client.get(url, params)
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append([item['name'] for item in res.data['results']])
+            if not res.data['next']:
+                return pages, res
+            res = self.client.get(res.data['next'])
+
+    def test_pages_follow_ordering(self):
+        """Test walking the cursor returns every tag once in order"""
+        names = [f'Tag {i:02}' for i in range(7)]
+        for name in names:
+            Tag.objects.create(user=self.user, name=name)
+
+        pages, _ = self._walk(TAGS_URL, {'page_size': 3})
+
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), sorted(names, reverse=True))
+
+    def test_ties_on_ordering_field(self):
+        """Test rows sharing the ordering value are split by id"""
+        tags = [Tag.objects.create(user=self.user, name='Same')
+                for _ in range(5)]
+
+        pages, _ = self._walk(TAGS_URL, {'page_size': 2})
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+
+        res = self.client.get(TAGS_URL, {'page_size': 5})
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, sorted((tag.id for tag in tags), reverse=True))
+
+    def test_previous_link(self):
+        """Test the previous link returns the preceding page"""
+        for i in range(6):
+            Recipe.objects.create(user=self.user, title=f'Recipe {i}',
+                                  cook_time_minutes=5, price=1.00)
+
+        first = self.client.get(RECIPES_URL, {'page_size': 2})
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+
+        self.assertIsNone(first.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+        self.assertIsNotNone(back.data['next'])
+
+    def test_page_size_all(self):
+        """Test page_size=all returns an unpaginated list"""
+        Tag.objects.create(user=self.user, name='Vegan')
+        Tag.objects.create(user=self.user, name='Dessert')
+
+        res = self.client.get(TAGS_URL, {'page_size': 'all'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([tag['name'] for tag in res.data],
+                         ['Vegan', 'Dessert'])
+
+    def test_invalid_cursor(self):
+        """Test a malformed cursor is rejected"""
+        res = self.client.get(TAGS_URL, {'cursor': 'garbage'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -2,6 +2,8 @@ import tempfile
 import os
 from PIL import Image
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.test import TestCase
 
@@ -78,7 +80,7 @@ class PrivateRecipesApiTest(TestCase):
         recipes = Recipe.objects.all().order_by('-title')
         serializer = RecipeSerializer(recipes, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_limited_recipes(self):
         """Test recipes returned are specific for logged user"""
@@ -94,8 +96,8 @@ class PrivateRecipesApiTest(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_view_recipe_detail(self):
         """Test for viewing a simple recipe detail"""
@@ -188,6 +190,59 @@ class PrivateRecipesApiTest(TestCase):
         tags = recipe.tags.all()
         self.assertEqual(len(tags), 0)
 
+    def test_create_recipe_foreign_ingredients(self):
+        """Test linking another user's ingredients is rejected"""
+        user2 = get_user_model().objects.create_user(
+            email='test2@excel.network', password='pass123'
+        )
+        own = sample_ingredient(user=self.user, name='Bread')
+        foreign = sample_ingredient(user=user2, name='Jelly')
+        payload = {'title': 'Jelly sandwich', 'cook_time_minutes': 5,
+                   'price': 1.00, 'ingredients': [own.id, foreign.id, 999]}
+
+        res = self.client.post(RECIPES_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = res.data['ingredients']
+        self.assertEqual(len(errors), 2)
+        self.assertIn(str(foreign.id), errors[0])
+        self.assertIn('999', errors[1])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_create_recipe_ingredients_one_lookup(self):
+        """Test all ingredient ids are resolved with a single query"""
+        ingredients = [sample_ingredient(user=self.user, name=f'I{i}')
+                       for i in range(20)]
+        payload = {'title': 'Stew', 'cook_time_minutes': 60, 'price': 8.00,
+                   'ingredients': [i.id for i in ingredients]}
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post(RECIPES_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        lookups = [q for q in ctx.captured_queries
+                   if '"core_ingredient"."user_id" =' in q['sql']]
+        self.assertEqual(len(lookups), 1)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertEqual(recipe.ingredients.count(), 20)
+
+    def test_update_keeps_unchanged_links(self):
+        """Test links kept by an update are not rewritten"""
+        recipe = sample_recipe(user=self.user)
+        tag = sample_tag(user=self.user)
+        recipe.tags.add(tag)
+        link = Recipe.tags.through.objects.get(recipe=recipe)
+        new_tag = sample_tag(user=self.user, name='Ramen')
+
+        res = self.client.patch(detail_url(recipe.id),
+                                {'tags': [tag.id, new_tag.id]})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(Recipe.tags.through.objects.filter(
+            pk=link.pk
+        ).exists())
+        self.assertEqual(recipe.tags.count(), 2)
+
 
 class RecipeImageUploadTest(TestCase):
     """Test for RecipeImageUpload."""
@@ -215,8 +270,9 @@ class RecipeImageUploadTest(TestCase):
 
         self.recipe.refresh_from_db()
 
-        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
         self.assertIn('image', res.data)
+        self.assertEqual(res.data['image_status'], 'pending')
         self.assertTrue(os.path.exists(self.recipe.image.path))
 
     def test_upload_image_bad(self):
@@ -242,9 +298,9 @@ class RecipeImageUploadTest(TestCase):
         serializer2 = RecipeSerializer(recipe2)
         serializer3 = RecipeSerializer(recipe3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertIn(serializer2.data, res.data['results'])
+        self.assertNotIn(serializer3.data, res.data['results'])
 
     def test_filter_recipe_by_ingredient(self):
         """Test returnig recipes with specific ingredients"""
@@ -265,6 +321,60 @@ class RecipeImageUploadTest(TestCase):
         serializer2 = RecipeSerializer(recipe2)
         serializer3 = RecipeSerializer(recipe3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertIn(serializer2.data, res.data['results'])
+        self.assertNotIn(serializer3.data, res.data['results'])
+
+    def test_filter_recipe_by_tags_without_duplicates(self):
+        """Test recipes matching several tags are listed once"""
+        recipe = sample_recipe(user=self.user, title='Caesar Salad')
+        tag1 = sample_tag(user=self.user, name='Vegan')
+        tag2 = sample_tag(user=self.user, name='Quick')
+        recipe.tags.add(tag1, tag2)
+
+        res = self.client.get(RECIPES_URL, {'tags': f'{tag1.id},{tag2.id}'})
+
+        self.assertEqual([r['id'] for r in res.data['results']],
+                         [recipe.id])
+
+    def test_filter_recipe_by_all_tags(self):
+        """Test match=all returns recipes having every given tag"""
+        recipe1 = sample_recipe(user=self.user, title='Caesar Salad')
+        recipe2 = sample_recipe(user=self.user, title='Tofu Treats')
+        tag1 = sample_tag(user=self.user, name='Vegan')
+        tag2 = sample_tag(user=self.user, name='Quick')
+        recipe1.tags.add(tag1, tag2)
+        recipe2.tags.add(tag1)
+
+        res = self.client.get(RECIPES_URL, {
+            'tags': f'{tag1.id},{tag2.id},{tag2.id}', 'match': 'all',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in res.data['results']],
+                         [recipe1.id])
+
+    def test_filter_recipe_by_all_ingredients(self):
+        """Test match=all applies to ingredients too"""
+        recipe1 = sample_recipe(user=self.user, title='Italian Pizza')
+        recipe2 = sample_recipe(user=self.user, title='Speciale Pizza')
+        ingredient1 = sample_ingredient(user=self.user, name='Mozzarela')
+        ingredient2 = sample_ingredient(user=self.user, name='Peperoni')
+        recipe1.ingredients.add(ingredient1)
+        recipe2.ingredients.add(ingredient1, ingredient2)
+
+        res = self.client.get(RECIPES_URL, {
+            'ingredients': f'{ingredient1.id},{ingredient2.id}',
+            'match': 'all',
+        })
+
+        self.assertEqual([r['id'] for r in res.data['results']],
+                         [recipe2.id])
+
+    def test_filter_recipe_invalid_params(self):
+        """Test invalid filter parameters are rejected"""
+        for params in ({'tags': '1,x'}, {'ingredients': ','},
+                       {'tags': '1', 'match': 'some'}):
+            res = self.client.get(RECIPES_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
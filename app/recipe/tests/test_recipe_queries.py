@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    """Create recipe detail url"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class RecipeQueryCountTest(TestCase):
+    """Test recipe endpoints run a constant number of queries."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@excel.network', password='pass123',
+            name='Test FullName'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _create_recipes(self, count):
+        """Create recipes with one tag and two ingredients each"""
+        for i in range(count):
+            recipe = Recipe.objects.create(
+                user=self.user, title=f'Recipe {i}',
+                cook_time_minutes=10, price=5.00
+            )
+            recipe.tags.add(Tag.objects.create(user=self.user, name=f'T{i}'))
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=self.user, name=f'A{i}'),
+                Ingredient.objects.create(user=self.user, name=f'B{i}')
+            )
+            yield recipe
+
+    def _count_list_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries)
+
+    def test_list_query_count_is_constant(self):
+        """Test listing recipes does not query once per recipe"""
+        list(self._create_recipes(2))
+        few = self._count_list_queries()
+        list(self._create_recipes(10))
+        many = self._count_list_queries()
+
+        self.assertEqual(few, many)
+        # Data version, recipes page, tags, ingredients
+        self.assertEqual(many, 4)
+
+    def test_list_fetches_only_related_ids(self):
+        """Test list prefetch does not load tag or ingredient names"""
+        list(self._create_recipes(3))
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(RECIPES_URL)
+
+        related = [q['sql'] for q in ctx.captured_queries
+                   if 'core_recipe_tags' in q['sql'] or
+                   'core_recipe_ingredients' in q['sql']]
+        self.assertEqual(len(related), 2)
+        for sql in related:
+            self.assertNotIn('"name"', sql)
+
+    def test_retrieve_query_count(self):
+        """Test retrieving a recipe runs one query per relation plus ETag"""
+        recipe, = self._create_recipes(1)
+
+        with self.assertNumQueries(5):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['ingredients']), 2)
+        self.assertEqual(res.data['tags'][0]['name'], 'T0')
@@ -0,0 +1,136 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe
+from recipe import search
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+class SearchApiTest(TestCase):
+    """Test the search parameter of the list endpoints."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@excel.network', 'testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def recipe(self, title, tags=(), ingredients=(), user=None):
+        recipe = Recipe.objects.create(user=user or self.user, title=title,
+                                       cook_time_minutes=10, price=5)
+        for name in tags:
+            recipe.tags.add(Tag.objects.create(user=recipe.user, name=name))
+        for name in ingredients:
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=recipe.user, name=name)
+            )
+        return recipe
+
+    def search(self, url, term):
+        res = self.client.get(url, {'search': term})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data['results']
+
+    def test_search_recipes(self):
+        """Test recipes match on title, tag and ingredient names"""
+        by_title = self.recipe('Tomato soup')
+        by_tag = self.recipe('Gazpacho', tags=['Tomato dishes'])
+        by_ingredient = self.recipe('Salad', ingredients=['Tomato', 'Basil'],
+                                    tags=['Tomato season'])
+        self.recipe('Pancakes', ingredients=['Flour'])
+        self.recipe('Tomato pie', user=get_user_model().objects.create_user(
+            'other@excel.network', 'testpass'
+        ))
+
+        results = self.search(RECIPES_URL, 'tomato')
+
+        ids = [recipe['id'] for recipe in results]
+        self.assertEqual(ids[0], by_title.id)
+        self.assertEqual(sorted(ids[1:]), sorted([by_tag.id,
+                                                  by_ingredient.id]))
+
+    def test_search_recipes_pages(self):
+        """Test search results page by rank without repeats"""
+        for i in range(3):
+            self.recipe(f'Rice bowl {i}')
+            self.recipe(f'Curry {i}', ingredients=['Rice'])
+
+        res = self.client.get(RECIPES_URL, {'search': 'rice',
+                                            'page_size': 4})
+        ids = [recipe['id'] for recipe in res.data['results']]
+        res = self.client.get(res.data['next'])
+        ids += [recipe['id'] for recipe in res.data['results']]
+
+        self.assertEqual(len(ids), 6)
+        self.assertEqual(len(set(ids)), 6)
+        titles = Recipe.objects.filter(pk__in=ids[:3]).values_list(
+            'title', flat=True
+        )
+        self.assertTrue(all(title.startswith('Rice') for title in titles))
+
+    def test_search_pages_through_tied_ranks(self):
+        """Test every result is listed once when many ranks are equal"""
+        for i in range(5):
+            self.recipe(f'Rice bowl {i}')
+            self.recipe(f'Curry {i}', ingredients=[f'Rice {i}'])
+
+        ids = []
+        res = self.client.get(RECIPES_URL, {'search': 'rice',
+                                            'page_size': 3})
+        while True:
+            ids += [recipe['id'] for recipe in res.data['results']]
+            if not res.data['next']:
+                break
+            res = self.client.get(res.data['next'])
+
+        self.assertEqual(sorted(ids), sorted(
+            Recipe.objects.filter(user=self.user).values_list('pk', flat=True)
+        ))
+
+    def test_ranks_are_exact_integers(self):
+        """Test ranks are integers, which cursors hold exactly"""
+        self.recipe('Rice bowl')
+        self.recipe('Curry', ingredients=['Rice'])
+
+        ranks = search.search_recipes(Recipe.objects.all(), 'rice')
+
+        self.assertEqual(
+            sorted(ranks.values_list('rank', flat=True)),
+            [int(0.4 * search.RANK_SCALE), search.RANK_SCALE]
+        )
+
+    def test_autocomplete_tags(self):
+        """Test tag search ranks exact and prefix matches first"""
+        for name in ('Wholegrain', 'Grains', 'Grain', 'Dessert'):
+            Tag.objects.create(user=self.user, name=name)
+
+        results = self.search(TAGS_URL, 'grain')
+
+        self.assertEqual([tag['name'] for tag in results],
+                         ['Grain', 'Grains', 'Wholegrain'])
+
+    def test_autocomplete_ingredients(self):
+        """Test ingredient search combines with assigned_only"""
+        self.recipe('Salad', ingredients=['Basil'])
+        Ingredient.objects.create(user=self.user, name='Basmati')
+
+        results = self.client.get(INGREDIENTS_URL, {
+            'search': 'bas', 'assigned_only': 1
+        }).data['results']
+
+        self.assertEqual([item['name'] for item in results], ['Basil'])
+
+    def test_refresh_is_noop_without_postgres(self):
+        """Test search vectors are only maintained on Postgres"""
+        recipe = self.recipe('Tomato soup')
+
+        with self.assertNumQueries(0):
+            search.refresh_recipes(Recipe.objects.filter(pk=recipe.pk))
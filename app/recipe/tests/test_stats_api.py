@@ -0,0 +1,115 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe
+
+STATS_URL = reverse('recipe:recipe-stats')
+
+
+def sample_recipe(user, **params):
+    """Create and return a sample recipe"""
+    defaults = {
+        'title': 'Sample recipe',
+        'cook_time_minutes': 10,
+        'price': Decimal('5.00'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeStatsApiTest(TestCase):
+    """Test the recipe book statistics endpoint."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@excel.network', password='pass123',
+            name='Test FullName'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_login_required(self):
+        """Test that authentication is required"""
+        res = APIClient().get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_empty_book(self):
+        """Test the stats of a user without recipes"""
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['recipe_count'], 0)
+        self.assertIsNone(res.data['price']['avg'])
+        self.assertEqual(res.data['tags'], [])
+        self.assertEqual(
+            sum(bucket['count'] for bucket in res.data['cook_time_histogram']),
+            0
+        )
+
+    def test_stats(self):
+        """Test aggregates, usage counts and the cook time histogram"""
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        Tag.objects.create(user=self.user, name='Unused')
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        tofu = Ingredient.objects.create(user=self.user, name='Tofu')
+        recipe1 = sample_recipe(self.user, cook_time_minutes=5,
+                                price=Decimal('2.00'))
+        recipe2 = sample_recipe(self.user, cook_time_minutes=20,
+                                price=Decimal('6.50'))
+        sample_recipe(self.user, cook_time_minutes=600,
+                      price=Decimal('10.00'))
+        recipe1.tags.add(vegan)
+        recipe2.tags.add(vegan)
+        recipe1.ingredients.add(salt, tofu)
+        recipe2.ingredients.add(salt)
+        other = get_user_model().objects.create_user('other@excel.network',
+                                                     'pass123')
+        sample_recipe(other, price=Decimal('99.00'))
+
+        # The data version, then the four stats queries.
+        with self.assertNumQueries(5):
+            res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.data['recipe_count'], 3)
+        self.assertEqual(res.data['price'],
+                         {'avg': '6.17', 'min': '2.00', 'max': '10.00'})
+        self.assertEqual(res.data['cook_time_minutes'],
+                         {'avg': 208.3, 'min': 5, 'max': 600})
+        self.assertEqual(
+            [(tag['name'], tag['recipe_count']) for tag in res.data['tags']],
+            [('Vegan', 2), ('Unused', 0)]
+        )
+        self.assertEqual(
+            [(i['name'], i['recipe_count'])
+             for i in res.data['top_ingredients']],
+            [('Salt', 2), ('Tofu', 1)]
+        )
+        histogram = res.data['cook_time_histogram']
+        self.assertEqual(histogram[0],
+                         {'min_minutes': 0, 'max_minutes': 15, 'count': 1})
+        self.assertEqual(histogram[1]['count'], 1)
+        self.assertEqual(histogram[-1]['count'], 1)
+        self.assertIsNone(histogram[-1]['max_minutes'])
+
+    def test_cached_until_changed(self):
+        """Test stats are cached and recomputed after a change"""
+        sample_recipe(self.user)
+        self.client.get(STATS_URL)
+
+        # Only the data version is read, from the shared cache.
+        with self.assertNumQueries(1):
+            res = self.client.get(STATS_URL)
+        self.assertEqual(res['X-Cache'], 'HIT')
+
+        sample_recipe(self.user)
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['recipe_count'], 2)
@@ -1,4 +1,6 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.test import TestCase
 
@@ -43,7 +45,7 @@ class PrivateTagsApiTest(TestCase):
         tags = Tag.objects.all().order_by('-name')
         serializer = TagSerializer(tags, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_limited_tags(self):
         """Test tags returned are specific for logged user"""
@@ -56,8 +58,8 @@ class PrivateTagsApiTest(TestCase):
         res = self.client.get(TAGS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
 
     def test_create_tag_success(self):
         """Test creating a new Tag"""
@@ -90,8 +92,8 @@ class PrivateTagsApiTest(TestCase):
 
         serializer1 = TagSerializer(tag1)
         serializer2 = TagSerializer(tag2)
-        self.assertIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertNotIn(serializer2.data, res.data['results'])
 
     def test_unique_assigned_tags_filter(self):
         """Test filter assigend tags are unique"""
@@ -110,4 +112,102 @@ class PrivateTagsApiTest(TestCase):
 
         res = self.client.get(TAGS_URL, {'assigned_only': 1})
 
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_filter_unused_tags(self):
+        """Test to filter only tags not assigned to any recipe"""
+        tag1 = Tag.objects.create(user=self.user, name='Breackfast')
+        tag2 = Tag.objects.create(user=self.user, name='Lunch')
+        recipe = Recipe.objects.create(
+            title='PB&J Sandwich', cook_time_minutes='5', price=2.5,
+            user=self.user
+        )
+        recipe.tags.add(tag1)
+
+        res = self.client.get(TAGS_URL, {'assigned_only': 'unused'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [TagSerializer(tag2).data])
+
+    def test_assigned_only_invalid(self):
+        """Test an unknown assigned_only value is rejected"""
+        res = self.client.get(TAGS_URL, {'assigned_only': 'maybe'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_assigned_only_semi_join(self):
+        """Test assigned_only runs one EXISTS query without DISTINCT"""
+        tag = Tag.objects.create(user=self.user, name='Breackfast')
+        for i in range(50):
+            recipe = Recipe.objects.create(
+                title=f'Recipe {i}', cook_time_minutes='5', price=2.5,
+                user=self.user
+            )
+            recipe.tags.add(tag)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        self.assertEqual(len(res.data['results']), 1)
+        # The data version is read first, from the shared cache.
+        self.assertEqual(len(ctx.captured_queries), 2)
+        sql = ctx.captured_queries[1]['sql'].upper()
+        self.assertIn('EXISTS', sql)
+        self.assertNotIn('DISTINCT', sql)
+        self.assertNotIn('JOIN', sql)
+
+    def _tagged_recipes(self, tag, count):
+        for i in range(count):
+            recipe = Recipe.objects.create(
+                title=f'{tag.name} {i}', cook_time_minutes='5', price=2.5,
+                user=self.user
+            )
+            recipe.tags.add(tag)
+
+    def test_with_counts(self):
+        """Test tags are listed with their recipe count in one query"""
+        soups = Tag.objects.create(user=self.user, name='Soups')
+        Tag.objects.create(user=self.user, name='Unused')
+        self._tagged_recipes(soups, 3)
+
+        # The data version, then the tags.
+        with self.assertNumQueries(2):
+            res = self.client.get(TAGS_URL, {'with_counts': 1})
+
+        self.assertEqual(
+            [(t['name'], t['recipe_count']) for t in res.data['results']],
+            [('Unused', 0), ('Soups', 3)]
+        )
+
+    def test_without_counts(self):
+        """Test recipe counts are not listed by default"""
+        Tag.objects.create(user=self.user, name='Soups')
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertNotIn('recipe_count', res.data['results'][0])
+
+    def test_order_by_recipe_count(self):
+        """Test paging through tags ordered by recipe count"""
+        for name, count in (('Soups', 1), ('Vegan', 3), ('Quick', 2),
+                            ('Unused', 0)):
+            self._tagged_recipes(Tag.objects.create(user=self.user,
+                                                    name=name), count)
+
+        res = self.client.get(TAGS_URL, {'ordering': '-recipe_count',
+                                         'page_size': 2})
+        following = self.client.get(res.data['next'])
+
+        self.assertEqual(
+            [t['name'] for t in res.data['results'] +
+             following.data['results']],
+            ['Vegan', 'Quick', 'Soups', 'Unused']
+        )
+        self.assertEqual(res.data['results'][0]['recipe_count'], 3)
+
+    def test_invalid_counts_params(self):
+        """Test unknown with_counts and ordering values are rejected"""
+        for params in ({'with_counts': 'yes'}, {'ordering': 'user'}):
+            res = self.client.get(TAGS_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
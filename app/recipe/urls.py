@@ -12,5 +12,6 @@ router.register('recipes', views.RecipeViewSet)
 app_name = 'recipe'
 
 urlpatterns = [
+    path('cache-stats/', views.CacheStatsView.as_view(), name='cache-stats'),
     path('', include(router.urls))
 ]
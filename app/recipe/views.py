@@ -1,29 +1,150 @@
+from collections import OrderedDict
+
+from django.db.models import (Count, Exists, IntegerField, OuterRef,
+                              Prefetch, Subquery)
+from django.db.models.functions import Coalesce
+from django.utils.translation import gettext_lazy as _
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db import router, transaction
+from django.http import StreamingHttpResponse
+from rest_framework import serializers as drf_serializers
 from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.views import APIView
 
-from recipe import serializers
+from recipe import cache, export, images, search, serializers, stats
+from users.authentication import APITokenAuthentication
+from recipe.bulk import BulkListSerializer
+from recipe.conditional import ConditionalGetMixin
 from core.models import Tag, Ingredient, Recipe
 
 
-class BaseRecipeAttrsViewset(viewsets.GenericViewSet,
+class BulkModelMixin:
+    """Create, partially update or delete a list of objects at once"""
+    bulk_ids_field = drf_serializers.ListField(
+        child=drf_serializers.IntegerField(), allow_empty=False
+    )
+
+    @action(methods=['POST', 'PATCH', 'DELETE'], detail=False,
+            url_path='bulk')
+    def bulk(self, request):
+        """Write the objects listed in the request body"""
+        if request.method == 'POST':
+            response = self.bulk_create(request)
+        elif request.method == 'PATCH':
+            response = self.bulk_update(request)
+        else:
+            response = self.bulk_destroy(request)
+        cache.bump_version(request.user.pk)
+        return response
+
+    def bulk_create(self, request):
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        self.bulk_saved(serializer.save(user=request.user))
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def bulk_update(self, request):
+        serializer = self.get_serializer(self.get_queryset(),
+                                         data=request.data, many=True,
+                                         partial=True)
+        serializer.is_valid(raise_exception=True)
+        self.bulk_saved(serializer.save())
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    def bulk_saved(self, objs):
+        """Hook run after objects were written without model signals"""
+
+    def bulk_destroy(self, request):
+        ids = self.bulk_ids_field.run_validation(request.data)
+        queryset = self.get_queryset().filter(pk__in=ids)
+        existing = set(queryset.values_list('pk', flat=True))
+        message = BulkListSerializer.default_error_messages['does_not_exist']
+        errors = [{} if pk in existing else {'id': [message.format(pk=pk)]}
+                  for pk in ids]
+        if any(errors):
+            raise ValidationError(errors)
+        with transaction.atomic(using=router.db_for_write(queryset.model)):
+            queryset.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class BaseRecipeAttrsViewset(BulkModelMixin,
+                             cache.CachedListMixin,
+                             viewsets.GenericViewSet,
                              mixins.ListModelMixin,
                              mixins.CreateModelMixin):
     """Base class for use in the viewsets for user"""
-    authentication_classes = (TokenAuthentication, )
+    authentication_classes = (APITokenAuthentication, )
     permission_classes = (IsAuthenticated, )
 
+    orderings = ('name', '-name', 'recipe_count', '-recipe_count')
+
     def get_queryset(self):
         """Return objects only for current authenticated user"""
-        assigned_only = bool(
-            int(self.request.query_params.get('assigned_only', '0'))
-        )
-        queryset = self.queryset
-        if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
-        return queryset.filter(user=self.request.user).distinct()
+        assigned_only = self.request.query_params.get('assigned_only', '0')
+        with_counts = self.request.query_params.get('with_counts', '0')
+        ordering = self.request.query_params.get('ordering')
+        term = self.request.query_params.get('search', '').strip()
+        if assigned_only not in ('0', '1', 'unused'):
+            raise ValidationError({'assigned_only': _(
+                'Expected one of 0, 1 or unused.'
+            )})
+        if with_counts not in ('0', '1'):
+            raise ValidationError({'with_counts': _(
+                'Expected one of 0 or 1.'
+            )})
+        if ordering is not None and ordering not in self.orderings:
+            raise ValidationError({'ordering': _(
+                'Expected one of {orderings}.'
+            ).format(orderings=', '.join(self.orderings))})
+
+        queryset = self.queryset.filter(user=self.request.user)
+        if term:
+            queryset = search.search_names(queryset, term).order_by(
+                '-similarity'
+            )
+        if assigned_only != '0':
+            queryset = queryset.annotate(assigned=self._assigned_subquery())
+            queryset = queryset.filter(assigned=(assigned_only == '1'))
+        if with_counts == '1' or ordering in ('recipe_count',
+                                              '-recipe_count'):
+            queryset = queryset.annotate(
+                recipe_count=self._count_subquery()
+            )
+        if ordering is not None:
+            queryset = queryset.order_by(ordering)
+        return queryset
+
+    def bulk_saved(self, objs):
+        """Refresh the search vectors of recipes using renamed objects"""
+        search.refresh_recipes(Recipe.objects.filter(
+            **{f'{self.recipe_field}__in': [obj.pk for obj in objs]}
+        ))
+
+    def _links(self):
+        """Return the recipe links of the outer object"""
+        field = Recipe._meta.get_field(self.recipe_field)
+        target = field.m2m_reverse_field_name()
+        return field.remote_field.through.objects.filter(
+            **{target: OuterRef('pk')}
+        ).order_by().values(target)
+
+    def _assigned_subquery(self):
+        """Return an EXISTS over the recipe links of the outer object"""
+        return Exists(self._links())
+
+    def _count_subquery(self):
+        """Return the number of recipes linked to the outer object.
+
+        A correlated subquery answered from the (object, recipe) index of
+        the link table, rather than a join grouped over every object: when
+        the page is not ordered by the count, only listed rows are counted.
+        """
+        counts = self._links().annotate(count=Count('pk')).values('count')
+        return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
 
     def perform_create(self, serializer):
         """Create a new object and assign to authenticated user"""
@@ -34,42 +155,101 @@ class TagViewSet(BaseRecipeAttrsViewset):
     """Manage Tags in database"""
     queryset = Tag.objects.all().order_by('-name')
     serializer_class = serializers.TagSerializer
+    recipe_field = 'tags'
 
 
 class IngredientViewSet(BaseRecipeAttrsViewset):
     """Manage ingredients in database"""
     queryset = Ingredient.objects.all().order_by('-name')
     serializer_class = serializers.IngredientSerializer
+    recipe_field = 'ingredients'
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(BulkModelMixin, ConditionalGetMixin,
+                    cache.CachedListMixin, viewsets.ModelViewSet):
     """Manafe Recipes in the database."""
-    queryset = Recipe.objects.all().order_by('-title')
+    queryset = Recipe.objects.defer('search_vector').order_by('-title')
     serializer_class = serializers.RecipeSerializer
-    authentication_classes = (TokenAuthentication, )
+    etag_related = ('tags', 'ingredients')
+    export_chunk_size = 2000
+    authentication_classes = (APITokenAuthentication, )
     permission_classes = (IsAuthenticated, )
 
-    def _params_to_int(self, qs):
-        """Convert string of ID's to an integer list"""
-        return [int(str_id) for str_id in qs.split(',')]
+    def _params_to_int(self, qs, param):
+        """Convert string of ID's to an integer list without repeats"""
+        try:
+            return list(OrderedDict.fromkeys(
+                int(str_id) for str_id in qs.split(',')
+            ))
+        except ValueError:
+            raise ValidationError({param: _(
+                'Expected a comma separated list of ids.'
+            )})
 
     def get_queryset(self):
         """Return objects only for current authenticated user"""
         tags = self.request.query_params.get('tags', '')
         ingredients = self.request.query_params.get('ingredients', '')
+        match = self.request.query_params.get('match', 'any')
+        term = self.request.query_params.get('search', '').strip()
+        if match not in ('all', 'any'):
+            raise ValidationError({'match': _(
+                'Expected one of all or any.'
+            )})
         queryset = self.queryset
         if tags:
-            tag_ids = self._params_to_int(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            tag_ids = self._params_to_int(tags, 'tags')
+            queryset = self._filter_related(queryset, 'tags', tag_ids, match)
         if ingredients:
-            ingredient_ids = self._params_to_int(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
-        return queryset.filter(user=self.request.user)
+            ingredient_ids = self._params_to_int(ingredients, 'ingredients')
+            queryset = self._filter_related(queryset, 'ingredients',
+                                            ingredient_ids, match)
+        if term:
+            queryset = search.search_recipes(queryset, term).order_by('-rank')
+        return self._prefetch_related(queryset.filter(user=self.request.user))
+
+    def _filter_related(self, queryset, field_name, ids, match):
+        """Filter recipes linked to any or to all of the given objects.
+
+        Both modes look the links up in a subquery instead of joining
+        them, so recipes are never repeated and pages stay range scans.
+        """
+        field = Recipe._meta.get_field(field_name)
+        source = field.m2m_field_name()
+        target = field.m2m_reverse_field_name()
+        links = field.remote_field.through.objects.filter(
+            **{f'{target}__in': ids}
+        )
+        if match == 'any':
+            matched = Exists(links.filter(**{source: OuterRef('pk')}))
+            return queryset.annotate(
+                **{f'{field_name}_matched': matched}
+            ).filter(**{f'{field_name}_matched': True})
+        linked_to_all = links.values(source).annotate(
+            matched=Count(target)
+        ).filter(matched=len(ids)).values(source)
+        return queryset.filter(pk__in=linked_to_all)
+
+    def _prefetch_related(self, queryset):
+        """Prefetch tags and ingredients with the columns the action needs"""
+        if self.action == 'list':
+            fields = ('id',)
+        elif self.action == 'retrieve':
+            fields = ('id', 'name')
+            queryset = queryset.prefetch_related('image_variants')
+        else:
+            return queryset
+        return queryset.prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.only(*fields)),
+            Prefetch('ingredients', queryset=Ingredient.objects.only(*fields))
+        )
 
     def get_serializer_class(self):
         """Return the appropiate serializer class"""
         if self.action == 'retrieve':
             return serializers.RecipeDetailSerializer
+        elif self.action == 'bulk':
+            return serializers.RecipeBulkSerializer
         elif self.action == 'upload_image':
             return serializers.RecipeImageSerializer
         return self.serializer_class
@@ -78,19 +258,74 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """Create new Recipe for logged user"""
         serializer.save(user=self.request.user)
 
+    def bulk_saved(self, objs):
+        """Compute the search vectors of recipes written in bulk"""
+        search.refresh_recipes(
+            Recipe.objects.filter(pk__in=[obj.pk for obj in objs])
+        )
+
+    @action(methods=['GET'], detail=False, url_path='export',
+            url_name='export')
+    def export_recipes(self, request):
+        """Stream every recipe of the user as NDJSON or CSV"""
+        export_type = request.query_params.get('type', 'ndjson')
+        if export_type not in export.RENDERERS:
+            raise ValidationError({'type': _(
+                'Expected one of {types}.'
+            ).format(types=', '.join(sorted(export.RENDERERS)))})
+        render, content_type = export.RENDERERS[export_type]
+        rows = export.iter_rows(self.get_queryset().order_by('pk'),
+                                chunk_size=self.export_chunk_size)
+        filename = f'recipes.{export_type}'
+        if request.query_params.get('gzip') == '1':
+            content = export.gzip_stream(render(rows))
+            content_type = 'application/gzip'
+            filename += '.gz'
+        else:
+            content = export.encode(render(rows))
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = (
+            f'attachment; filename="{filename}"'
+        )
+        return response
+
+    @action(methods=['GET'], detail=False, url_path='stats',
+            url_name='stats')
+    def book_stats(self, request):
+        """Summarise the user's recipes, cached until any of them changes"""
+        return cache.cached_response(
+            request, lambda: Response(stats.recipe_book_stats(request.user))
+        )
+
     @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
-        """Action to upload recipe's image"""
+        """Action to upload recipe's image, queueing its processing"""
         recipe = self.get_object()
+        previous = recipe.image.name
         serializer = self.get_serializer(
             recipe,
             data=request.data
         )
         if serializer.is_valid():
-            serializer.save()
+            db = router.db_for_write(Recipe)
+            with transaction.atomic(using=db):
+                recipe = serializer.save(image_status='pending')
+                images.enqueue(recipe)
+                if previous:
+                    images.delete_on_commit(recipe.image.storage,
+                                            [previous], using=db)
             return Response(
-                serializer.data, status=status.HTTP_200_OK
+                serializer.data, status=status.HTTP_202_ACCEPTED
             )
         return Response(
             serializer.errors, status=status.HTTP_400_BAD_REQUEST
         )
+
+
+class CacheStatsView(APIView):
+    """Report hit and miss counters of the API response cache"""
+    authentication_classes = (APITokenAuthentication, )
+    permission_classes = (IsAdminUser, )
+
+    def get(self, request):
+        return Response(cache.stats())
@@ -0,0 +1,28 @@
+#!/bin/sh
+# Start the API with the server named by SERVER:
+#   runserver  Django development server with autoreload (default)
+#   wsgi       gunicorn with threaded workers, see gunicorn.conf.py
+#   asgi       gunicorn with uvicorn workers, see gunicorn.conf.py
+set -e
+
+python manage.py wait_for_db
+python manage.py migrate --noinput
+python manage.py createcachetable
+
+case "${SERVER:-runserver}" in
+    runserver)
+        exec python manage.py runserver 0.0.0.0:8000
+        ;;
+    wsgi)
+        python manage.py collectstatic --noinput
+        exec gunicorn app.wsgi:application
+        ;;
+    asgi)
+        python manage.py collectstatic --noinput
+        exec gunicorn app.asgi:application
+        ;;
+    *)
+        echo "Unknown SERVER '$SERVER', expected runserver, wsgi or asgi" >&2
+        exit 1
+        ;;
+esac
@@ -0,0 +1,231 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import caches
+from django.db import router
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import (BaseAuthentication,
+                                           TokenAuthentication)
+from rest_framework.authtoken.models import Token
+
+TOKEN_DEFAULTS = {
+    'MODE': 'db',
+    'EXPIRY': 3600,
+    'REFRESH_WINDOW': 7 * 24 * 3600,
+}
+SIGNED_TOKEN_SALT = 'users.authentication.SignedTokenAuthentication'
+
+
+def token_setting(name):
+    """Return an AUTH_TOKEN setting, falling back to its default"""
+    return getattr(settings, 'AUTH_TOKEN', {}).get(name, TOKEN_DEFAULTS[name])
+
+
+class TokenCache:
+    """Map of token keys to user snapshots.
+
+    A bounded in-process LRU with a TTL is consulted first, then an
+    optional shared Django cache. Entries are dropped from both tiers when
+    invalidated; other processes keep their local copy for at most TTL
+    seconds, which bounds how long a revoked token keeps working there.
+    """
+    key_prefix = 'auth:token:'
+
+    def __init__(self, max_entries=10000, ttl=60, shared_cache=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared_cache = shared_cache
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, 'AUTH_TOKEN_CACHE', {})
+        return cls(max_entries=options.get('MAX_ENTRIES', 10000),
+                   ttl=options.get('TTL', 60),
+                   shared_cache=options.get('SHARED_CACHE'))
+
+    def _shared(self):
+        return caches[self.shared_cache] if self.shared_cache else None
+
+    def _shared_key(self, key):
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return self.key_prefix + digest
+
+    def get(self, key):
+        """Return the cached user of a token key, or None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                user, expires = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    return user
+                del self._entries[key]
+
+        shared = self._shared()
+        if shared is None:
+            return None
+        user = shared.get(self._shared_key(key))
+        if user is not None:
+            self._set_local(key, user, now)
+        return user
+
+    def set(self, key, user):
+        self._set_local(key, user, time.monotonic())
+        shared = self._shared()
+        if shared is not None:
+            shared.set(self._shared_key(key), user, timeout=self.ttl)
+
+    def _set_local(self, key, user, now):
+        with self._lock:
+            self._entries[key] = (user, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+        shared = self._shared()
+        if shared is not None and keys:
+            shared.delete_many([self._shared_key(key) for key in keys])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache.from_settings()
+
+
+def signed_cache_key(user_pk):
+    """Return the token cache key of a user's signed token snapshot"""
+    return f'signed:{user_pk}'
+
+
+def invalidate_user_tokens(user):
+    """Drop the cached snapshots of every token of a user"""
+    keys = Token.objects.filter(user=user).values_list('key', flat=True)
+    token_cache.delete(signed_cache_key(user.pk), *keys)
+
+
+def sign_token(user):
+    """Return a signed token for the current token generation of a user"""
+    signer = signing.TimestampSigner(salt=SIGNED_TOKEN_SALT)
+    return signer.sign(f'{user.pk}.{user.token_generation}')
+
+
+def unsign_token(key, max_age):
+    """Return the user id and token generation of a signed token.
+
+    Raises signing.SignatureExpired for tokens older than max_age seconds
+    and signing.BadSignature for anything else that was not issued here.
+    """
+    signer = signing.TimestampSigner(salt=SIGNED_TOKEN_SALT)
+    user_pk, generation = signer.unsign(key, max_age=max_age).split('.')
+    return int(user_pk), int(generation)
+
+
+def issue_token(user):
+    """Return a token for a user in the configured token mode"""
+    if token_setting('MODE') == 'signed':
+        return sign_token(user)
+    token, created = Token.objects.get_or_create(user=user)
+    return token.key
+
+
+def revoke_tokens(user):
+    """Invalidate every token issued to a user so far, in both modes"""
+    get_user_model().objects.filter(pk=user.pk).update(
+        token_generation=F('token_generation') + 1
+    )
+    invalidate_user_tokens(user)
+    Token.objects.filter(user=user).delete()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that skips the token lookup for known keys"""
+    cache = token_cache
+
+    def authenticate_credentials(self, key):
+        user = self.cache.get(key)
+        if user is None:
+            user, token = super().authenticate_credentials(key)
+            self.cache.set(key, user)
+            return user, token
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+        return user, Token(key=key, user=user)
+
+
+class SignedTokenAuthentication(TokenAuthentication):
+    """Authentication of stateless tokens signed with the SECRET_KEY.
+
+    A token carries the user id, its issue time and the user's token
+    generation, under an HMAC. Verifying it needs no token table and, while
+    the user snapshot is cached, no query at all. Bumping the generation
+    revokes every token issued before.
+    """
+    cache = token_cache
+
+    def authenticate_credentials(self, key):
+        try:
+            user_pk, generation = unsign_token(
+                key, max_age=token_setting('EXPIRY')
+            )
+        except signing.SignatureExpired:
+            raise exceptions.AuthenticationFailed(_('Token has expired.'))
+        except signing.BadSignature:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        cache_key = signed_cache_key(user_pk)
+        user = self.cache.get(cache_key)
+        if user is None:
+            # Read from the primary, a lagging replica may not know yet
+            # that the token generation was bumped.
+            users = get_user_model().objects.db_manager(
+                router.db_for_write(get_user_model())
+            )
+            try:
+                user = users.get(pk=user_pk)
+            except get_user_model().DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            self.cache.set(cache_key, user)
+
+        if user.token_generation != generation:
+            raise exceptions.AuthenticationFailed(_('Token has been revoked.'))
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+        return user, key
+
+
+class APITokenAuthentication(BaseAuthentication):
+    """Token authentication in the mode named by AUTH_TOKEN['MODE']"""
+    backends = {
+        'db': CachedTokenAuthentication,
+        'signed': SignedTokenAuthentication,
+    }
+
+    def get_backend(self):
+        return self.backends[token_setting('MODE')]()
+
+    def authenticate(self, request):
+        return self.get_backend().authenticate(request)
+
+    def authenticate_header(self, request):
+        return self.get_backend().authenticate_header(request)
@@ -1,7 +1,11 @@
 from django.contrib.auth import get_user_model, authenticate
+from django.core import signing
 from django.utils.translation import ugettext_lazy as _
 from rest_framework import serializers
 
+from core import hashing
+from users.authentication import token_setting, unsign_token
+
 
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for user object"""
@@ -21,7 +25,7 @@ class UserSerializer(serializers.ModelSerializer):
         passwd = validated_data.pop('password', None)
         user = super().update(instance, validated_data)
         if passwd:
-            user.set_password(passwd)
+            hashing.set_password(user, passwd)
             user.save()
         return user
 
@@ -49,3 +53,31 @@ class AuthTokenSerializer(serializers.Serializer):
 
         attrs['user'] = user
         return attrs
+
+
+class RefreshTokenSerializer(serializers.Serializer):
+    """Serializer for exchanging a signed token for a fresh one"""
+    token = serializers.CharField(trim_whitespace=False)
+
+    def validate(self, attrs):
+        """Validate the token is still within its refresh window"""
+        if token_setting('MODE') != 'signed':
+            msg = _('Token refresh is only available for signed tokens')
+            raise serializers.ValidationError(msg, code='mode')
+
+        msg = _('Token cannot be refreshed')
+        try:
+            user_pk, generation = unsign_token(
+                attrs['token'], max_age=token_setting('REFRESH_WINDOW')
+            )
+        except signing.BadSignature:
+            raise serializers.ValidationError(msg, code='authentication')
+
+        user = get_user_model().objects.filter(
+            pk=user_pk, token_generation=generation, is_active=True
+        ).first()
+        if user is None:
+            raise serializers.ValidationError(msg, code='authentication')
+
+        attrs['user'] = user
+        return attrs
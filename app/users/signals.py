@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from users.authentication import invalidate_user_tokens, token_cache
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_saved_user(sender, instance, **kwargs):
+    """Drop cached snapshots of a user, e.g. deactivated or new password.
+
+    New users are included, since a signed token snapshot is keyed by the
+    user id alone and ids of deleted users may be reused.
+    """
+    invalidate_user_tokens(instance)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Stop accepting a deleted token from the cache"""
+    token_cache.delete(instance.key)
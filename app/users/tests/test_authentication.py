@@ -0,0 +1,116 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from users.authentication import TokenCache, token_cache
+
+ME_URL = reverse('users:me')
+
+
+class CachedTokenAuthenticationTest(TestCase):
+    """Test token authentication backed by the token cache."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@excel.network', password='pass123', name='Test Name'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_cached_token_skips_queries(self):
+        """Test a known token authenticates without queries"""
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_invalid_token(self):
+        """Test unknown tokens are rejected"""
+        self.client.credentials(HTTP_AUTHORIZATION='Token notatoken')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_is_rejected(self):
+        """Test deleting a token invalidates the cached entry"""
+        self.client.get(ME_URL)
+        self.token.delete()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        """Test deactivating a user invalidates the cached entry"""
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_invalidates(self):
+        """Test updating the profile refreshes the cached snapshot"""
+        self.client.get(ME_URL)
+
+        res = self.client.patch(ME_URL, {'name': 'New Name',
+                                         'password': 'newpass987'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNone(token_cache.get(self.token.key))
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.data['name'], 'New Name')
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('newpass987'))
+
+
+class TokenCacheTest(TestCase):
+    """Test the token cache tiers."""
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted first"""
+        cache = TokenCache(max_entries=2, ttl=60)
+        cache.set('a', 'user a')
+        cache.set('b', 'user b')
+        cache.get('a')
+        cache.set('c', 'user c')
+
+        self.assertEqual(cache.get('a'), 'user a')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 'user c')
+
+    @patch('users.authentication.time.monotonic')
+    def test_ttl_expiry(self, monotonic):
+        """Test entries expire after the TTL"""
+        cache = TokenCache(ttl=10)
+        monotonic.return_value = 100
+        cache.set('a', 'user a')
+
+        monotonic.return_value = 109
+        self.assertEqual(cache.get('a'), 'user a')
+        monotonic.return_value = 111
+        self.assertIsNone(cache.get('a'))
+
+    def test_shared_tier(self):
+        """Test a shared cache fills other processes' local tiers"""
+        writer = TokenCache(shared_cache='default')
+        reader = TokenCache(shared_cache='default')
+        writer.set('a', 'user a')
+
+        self.assertEqual(reader.get('a'), 'user a')
+
+        writer.delete('a')
+        reader.clear()
+        self.assertIsNone(reader.get('a'))
@@ -0,0 +1,113 @@
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.hashing import HashingBusy, HashingPool
+
+CREATE_USER_URL = reverse('users:create')
+TOKEN_URL = reverse('users:token')
+
+
+def hashing_settings(iterations):
+    return {'WORKERS': 1, 'QUEUE_DEPTH': 4, 'TIMEOUT': None,
+            'ITERATIONS': iterations}
+
+
+class HashingPoolTest(TestCase):
+    """Test the bounded password hashing pool."""
+
+    def setUp(self):
+        self.pool = HashingPool(workers=1, queue_depth=0)
+        self.release = threading.Event()
+        started = threading.Event()
+
+        def hold():
+            started.set()
+            self.release.wait()
+
+        self.busy = threading.Thread(target=self.pool.run, args=(hold,))
+        self.busy.start()
+        started.wait()
+
+    def tearDown(self):
+        self.release.set()
+        self.busy.join()
+
+    def test_run_returns_result(self):
+        """Test calls run once a slot is free"""
+        self.release.set()
+        self.busy.join()
+
+        self.assertEqual(self.pool.run(sum, [1, 2]), 3)
+
+    def test_saturated_pool_fails_fast(self):
+        """Test calls beyond the queue depth are refused"""
+        with self.assertRaises(HashingBusy):
+            self.pool.run(sum, [1, 2])
+
+    def test_saturated_pool_returns_429(self):
+        """Test logins and sign ups are answered with 429 when saturated"""
+        client = APIClient()
+        with patch('core.hashing.pool', self.pool):
+            res = client.post(TOKEN_URL, {'email': 'test@excel.network',
+                                          'password': 'pass123'})
+            self.assertEqual(res.status_code,
+                             status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertIn('Retry-After', res)
+
+            res = client.post(CREATE_USER_URL, {'email': 'new@excel.network',
+                                                'password': 'pass123',
+                                                'name': 'New'})
+            self.assertEqual(res.status_code,
+                             status.HTTP_429_TOO_MANY_REQUESTS)
+
+        self.assertFalse(get_user_model().objects.exists())
+
+
+class RehashOnLoginTest(TestCase):
+    """Test passwords move to the preferred hasher on login."""
+
+    @override_settings(PASSWORD_HASHING=hashing_settings(1000))
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@excel.network', password='pass123'
+        )
+
+    def login(self, password='pass123'):
+        return APIClient().post(TOKEN_URL, {'email': self.user.email,
+                                            'password': password})
+
+    @override_settings(PASSWORD_HASHING=hashing_settings(2000))
+    def test_rehash_on_login(self):
+        """Test a password with outdated parameters is rehashed"""
+        res = self.login()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$2000$'))
+        self.assertTrue(self.user.check_password('pass123'))
+
+    @override_settings(PASSWORD_HASHING=hashing_settings(2000))
+    def test_no_rehash_on_failed_login(self):
+        """Test a wrong password leaves the stored hash alone"""
+        res = self.login(password='wrong')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+
+    @override_settings(PASSWORD_HASHING=hashing_settings(1000))
+    def test_current_hash_is_kept(self):
+        """Test a password with current parameters is not rewritten"""
+        password = self.user.password
+
+        self.login()
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.password, password)
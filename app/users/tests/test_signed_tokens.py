@@ -0,0 +1,159 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from users.authentication import sign_token, token_cache
+
+TOKEN_URL = reverse('users:token')
+REFRESH_URL = reverse('users:token-refresh')
+REVOKE_URL = reverse('users:token-revoke')
+ME_URL = reverse('users:me')
+
+SIGNED = {'MODE': 'signed', 'EXPIRY': 60, 'REFRESH_WINDOW': 600}
+
+
+@override_settings(AUTH_TOKEN=SIGNED)
+class SignedTokenTest(TestCase):
+    """Test the stateless signed token mode."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@excel.network', password='pass123', name='Test Name'
+        )
+        self.client = APIClient()
+
+    def authorize(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+
+    def test_create_signed_token(self):
+        """Test the token endpoint issues signed tokens, not DB rows"""
+        res = self.client.post(TOKEN_URL, {'email': self.user.email,
+                                           'password': 'pass123'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['expires_in'], SIGNED['EXPIRY'])
+        self.assertFalse(Token.objects.exists())
+
+        self.authorize(res.data['token'])
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_cached_signed_token_skips_queries(self):
+        """Test a verified token authenticates without queries"""
+        self.authorize(sign_token(self.user))
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_tampered_token_is_rejected(self):
+        """Test a token whose payload was changed is rejected"""
+        token = sign_token(self.user)
+        self.authorize('9' + token)
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_expired_token_is_rejected(self):
+        """Test tokens older than the expiry are rejected"""
+        with patch('django.core.signing.time.time', return_value=1000):
+            token = sign_token(self.user)
+        self.authorize(token)
+
+        with patch('django.core.signing.time.time', return_value=1061):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_token(self):
+        """Test an expired token can be refreshed within the window"""
+        with patch('django.core.signing.time.time', return_value=1000):
+            token = sign_token(self.user)
+
+        with patch('django.core.signing.time.time', return_value=1500):
+            res = self.client.post(REFRESH_URL, {'token': token})
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(res.data['token'], token)
+            self.authorize(res.data['token'])
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_refresh_outside_window_fails(self):
+        """Test tokens past the refresh window cannot be refreshed"""
+        with patch('django.core.signing.time.time', return_value=1000):
+            token = sign_token(self.user)
+
+        with patch('django.core.signing.time.time', return_value=1601):
+            res = self.client.post(REFRESH_URL, {'token': token})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_revoke_tokens(self):
+        """Test revoking invalidates every token issued so far"""
+        token = sign_token(self.user)
+        self.authorize(token)
+        self.client.get(ME_URL)
+
+        res = self.client.post(REVOKE_URL)
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        res = self.client.post(REFRESH_URL, {'token': token})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.user.refresh_from_db()
+        self.authorize(sign_token(self.user))
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_deactivated_user_is_rejected(self):
+        """Test deactivating a user drops the cached snapshot"""
+        self.authorize(sign_token(self.user))
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class DatabaseTokenModeTest(TestCase):
+    """Test the signed token endpoints in the default mode."""
+
+    def test_refresh_requires_signed_mode(self):
+        """Test refreshing is refused for database tokens"""
+        user = get_user_model().objects.create_user(
+            email='test@excel.network', password='pass123'
+        )
+        token = Token.objects.create(user=user)
+
+        res = APIClient().post(REFRESH_URL, {'token': token.key})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_revoke_deletes_database_token(self):
+        """Test revoking deletes the user's database token"""
+        user = get_user_model().objects.create_user(
+            email='test@excel.network', password='pass123'
+        )
+        token = Token.objects.create(user=user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        res = client.post(REVOKE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Token.objects.filter(user=user).exists())
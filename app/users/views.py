@@ -1,7 +1,21 @@
-from rest_framework import generics, authentication, permissions
+from django.contrib.auth import get_user_model
+from rest_framework import generics, permissions, status
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
-from users.serializers import UserSerializer, AuthTokenSerializer
+from rest_framework.views import APIView
+from users.authentication import (APITokenAuthentication, issue_token,
+                                  revoke_tokens, token_setting)
+from users.serializers import (UserSerializer, AuthTokenSerializer,
+                               RefreshTokenSerializer)
+
+
+def token_response(user):
+    """Return the token payload for a user in the configured mode"""
+    data = {'token': issue_token(user)}
+    if token_setting('MODE') == 'signed':
+        data['expires_in'] = token_setting('EXPIRY')
+    return Response(data)
 
 
 class CreateUserView(generics.CreateAPIView):
@@ -14,13 +28,37 @@ class CreateTokenView(ObtainAuthToken):
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
+    def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=request.data,
+                                           context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        return token_response(serializer.validated_data['user'])
+
+
+class RefreshTokenView(CreateTokenView):
+    """Exchange a signed token for a new one with a fresh expiry."""
+    serializer_class = RefreshTokenSerializer
+
+
+class RevokeTokenView(APIView):
+    """Revoke every token of the authenticated user."""
+    authentication_classes = (APITokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request):
+        revoke_tokens(request.user)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated User"""
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (APITokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):
         """Retrieve and return logged user"""
-        return self.request.user
+        if self.request.method in permissions.SAFE_METHODS:
+            return self.request.user
+        # The authenticated user may be a cached snapshot, never save it.
+        return get_user_model().objects.get(pk=self.request.user.pk)